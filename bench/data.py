@@ -0,0 +1,211 @@
+# bench/data.py
+import random
+from datetime import datetime, timedelta, timezone
+
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+DEFAULT_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CUSTOM_FIELD_BASE = 10000
+
+_STATUSES = [
+    ("To Do", "new"),
+    ("In Progress", "indeterminate"),
+    ("In Review", "indeterminate"),
+    ("Done", "done"),
+]
+_PRIORITIES = ["Highest", "High", "Medium", "Low", "Lowest"]
+_ISSUE_TYPES = ["Story", "Task", "Bug", "Sub-task"]
+WORDS = (
+    "sync deploy cliente factura error timeout api login reporte panel "
+    "pago boleta servidor cache usuario permiso exportar migrar"
+).split()
+
+
+def jira_datetime(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime(JIRA_DATETIME_FORMAT)
+
+
+def field_catalog(custom_fields: int) -> list:
+    """Respuesta de GET /rest/api/3/field para los issues generados."""
+    fields = [
+        {"id": name, "key": name, "name": name.capitalize(), "custom": False}
+        for name in (
+            "summary", "description", "status", "assignee", "reporter", "priority",
+            "issuetype", "parent", "labels", "created", "updated",
+        )
+    ]
+    fields.append({"id": "customfield_10020", "key": "customfield_10020", "name": "Sprint", "custom": True})
+    fields.append({"id": "customfield_10016", "key": "customfield_10016", "name": "Story Points", "custom": True})
+    for n in range(custom_fields):
+        field_id = f"customfield_{CUSTOM_FIELD_BASE + 100 + n}"
+        fields.append({"id": field_id, "key": field_id, "name": f"Bench Field {n}", "custom": True})
+    return fields
+
+
+class IssueFactory:
+    """
+    Issues sintéticos con la forma de la API v3 de Jira.
+
+    - custom_fields: campos custom extra por issue (tipos mezclados).
+    - changelog_depth: historias de changelog por issue (3 items c/u).
+    - payload_bytes: texto de relleno en description (aprox. bytes).
+
+    Es determinista con la misma semilla; touch() simula ediciones
+    (nueva fecha updated y una historia más de changelog).
+    """
+
+    def __init__(
+        self,
+        *,
+        project_key: str = "BENCH",
+        custom_fields: int = 10,
+        changelog_depth: int = 5,
+        payload_bytes: int = 0,
+        start: datetime = DEFAULT_START,
+        seed: int = 0,
+    ):
+        self.project_key = project_key
+        self.custom_fields = custom_fields
+        self.changelog_depth = changelog_depth
+        self.payload_bytes = payload_bytes
+        self.start = start
+        self.rng = random.Random(seed)
+        self._history_seq = 0
+
+    def _text(self, n_bytes: int) -> str:
+        words = []
+        size = 0
+        while size < n_bytes:
+            word = self.rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return " ".join(words)
+
+    def _user(self) -> dict:
+        n = self.rng.randrange(50)
+        return {"accountId": f"bench-user-{n}", "displayName": f"Usuario {n}", "active": True}
+
+    def _history(self, issue_id: str, created: datetime) -> dict:
+        self._history_seq += 1
+        status_from, status_to = self.rng.sample(_STATUSES, 2)
+        return {
+            "id": str(self._history_seq),
+            "author": self._user(),
+            "created": jira_datetime(created),
+            "items": [
+                {
+                    "field": "status",
+                    "fieldtype": "jira",
+                    "fieldId": "status",
+                    "from": str(_STATUSES.index(status_from)),
+                    "fromString": status_from[0],
+                    "to": str(_STATUSES.index(status_to)),
+                    "toString": status_to[0],
+                },
+                {
+                    "field": "assignee",
+                    "fieldtype": "jira",
+                    "fieldId": "assignee",
+                    "from": None,
+                    "fromString": None,
+                    "to": self._user()["accountId"],
+                    "toString": self._user()["displayName"],
+                },
+                {
+                    "field": "labels",
+                    "fieldtype": "jira",
+                    "fieldId": "labels",
+                    "from": None,
+                    "fromString": "",
+                    "to": None,
+                    "toString": self.rng.choice(WORDS),
+                },
+            ],
+        }
+
+    def _custom_value(self, n: int):
+        kind = n % 4
+        if kind == 0:
+            return self._text(24)
+        if kind == 1:
+            return self.rng.randrange(1000)
+        if kind == 2:
+            return {"value": self.rng.choice(WORDS), "id": str(self.rng.randrange(100))}
+        return [self.rng.choice(WORDS) for _ in range(self.rng.randrange(1, 4))]
+
+    def issue(self, n: int, created: datetime, updated: datetime) -> dict:
+        issue_id = str(CUSTOM_FIELD_BASE + n)
+        status, category = self.rng.choice(_STATUSES)
+        fields = {
+            "summary": self._text(60),
+            "description": {
+                "type": "doc",
+                "version": 1,
+                "content": [
+                    {
+                        "type": "paragraph",
+                        "content": [{"type": "text", "text": self._text(self.payload_bytes)}],
+                    }
+                ],
+            },
+            "status": {"name": status, "statusCategory": {"key": category}},
+            "assignee": self._user(),
+            "reporter": self._user(),
+            "priority": {"name": self.rng.choice(_PRIORITIES)},
+            "issuetype": {"name": self.rng.choice(_ISSUE_TYPES)},
+            "labels": self.rng.sample(WORDS, 2),
+            "created": jira_datetime(created),
+            "updated": jira_datetime(updated),
+            "customfield_10020": [{"id": 1 + n % 20, "name": f"Sprint {1 + n % 20}", "state": "closed"}],
+            "customfield_10016": float(self.rng.choice([1, 2, 3, 5, 8, 13])),
+        }
+        for c in range(self.custom_fields):
+            fields[f"customfield_{CUSTOM_FIELD_BASE + 100 + c}"] = self._custom_value(c)
+
+        span = max((updated - created).total_seconds(), 1.0)
+        histories = [
+            self._history(issue_id, created + timedelta(seconds=span * (h + 1) / self.changelog_depth))
+            for h in range(self.changelog_depth)
+        ]
+        return {
+            "id": issue_id,
+            "key": f"{self.project_key}-{n + 1}",
+            "self": f"/rest/api/3/issue/{issue_id}",
+            "fields": fields,
+            "changelog": {"startAt": 0, "total": len(histories), "histories": histories},
+        }
+
+    def issues(self, count: int, *, span_days: int = 365) -> list:
+        """count issues con created repartido en span_days y updated posterior."""
+        issues = []
+        step = timedelta(days=span_days) / max(count, 1)
+        for n in range(count):
+            created = self.start + step * n
+            updated = created + timedelta(minutes=self.rng.randrange(1, 60 * 24 * 30))
+            issues.append(self.issue(n, created, updated))
+        return issues
+
+    def touch(self, issue: dict, updated: datetime):
+        """Edición simulada: nueva fecha updated y una historia más."""
+        issue["fields"]["updated"] = jira_datetime(updated)
+        issue["fields"]["status"] = {"name": "Done", "statusCategory": {"key": "done"}}
+        changelog = issue["changelog"]
+        changelog["histories"].append(self._history(issue["id"], updated))
+        changelog["total"] = len(changelog["histories"])
+
+
+def generate_issues(
+    count: int,
+    *,
+    project_key: str = "BENCH",
+    custom_fields: int = 10,
+    changelog_depth: int = 5,
+    payload_bytes: int = 0,
+    seed: int = 0,
+) -> list:
+    return IssueFactory(
+        project_key=project_key,
+        custom_fields=custom_fields,
+        changelog_depth=changelog_depth,
+        payload_bytes=payload_bytes,
+        seed=seed,
+    ).issues(count)
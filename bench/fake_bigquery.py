@@ -0,0 +1,1027 @@
+# bench/fake_bigquery.py
+import hashlib
+import io
+import json
+import re
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from google.api_core.exceptions import BadRequest, Conflict, InternalServerError, NotFound
+from google.cloud import bigquery
+from google.cloud.bigquery.table import Row
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# ==========================================================
+# 🧱 Valores
+# ==========================================================
+def _ts(value):
+    """TIMESTAMP de BigQuery: datetime con zona UTC (naive = UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _coerce(value, field_type: str):
+    if value is None:
+        return None
+    if field_type == "TIMESTAMP":
+        return _ts(value)
+    if field_type in ("INTEGER", "INT64"):
+        return int(value)
+    if field_type in ("FLOAT", "FLOAT64"):
+        return float(value)
+    if field_type in ("BOOLEAN", "BOOL"):
+        return bool(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+def _read_long(buf, pos: int):
+    shift = result = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), pos
+
+
+def _read_bytes(buf, pos: int):
+    n, pos = _read_long(buf, pos)
+    return bytes(buf[pos:pos + n]), pos + n
+
+
+def read_avro(data: bytes) -> list:
+    """
+    Lector de Avro OCF para lo que produce bq.staging.encode_avro:
+    records de uniones ["null", tipo] con codec null o deflate.
+    """
+    if data[:4] != b"Obj\x01":
+        raise BadRequest("bench: archivo Avro inválido")
+    pos = 4
+    meta = {}
+    while True:
+        count, pos = _read_long(data, pos)
+        if count == 0:
+            break
+        if count < 0:
+            _, pos = _read_long(data, pos)
+            count = -count
+        for _ in range(count):
+            key, pos = _read_bytes(data, pos)
+            value, pos = _read_bytes(data, pos)
+            meta[key.decode()] = value
+    sync = data[pos:pos + 16]
+    pos += 16
+
+    schema = json.loads(meta["avro.schema"])
+    codec = meta.get("avro.codec", b"null").decode()
+    fields = []
+    for f in schema["fields"]:
+        branches = f["type"] if isinstance(f["type"], list) else [f["type"]]
+        fields.append((f["name"], branches))
+
+    rows = []
+    while pos < len(data):
+        count, pos = _read_long(data, pos)
+        block, pos = _read_bytes(data, pos)
+        if data[pos:pos + 16] != sync:
+            raise BadRequest("bench: marcador de sincronización Avro inválido")
+        pos += 16
+        if codec == "deflate":
+            block = zlib.decompress(block, -15)
+
+        p = 0
+        for _ in range(count):
+            row = {}
+            for name, branches in fields:
+                index, p = _read_long(block, p) if len(branches) > 1 else (0, p)
+                branch = branches[index]
+                kind = branch["type"] if isinstance(branch, dict) else branch
+                logical = branch.get("logicalType") if isinstance(branch, dict) else None
+                if kind == "null":
+                    value = None
+                elif kind == "long":
+                    value, p = _read_long(block, p)
+                    if logical == "timestamp-micros":
+                        value = _EPOCH + timedelta(microseconds=value)
+                elif kind == "double":
+                    value = struct.unpack("<d", block[p:p + 8])[0]
+                    p += 8
+                elif kind == "boolean":
+                    value = block[p] == 1
+                    p += 1
+                elif kind in ("string", "bytes"):
+                    value, p = _read_bytes(block, p)
+                    if kind == "string":
+                        value = value.decode("utf-8")
+                else:
+                    raise BadRequest(f"bench: tipo Avro no soportado: {kind}")
+                row[name] = value
+            rows.append(row)
+    return rows
+
+
+# ==========================================================
+# 🧮 Expresiones SQL (subconjunto que usa el ETL)
+# ==========================================================
+_TOKEN = re.compile(
+    r"\s*(?:"
+    r"(?P<string>'(?:[^'\\]|\\.)*')"
+    r"|(?P<param>@\w+)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<op>>=|<=|!=|<>|=|<|>|\(|\)|,|\*)"
+    r"|(?P<name>[A-Za-z_][\w.]*)"
+    r")"
+)
+_KEYWORDS = {"AND", "OR", "NOT", "IS", "NULL", "TRUE", "FALSE", "BETWEEN"}
+
+
+def _tokenize(sql: str) -> list:
+    tokens = []
+    pos = 0
+    sql = sql.strip()
+    while pos < len(sql):
+        match = _TOKEN.match(sql, pos)
+        if not match or match.end() == pos:
+            raise BadRequest(f"bench: SQL no soportado cerca de: {sql[pos:pos + 40]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "name" and value.upper() in _KEYWORDS:
+            kind, value = "kw", value.upper()
+        tokens.append((kind, value))
+    return tokens
+
+
+def _unquote(literal: str) -> str:
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+def _compare(op: str, a, b):
+    if a is None or b is None:
+        return None
+    if isinstance(a, datetime) or isinstance(b, datetime):
+        a, b = _ts(a), _ts(b)
+    return {
+        "=": a == b,
+        "!=": a != b,
+        "<>": a != b,
+        "<": a < b,
+        "<=": a <= b,
+        ">": a > b,
+        ">=": a >= b,
+    }[op]
+
+
+def _sha256(value):
+    if value is None:
+        return None
+    return hashlib.sha256(value.encode("utf-8") if isinstance(value, str) else value).digest()
+
+
+_JSON_PATH = re.compile(r'\$((?:\.(?:"[^"]*"|\w+))*)')
+_JSON_PATH_KEY = re.compile(r'\.(?:"([^"]*)"|(\w+))')
+
+
+def _json_node(value, path: str):
+    """Nodo de un JSON (string) en un JSONPath de solo miembros ($.a."b c")."""
+    match = _JSON_PATH.fullmatch(path)
+    if not match:
+        raise BadRequest(f"bench: JSONPath no soportado: {path}")
+    if value is None:
+        return None
+    try:
+        node = json.loads(value)
+    except ValueError:
+        return None
+    for quoted, plain in _JSON_PATH_KEY.findall(match.group(1)):
+        if not isinstance(node, dict):
+            return None
+        node = node.get(quoted or plain)
+    return node
+
+
+def _json_value(value, path: str = "$"):
+    node = _json_node(value, path)
+    if node is None or isinstance(node, (dict, list)):
+        return None
+    if isinstance(node, str):
+        return node
+    return json.dumps(node)
+
+
+def _json_query_array(value, path: str = "$"):
+    node = _json_node(value, path)
+    if not isinstance(node, list):
+        return None
+    return [json.dumps(item) for item in node]
+
+
+def _array_last(values):
+    if values is None:
+        return None
+    if not values:
+        raise BadRequest("bench: ARRAY_LAST de un arreglo vacío")
+    return values[-1]
+
+
+def _parse_timestamp(fmt: str, value):
+    if value is None:
+        return None
+    for python_fmt in (fmt.replace("%E*S", "%S.%f"), fmt.replace("%E*S", "%S")):
+        try:
+            return _ts(datetime.strptime(value, python_fmt))
+        except ValueError:
+            continue
+    raise BadRequest(f"bench: PARSE_TIMESTAMP falló: {value!r}")
+
+
+def _safe(function):
+    def call(*args):
+        try:
+            return function(*args)
+        except (BadRequest, TypeError, ValueError):
+            return None
+    return call
+
+
+def _cast(value, type_name: str):
+    if value is None:
+        return None
+    if type_name == "BOOL":
+        if isinstance(value, bool):
+            return value
+        lowered = str(value).lower()
+        if lowered not in ("true", "false"):
+            raise ValueError(value)
+        return lowered == "true"
+    if type_name == "INT64" and isinstance(value, str):
+        return int(value)
+    return _coerce(value, type_name)
+
+
+_FUNCTIONS = {
+    "TIMESTAMP": lambda v: _ts(v),
+    "SHA256": _sha256,
+    "TO_HEX": lambda v: v.hex() if v is not None else None,
+    "CURRENT_TIMESTAMP": lambda: datetime.now(timezone.utc),
+    "IF": lambda cond, a, b: a if cond else b,
+    "COALESCE": lambda *values: next((v for v in values if v is not None), None),
+    "JSON_VALUE": _json_value,
+    "JSON_QUERY_ARRAY": _json_query_array,
+    "ARRAY_LENGTH": lambda values: len(values) if values is not None else None,
+    "ARRAY_LAST": _array_last,
+    "SAFE.PARSE_TIMESTAMP": _safe(_parse_timestamp),
+}
+
+
+class _Parser:
+    """
+    Compila una expresión a una función ctx → valor, con ctx =
+    {"T": fila destino, "S": fila fuente, "row": fila, "params", "vars"}.
+    """
+
+    def __init__(self, sql: str):
+        self.tokens = _tokenize(sql)
+        self.pos = 0
+
+    def peek(self, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if value is not None and token[1] != value:
+            return None
+        return token
+
+    def take(self, value=None):
+        token = self.peek(value)
+        if token is None:
+            raise BadRequest(f"bench: se esperaba {value!r} en {self.tokens[self.pos:self.pos + 5]}")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        fn = self.expr()
+        if self.pos != len(self.tokens):
+            raise BadRequest(f"bench: SQL sobrante: {self.tokens[self.pos:]}")
+        return fn
+
+    def expr(self):
+        left = self.conj()
+        while self.peek("OR"):
+            self.take()
+            right = self.conj()
+            left = lambda c, a=left, b=right: bool(a(c)) or bool(b(c))
+        return left
+
+    def conj(self):
+        left = self.neg()
+        while self.peek("AND"):
+            self.take()
+            right = self.neg()
+            left = lambda c, a=left, b=right: bool(a(c)) and bool(b(c))
+        return left
+
+    def neg(self):
+        if self.peek("NOT"):
+            self.take()
+            inner = self.neg()
+            return lambda c: not inner(c)
+        return self.comparison()
+
+    def comparison(self):
+        left = self.primary()
+        token = self.peek()
+        if token and token[0] == "op" and token[1] in ("=", "!=", "<>", "<", "<=", ">", ">="):
+            self.take()
+            right = self.primary()
+            return lambda c, op=token[1]: _compare(op, left(c), right(c))
+        if self.peek("IS"):
+            self.take()
+            negate = bool(self.peek("NOT")) and self.take()
+            self.take("NULL")
+            return lambda c: (left(c) is None) != bool(negate)
+        if self.peek("BETWEEN"):
+            self.take()
+            low = self.primary()
+            self.take("AND")
+            high = self.primary()
+            return lambda c: (
+                _compare(">=", left(c), low(c)) and _compare("<=", left(c), high(c))
+            )
+        return left
+
+    def primary(self):
+        kind, value = self.take()
+        if value == "(":
+            inner = self.expr()
+            self.take(")")
+            return inner
+        if kind == "string":
+            literal = _unquote(value)
+            return lambda c: literal
+        if kind == "number":
+            number = float(value) if "." in value else int(value)
+            return lambda c: number
+        if kind == "param":
+            name = value[1:]
+            return lambda c: c["params"][name]
+        if kind == "kw":
+            constant = {"NULL": None, "TRUE": True, "FALSE": False}[value]
+            return lambda c: constant
+        if kind == "name" and value.upper() in ("CAST", "SAFE_CAST") and self.peek("("):
+            self.take("(")
+            inner = self.expr()
+            as_kw = self.take()
+            if as_kw[1].upper() != "AS":
+                raise BadRequest(f"bench: se esperaba AS en {value}")
+            type_name = self.take()[1].upper()
+            self.take(")")
+            cast = _safe(_cast) if value.upper() == "SAFE_CAST" else _cast
+            return lambda c: cast(inner(c), type_name)
+        if kind == "name" and self.peek("("):
+            function = _FUNCTIONS.get(value.upper())
+            if function is None:
+                raise BadRequest(f"bench: función no soportada: {value}")
+            self.take("(")
+            args = []
+            while not self.peek(")"):
+                args.append(self.expr())
+                if self.peek(","):
+                    self.take(",")
+            self.take(")")
+            if value.upper() == "IF":
+                # Como en BigQuery, solo se evalúa la rama elegida.
+                return lambda c: args[1](c) if args[0](c) else args[2](c)
+            return lambda c: function(*(a(c) for a in args))
+        if kind == "name":
+            if "." in value:
+                alias, column = value.split(".", 1)
+                return lambda c: c[alias].get(column)
+            return lambda c: c["vars"][value] if value in c["vars"] else c["row"].get(value)
+        raise BadRequest(f"bench: token inesperado {value!r}")
+
+
+def compile_expr(sql: str):
+    return _Parser(sql).parse()
+
+
+def _split_top(sql: str, sep: str = ",") -> list:
+    """Divide por `sep` fuera de paréntesis y strings."""
+    parts, depth, quote, start = [], 0, False, 0
+    i = 0
+    while i < len(sql):
+        ch = sql[i]
+        if quote:
+            if ch == "\\":
+                i += 1
+            elif ch == "'":
+                quote = False
+        elif ch == "'":
+            quote = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif depth == 0 and sql.startswith(sep, i):
+            parts.append(sql[start:i])
+            start = i + len(sep)
+            i = start
+            continue
+        i += 1
+    parts.append(sql[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _statements(script: str) -> list:
+    return _split_top(script, ";")
+
+
+# ==========================================================
+# 🗄 Jobs
+# ==========================================================
+class FakeJob:
+    def __init__(self, kind: str, *, rows=None, schema=None, statement_type=None, inserted=0, updated=0, deleted=0):
+        self.job_id = f"bench_{kind}_{uuid.uuid4().hex[:12]}"
+        self.job_type = kind
+        self.statement_type = statement_type
+        self.dml_stats = SimpleNamespace(
+            inserted_row_count=inserted,
+            updated_row_count=updated,
+            deleted_row_count=deleted,
+        )
+        self.num_dml_affected_rows = inserted + updated + deleted
+        self._rows = rows or []
+        self._schema = schema or []
+
+    def result(self, *args, **kwargs):
+        index = {name: i for i, name in enumerate(self._schema)}
+        return [Row(tuple(r.get(n) for n in self._schema), index) for r in self._rows]
+
+    def done(self) -> bool:
+        return True
+
+
+# ==========================================================
+# 🧪 Cliente
+# ==========================================================
+class FakeBigQueryClient:
+    """
+    Reemplazo en proceso de bigquery.Client para bench/: tablas en
+    memoria y un intérprete del SQL que emite el ETL (MERGE, DELETE,
+    UPDATE, TRUNCATE, SELECT simples, scripts con transacción y la
+    migración CREATE TABLE AS SELECT). Los scripts son atómicos: si una
+    sentencia falla, las tablas vuelven a su estado previo.
+
+    - job_latency: segundos de espera por job (query / load / copy),
+      para modelar el overhead fijo de un job real de BigQuery.
+    - drop_columns: columnas que no se guardan (p. ej. raw_json), para
+      que la memoria del doble no se sume al RSS medido.
+    - fail_merges: ordinales (desde 1) de los MERGE sobre tablas cuyo
+      nombre calza con fail_merge_target que fallan con
+      InternalServerError, contados durante toda la vida del cliente.
+      El script completo hace rollback, como en BigQuery.
+
+    Lo no soportado falla con BadRequest en vez de ignorarse.
+    """
+
+    def __init__(
+        self,
+        project: str = "bench",
+        *,
+        job_latency: float = 0.0,
+        drop_columns=(),
+        fail_merges=(),
+        fail_merge_target: str = r"_raw$",
+    ):
+        self.project = project
+        self.job_latency = job_latency
+        self.drop_columns = set(drop_columns)
+        self.fail_merges = set(fail_merges)
+        self.fail_merge_target = re.compile(fail_merge_target)
+        self.merges_seen = 0
+        self.merges_failed = 0
+
+        self.datasets = set()
+        self.tables = {}
+        self.rows = {}
+        self.children = {}
+        self.stats = {}
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------
+    # utilidades
+    # ------------------------------------------------------
+    def _full(self, ref) -> str:
+        if isinstance(ref, str):
+            parts = ref.replace(":", ".").split(".")
+            if len(parts) == 2:
+                parts = [self.project] + parts
+            return ".".join(parts)
+        return f"{ref.project}.{ref.dataset_id}.{ref.table_id}"
+
+    def _table(self, full: str) -> bigquery.Table:
+        table = self.tables.get(full)
+        if table is None:
+            raise NotFound(f"Not found: Table {full}")
+        return table
+
+    def _record(self, kind: str, started: float):
+        if self.job_latency:
+            time.sleep(self.job_latency)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            entry = self.stats.setdefault(kind, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += elapsed
+
+    def _store(self, full: str, rows) -> list:
+        types = {f.name: f.field_type for f in self._table(full).schema}
+        stored = []
+        for row in rows:
+            stored.append({
+                name: None if name in self.drop_columns else _coerce(row.get(name), field_type)
+                for name, field_type in types.items()
+            })
+        return stored
+
+    # ------------------------------------------------------
+    # datasets / tablas
+    # ------------------------------------------------------
+    def get_dataset(self, ref):
+        ref = ref if isinstance(ref, str) else f"{ref.project}.{ref.dataset_id}"
+        if ref not in self.datasets:
+            raise NotFound(f"Not found: Dataset {ref}")
+        return bigquery.Dataset(ref)
+
+    def create_dataset(self, dataset, exists_ok: bool = False):
+        ref = dataset if isinstance(dataset, str) else f"{dataset.project}.{dataset.dataset_id}"
+        with self._lock:
+            if ref in self.datasets and not exists_ok:
+                raise Conflict(f"Already Exists: Dataset {ref}")
+            self.datasets.add(ref)
+        return bigquery.Dataset(ref)
+
+    def get_table(self, ref) -> bigquery.Table:
+        full = self._full(ref)
+        with self._lock:
+            table = self._table(full)
+            table._properties["numRows"] = str(len(self.rows[full]))
+            return table
+
+    def create_table(self, table, exists_ok: bool = False) -> bigquery.Table:
+        if isinstance(table, str):
+            table = bigquery.Table(table)
+        full = self._full(table)
+        with self._lock:
+            if full in self.tables:
+                if exists_ok:
+                    return self.tables[full]
+                raise Conflict(f"Already Exists: Table {full}")
+            created = bigquery.Table(full, schema=list(table.schema))
+            created.time_partitioning = table.time_partitioning
+            created.clustering_fields = table.clustering_fields
+            self.tables[full] = created
+            self.rows[full] = []
+            return created
+
+    def update_table(self, table, fields) -> bigquery.Table:
+        full = self._full(table)
+        with self._lock:
+            stored = self._table(full)
+            for field in fields:
+                setattr(stored, field, getattr(table, field))
+            if "schema" in fields:
+                names = [f.name for f in stored.schema]
+                self.rows[full] = [{n: r.get(n) for n in names} for r in self.rows[full]]
+            return stored
+
+    def delete_table(self, ref, not_found_ok: bool = False):
+        full = self._full(ref)
+        with self._lock:
+            if full not in self.tables:
+                if not_found_ok:
+                    return
+                raise NotFound(f"Not found: Table {full}")
+            del self.tables[full]
+            del self.rows[full]
+
+    def copy_table(self, source, destination, job_config=None) -> FakeJob:
+        started = time.perf_counter()
+        src, dst = self._full(source), self._full(destination)
+        with self._lock:
+            table = self._table(src)
+            copied = bigquery.Table(dst, schema=list(table.schema))
+            copied.time_partitioning = table.time_partitioning
+            copied.clustering_fields = table.clustering_fields
+            self.tables[dst] = copied
+            self.rows[dst] = list(self.rows[src])
+        self._record("copy", started)
+        return FakeJob("copy")
+
+    # ------------------------------------------------------
+    # cargas
+    # ------------------------------------------------------
+    def _load(self, rows, destination, job_config, schema) -> FakeJob:
+        full = self._full(destination)
+        with self._lock:
+            if full not in self.tables:
+                if not schema:
+                    raise NotFound(f"Not found: Table {full}")
+                self.create_table(bigquery.Table(full, schema=schema))
+            stored = self._store(full, rows)
+            if job_config is not None and job_config.write_disposition == "WRITE_TRUNCATE":
+                self.rows[full] = stored
+            else:
+                self.rows[full] = self.rows[full] + stored
+        return FakeJob("load")
+
+    def load_table_from_file(self, file_obj, destination, size=None, job_config=None, **kwargs) -> FakeJob:
+        started = time.perf_counter()
+        payload = file_obj.read(size) if size else file_obj.read()
+        source_format = job_config.source_format if job_config is not None else None
+        schema = list(job_config.schema or []) if job_config is not None else []
+
+        if source_format == bigquery.SourceFormat.AVRO:
+            rows = read_avro(payload)
+            if not schema:
+                avro_types = {"long": "INTEGER", "double": "FLOAT", "boolean": "BOOLEAN", "string": "STRING"}
+                first = rows[0] if rows else {}
+                schema = [bigquery.SchemaField(name, avro_types.get(type(v).__name__, "STRING")) for name, v in first.items()]
+        elif source_format == bigquery.SourceFormat.NEWLINE_DELIMITED_JSON:
+            rows = [json.loads(line) for line in io.BytesIO(payload) if line.strip()]
+        else:
+            raise BadRequest(f"bench: formato de carga no soportado: {source_format}")
+
+        job = self._load(rows, destination, job_config, schema)
+        self._record("load", started)
+        return job
+
+    def load_table_from_json(self, json_rows, destination, job_config=None, **kwargs) -> FakeJob:
+        started = time.perf_counter()
+        schema = list(job_config.schema or []) if job_config is not None else []
+        job = self._load(list(json_rows), destination, job_config, schema)
+        self._record("load", started)
+        return job
+
+    def insert_rows_json(self, table, json_rows, **kwargs) -> list:
+        full = self._full(table)
+        with self._lock:
+            self.rows[full] = self.rows[full] + self._store(full, json_rows)
+        return []
+
+    # ------------------------------------------------------
+    # queries
+    # ------------------------------------------------------
+    def list_jobs(self, parent_job=None, **kwargs) -> list:
+        job_id = parent_job if isinstance(parent_job, str) else getattr(parent_job, "job_id", None)
+        return list(self.children.get(job_id, []))
+
+    def query(self, sql: str, job_config=None, **kwargs) -> FakeJob:
+        started = time.perf_counter()
+        params = {
+            p.name: _ts(p.value) if p.type_ == "TIMESTAMP" else p.value
+            for p in (job_config.query_parameters if job_config is not None else [])
+        }
+        statements = _statements(sql)
+
+        with self._lock:
+            snapshot = {full: list(rows) for full, rows in self.rows.items()}
+            tables = dict(self.tables)
+            script = {"params": params, "vars": {}}
+            results = []
+            try:
+                for statement in statements:
+                    results.append(self._execute(statement, script))
+            except Exception:
+                self.rows = snapshot
+                self.tables = tables
+                raise
+
+        results = [job for job in results if job is not None]
+        if len(statements) == 1 and results:
+            job = results[0]
+        else:
+            job = FakeJob("script", statement_type="SCRIPT")
+            self.children[job.job_id] = list(reversed(results))
+        self._record("merge" if any(j.statement_type == "MERGE" for j in results) else "query", started)
+        return job
+
+    def _execute(self, statement: str, script: dict):
+        head = statement.split(None, 2)
+        keyword = head[0].upper()
+
+        if keyword in ("BEGIN", "COMMIT"):
+            return None
+        if keyword == "DECLARE":
+            script["vars"][head[1]] = None
+            return None
+        if keyword == "SET":
+            match = re.fullmatch(r"SET\s+(\w+)\s*=\s*\((.*)\)", statement, re.S)
+            if not match:
+                raise BadRequest(f"bench: SET no soportado: {statement[:80]}")
+            rows, columns = self._select(match.group(2), script)
+            script["vars"][match.group(1)] = rows[0][columns[0]] if rows else None
+            return None
+        if keyword == "SELECT":
+            rows, columns = self._select(statement, script)
+            return FakeJob("query", rows=rows, schema=columns, statement_type="SELECT")
+        if keyword == "MERGE":
+            return self._merge(statement, script)
+        if keyword == "DELETE":
+            return self._delete(statement, script)
+        if keyword == "UPDATE":
+            return self._update(statement, script)
+        if keyword == "INSERT":
+            return self._insert(statement, script)
+        if keyword == "TRUNCATE":
+            full = self._full(re.search(r"`([^`]+)`", statement).group(1))
+            deleted = len(self.rows[full])
+            self._table(full)
+            self.rows[full] = []
+            return FakeJob("query", statement_type="TRUNCATE_TABLE", deleted=deleted)
+        if keyword == "CREATE":
+            return self._create_as_select(statement)
+        raise BadRequest(f"bench: sentencia no soportada: {statement[:80]}")
+
+    def _ctx(self, script: dict, row=None, **aliases) -> dict:
+        return {"params": script["params"], "vars": script["vars"], "row": row or {}, **aliases}
+
+    def _select(self, statement: str, script: dict):
+        match = re.fullmatch(
+            r"SELECT\s+(.*?)\s+FROM\s+`([^`]+)`"
+            r"(?:\s+WHERE\s+(.*?))?"
+            r"(?:\s+ORDER BY\s+(\w+)(?:\s+(ASC|DESC))?)?"
+            r"(?:\s+LIMIT\s+(\d+))?",
+            statement.strip(),
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: SELECT no soportado: {statement[:80]}")
+        select, table, where, order, direction, limit = match.groups()
+        full = self._full(table)
+        self._table(full)
+
+        rows = self.rows[full]
+        if where:
+            condition = compile_expr(where)
+            rows = [r for r in rows if condition(self._ctx(script, r))]
+
+        if select.strip() == "*":
+            if order:
+                rows = sorted(
+                    rows,
+                    key=lambda r: (r.get(order) is not None, r.get(order) or 0),
+                    reverse=(direction or "ASC").upper() == "DESC",
+                )
+            if limit:
+                rows = rows[:int(limit)]
+            return rows, [f.name for f in self.tables[full].schema]
+
+        out, columns = {}, []
+        for item in _split_top(select):
+            agg = re.fullmatch(r"(MAX|MIN|ANY_VALUE|COUNT)\((DISTINCT\s+)?(\w+|\*)\)(?:\s+(?:AS\s+)?(\w+))?", item, re.I)
+            if not agg:
+                raise BadRequest(f"bench: expresión SELECT no soportada: {item}")
+            func, distinct, column, alias = agg.groups()
+            values = [r.get(column) for r in rows] if column != "*" else [1] * len(rows)
+            present = [v for v in values if v is not None]
+            func = func.upper()
+            if func == "COUNT":
+                value = len(set(present)) if distinct else len(present)
+            elif func == "MAX":
+                value = max(present) if present else None
+            elif func == "MIN":
+                value = min(present) if present else None
+            else:
+                value = present[0] if present else None
+            name = alias or f"f{len(columns)}_"
+            out[name] = value
+            columns.append(name)
+        return [out], columns
+
+    def _delete(self, statement: str, script: dict) -> FakeJob:
+        match = re.fullmatch(r"DELETE\s+FROM\s+`([^`]+)`\s+WHERE\s+(.*)", statement.strip(), re.S | re.I)
+        if not match:
+            raise BadRequest(f"bench: DELETE no soportado: {statement[:80]}")
+        full = self._full(match.group(1))
+        self._table(full)
+        condition = compile_expr(match.group(2))
+        kept = [r for r in self.rows[full] if not condition(self._ctx(script, r))]
+        deleted = len(self.rows[full]) - len(kept)
+        self.rows[full] = kept
+        return FakeJob("query", statement_type="DELETE", deleted=deleted)
+
+    def _update(self, statement: str, script: dict) -> FakeJob:
+        match = re.fullmatch(
+            r"UPDATE\s+`([^`]+)`\s+SET\s+(.*?)\s+WHERE\s+(.*)",
+            statement.strip(),
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: UPDATE no soportado: {statement[:80]}")
+        full = self._full(match.group(1))
+        self._table(full)
+        assignments = [
+            (column.strip(), compile_expr(expr))
+            for column, expr in (a.split("=", 1) for a in _split_top(match.group(2)))
+        ]
+        condition = compile_expr(match.group(3))
+
+        updated = 0
+        rows = []
+        for row in self.rows[full]:
+            ctx = self._ctx(script, row)
+            if condition(ctx):
+                row = {**row, **{column: fn(ctx) for column, fn in assignments}}
+                updated += 1
+            rows.append(row)
+        self.rows[full] = self._store(full, rows) if updated else rows
+        return FakeJob("query", statement_type="UPDATE", updated=updated)
+
+    def _insert(self, statement: str, script: dict) -> FakeJob:
+        match = re.fullmatch(
+            r"INSERT\s+INTO\s+`([^`]+)`\s*\((.*?)\)\s*VALUES\s*\((.*)\)",
+            statement.strip(),
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: INSERT no soportado: {statement[:80]}")
+        full = self._full(match.group(1))
+        self._table(full)
+        columns = [c.strip() for c in match.group(2).split(",")]
+        values = [compile_expr(v) for v in _split_top(match.group(3))]
+        ctx = self._ctx(script)
+        row = {column: fn(ctx) for column, fn in zip(columns, values)}
+        self.rows[full] = self.rows[full] + self._store(full, [row])
+        return FakeJob("query", statement_type="INSERT", inserted=1)
+
+    def _create_as_select(self, statement: str) -> FakeJob:
+        match = re.fullmatch(
+            r"CREATE\s+TABLE\s+`([^`]+)`\s+PARTITION BY\s+TIMESTAMP_TRUNC\((\w+),\s*(\w+)\)"
+            r"(?:\s+CLUSTER BY\s+([\w,\s]+?))?\s+AS\s+SELECT\s+\*\s+FROM\s+`([^`]+)`",
+            statement.strip(),
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: CREATE no soportado: {statement[:80]}")
+        target, field, unit, cluster, source = match.groups()
+        source_full = self._full(source)
+        table = bigquery.Table(self._full(target), schema=list(self._table(source_full).schema))
+        table.time_partitioning = bigquery.TimePartitioning(type_=unit.upper(), field=field)
+        if cluster:
+            table.clustering_fields = [c.strip() for c in cluster.split(",")]
+        self.create_table(table)
+        self.rows[self._full(target)] = list(self.rows[source_full])
+        return FakeJob("query", statement_type="CREATE_TABLE_AS_SELECT")
+
+    # ------------------------------------------------------
+    # MERGE
+    # ------------------------------------------------------
+    def _merge_source(self, source: str, script: dict) -> list:
+        source = source.strip()
+        if source.startswith("`"):
+            full = self._full(source.strip("`"))
+            self._table(full)
+            return list(self.rows[full])
+
+        # Fila literal, p. ej. (SELECT @state_target AS target_table).
+        literal = re.fullmatch(r"\(\s*SELECT\s+((?:(?!\bFROM\b).)*?)\s*\)", source, re.S | re.I)
+        if literal:
+            row = {}
+            for item in _split_top(literal.group(1)):
+                expr, alias = re.fullmatch(r"(.*?)\s+AS\s+(\w+)", item.strip(), re.S | re.I).groups()
+                row[alias] = compile_expr(expr)(self._ctx(script))
+            return [row]
+
+        match = re.fullmatch(
+            r"\(\s*SELECT\s+\*\s+FROM\s+`([^`]+)`\s+WHERE\s+(.*?)"
+            r"(?:\s+QUALIFY\s+ROW_NUMBER\(\)\s+OVER\s+\(\s*PARTITION BY\s+(\w+)\s+ORDER BY\s+(.*?)\s*\)\s*=\s*1)?\s*\)",
+            source,
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: fuente de MERGE no soportada: {source[:80]}")
+        table, where, partition, order = match.groups()
+        full = self._full(table)
+        self._table(full)
+        condition = compile_expr(where)
+        rows = [r for r in self.rows[full] if condition(self._ctx(script, r))]
+        if not partition:
+            return rows
+
+        # ROW_NUMBER() = 1: sort estable, de la clave menos a la más
+        # significativa. NULL va primero en ASC y último en DESC.
+        for term in reversed(_split_top(order)):
+            parts = term.rsplit(None, 1)
+            descending = False
+            if len(parts) == 2 and parts[1].upper() in ("ASC", "DESC"):
+                term, descending = parts[0], parts[1].upper() == "DESC"
+            key = compile_expr(term)
+
+            def sort_key(row, key=key):
+                value = key(self._ctx(script, row))
+                return (value is not None, value if value is not None else 0)
+
+            rows.sort(key=sort_key, reverse=descending)
+        seen, latest = set(), []
+        for row in rows:
+            if row.get(partition) not in seen:
+                seen.add(row.get(partition))
+                latest.append(row)
+        return latest
+
+    def _merge(self, statement: str, script: dict) -> FakeJob:
+        match = re.fullmatch(
+            r"MERGE\s+`([^`]+)`\s+T\s+USING\s+(.*?)\s+S\s+ON\s+(.*?)\s+(WHEN\s+.*)",
+            statement.strip(),
+            re.S | re.I,
+        )
+        if not match:
+            raise BadRequest(f"bench: MERGE no soportado: {statement[:80]}")
+        target, source, on, whens = match.groups()
+        full = self._full(target)
+        self._table(full)
+        if self.fail_merge_target.search(full):
+            self.merges_seen += 1
+            if self.merges_seen in self.fail_merges:
+                self.merges_failed += 1
+                raise InternalServerError(f"bench: falla inyectada en el MERGE #{self.merges_seen} ({full})")
+        source_rows = self._merge_source(source, script)
+
+        # ON: las igualdades T.x = S.y hacen el join; el resto se evalúa
+        # sobre T (predicados de poda: una fila destino fuera del rango no
+        # calza y el issue se insertaría duplicado, como en BigQuery).
+        keys = re.findall(r"T\.(\w+)\s*=\s*S\.(\w+)", on)
+        if not keys:
+            raise BadRequest(f"bench: MERGE sin igualdad de join: {on[:80]}")
+        target_filter = compile_expr(re.sub(r"T\.\w+\s*=\s*S\.\w+", "TRUE", on))
+
+        matched_when = re.search(
+            r"WHEN\s+MATCHED(?:\s+AND\s+(.*?))?\s+THEN\s+UPDATE\s+SET\s+(.*?)\s+(?=WHEN\s+NOT\s+MATCHED|$)",
+            whens,
+            re.S | re.I,
+        )
+        insert_when = re.search(
+            r"WHEN\s+NOT\s+MATCHED\s+THEN\s+INSERT\s*\((.*?)\)\s*VALUES\s*\((.*)\)\s*$",
+            whens,
+            re.S | re.I,
+        )
+        update_condition = compile_expr(matched_when.group(1)) if matched_when and matched_when.group(1) else None
+        assignments = []
+        if matched_when:
+            assignments = [
+                (column.strip(), compile_expr(expr))
+                for column, expr in (a.split("=", 1) for a in _split_top(matched_when.group(2)))
+            ]
+        insert_columns = [c.strip() for c in insert_when.group(1).split(",")] if insert_when else []
+        insert_values = [compile_expr(v) for v in _split_top(insert_when.group(2))] if insert_when else []
+
+        target_rows = list(self.rows[full])
+        index = {}
+        for position, row in enumerate(target_rows):
+            ctx = self._ctx(script, T=row, S={})
+            if target_filter(ctx):
+                index.setdefault(tuple(row.get(t) for t, _ in keys), []).append(position)
+
+        inserted = updated = 0
+        touched = set()
+        new_rows = []
+        for source_row in source_rows:
+            positions = index.get(tuple(source_row.get(s) for _, s in keys), [])
+            if positions:
+                for position in positions:
+                    if position in touched:
+                        raise BadRequest(
+                            "UPDATE/MERGE must match at most one source row for each target row"
+                        )
+                    touched.add(position)
+                    ctx = self._ctx(script, T=target_rows[position], S=source_row)
+                    if matched_when and (update_condition is None or update_condition(ctx)):
+                        target_rows[position] = {
+                            **target_rows[position],
+                            **{column: fn(ctx) for column, fn in assignments},
+                        }
+                        updated += 1
+            elif insert_when:
+                ctx = self._ctx(script, T={}, S=source_row)
+                new_rows.append({c: fn(ctx) for c, fn in zip(insert_columns, insert_values)})
+                inserted += 1
+
+        self.rows[full] = self._store(full, target_rows + new_rows) if (updated or inserted) else target_rows
+        return FakeJob("query", statement_type="MERGE", inserted=inserted, updated=updated)
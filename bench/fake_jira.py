@@ -0,0 +1,492 @@
+# bench/fake_jira.py
+import base64
+import gzip
+import json
+import multiprocessing
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from bench.data import WORDS, IssueFactory, field_catalog
+
+DEFAULT_CONFIG = {
+    # Datos (ver bench.data.IssueFactory)
+    "issues": 1000,
+    "project_key": "BENCH",
+    "custom_fields": 10,
+    "changelog_depth": 5,
+    "payload_bytes": 0,
+    "seed": 0,
+    "boards": 0,                  # boards 1..N, cada uno filtra por un label
+    # Comportamiento del servidor
+    "max_results_cap": 100,       # tope de maxResults por página
+    "changelog_inline": 100,      # historias incluidas con expand=changelog
+    "latency_ms": 0.0,            # latencia fija por request
+    "per_issue_ms": 0.0,          # latencia adicional por issue devuelto
+    "compress": True,             # gzip si el cliente lo acepta
+    # Inyección de fallas (fracción de requests)
+    "error_rate_429": 0.0,
+    "error_rate_5xx": 0.0,
+    "retry_after": "1",           # header Retry-After de los 429 (None = sin header)
+    "search_jql_status": None,    # p. ej. 404: search/jql falla siempre → fallback a /search
+}
+
+# Cada issue lleva 2 labels de WORDS: un board ve ~2/len(WORDS) del proyecto.
+BOARD_LABELS = WORDS
+FILTER_ID_BASE = 10000
+
+_JQL_TOKEN = re.compile(r'\(|\)|"[^"]*"|[^\s()"]+')
+_JQL_CLAUSE = re.compile(r'^\s*(\w+)\s*(>=|<=|=|<|>)\s*"?([^"]*?)"?\s*$')
+_JQL_DATETIME_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d")
+_OPERATORS = {
+    "=": lambda a, b: a == b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+
+class JqlError(ValueError):
+    pass
+
+
+def _parse_jql_datetime(value: str) -> datetime:
+    for fmt in _JQL_DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    raise JqlError(f"fecha JQL inválida: {value}")
+
+
+def _issue_datetime(issue: dict, field: str) -> datetime:
+    return datetime.fromisoformat(issue["fields"][field])
+
+
+def _compile_clause(clause: str):
+    match = _JQL_CLAUSE.match(clause)
+    if not match:
+        raise JqlError(f"cláusula JQL no soportada: {clause}")
+    field, op, value = match.groups()
+    field = field.lower()
+    compare = _OPERATORS[op]
+
+    if field == "project":
+        prefix = f"{value}-"
+        return lambda i: i["key"].startswith(prefix)
+    if field == "labels" and op == "=":
+        return lambda i: value in i["fields"]["labels"]
+    if field == "key":
+        return lambda i: compare(i["key"], value)
+    if field in ("created", "updated"):
+        bound = _parse_jql_datetime(value)
+        return lambda i: compare(_issue_datetime(i, field), bound)
+    raise JqlError(f"campo JQL no soportado: {field}")
+
+
+def _compile_where(tokens: list):
+    """Descenso recursivo: OR < AND < (paréntesis | cláusula)."""
+
+    def parse_or():
+        terms = [parse_and()]
+        while tokens and tokens[0].upper() == "OR":
+            tokens.pop(0)
+            terms.append(parse_and())
+        return terms[0] if len(terms) == 1 else (lambda i: any(t(i) for t in terms))
+
+    def parse_and():
+        terms = [parse_atom()]
+        while tokens and tokens[0].upper() == "AND":
+            tokens.pop(0)
+            terms.append(parse_atom())
+        return terms[0] if len(terms) == 1 else (lambda i: all(t(i) for t in terms))
+
+    def parse_atom():
+        if not tokens:
+            raise JqlError("JQL incompleta")
+        if tokens[0] == "(":
+            tokens.pop(0)
+            inner = parse_or()
+            if not tokens or tokens.pop(0) != ")":
+                raise JqlError("paréntesis sin cerrar")
+            return inner
+        words = []
+        while tokens and tokens[0] not in ("(", ")") and tokens[0].upper() not in ("AND", "OR"):
+            words.append(tokens.pop(0))
+        return _compile_clause(" ".join(words))
+
+    predicate = parse_or()
+    if tokens:
+        raise JqlError(f"JQL no soportada cerca de: {' '.join(tokens)}")
+    return predicate
+
+
+def compile_jql(jql: str):
+    """
+    Subconjunto de JQL que genera el ETL: cláusulas `campo op valor`
+    (project, created, updated, key, labels) combinadas con AND / OR y
+    paréntesis, y ORDER BY. Retorna (predicado, clave de orden,
+    descendente).
+    """
+    parts = re.split(r"\s+ORDER BY\s+", jql.strip(), maxsplit=1, flags=re.I)
+    where, order = (parts + [""])[:2]
+    tokens = _JQL_TOKEN.findall(where)
+    predicate = _compile_where(tokens) if tokens else (lambda issue: True)
+
+    order_field, descending = "key", False
+    if order:
+        parts = order.split()
+        order_field = parts[0].lower()
+        descending = len(parts) > 1 and parts[1].upper() == "DESC"
+        if order_field not in ("created", "updated", "key"):
+            raise JqlError(f"ORDER BY no soportado: {order}")
+
+    def sort_key(issue):
+        if order_field == "key":
+            return int(issue["id"])
+        return (_issue_datetime(issue, order_field), int(issue["id"]))
+
+    return predicate, sort_key, descending
+
+
+def _encode_token(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+
+
+def _decode_token(token: str) -> int:
+    return int(json.loads(base64.urlsafe_b64decode(token.encode()))["offset"])
+
+
+class FakeJira:
+    """Estado del Jira simulado: issues, caché de búsquedas y contadores."""
+
+    def __init__(self, config: dict):
+        self.config = {**DEFAULT_CONFIG, **config}
+        self.factory = IssueFactory(
+            project_key=self.config["project_key"],
+            custom_fields=self.config["custom_fields"],
+            changelog_depth=self.config["changelog_depth"],
+            payload_bytes=self.config["payload_bytes"],
+            seed=self.config["seed"],
+        )
+        self.issues = self.factory.issues(self.config["issues"])
+        self.by_id = {i["id"]: i for i in self.issues}
+        self.fields = field_catalog(self.config["custom_fields"])
+        self.rng = random.Random(self.config["seed"])
+
+        self._lock = threading.Lock()
+        self._searches = {}
+        self.stats = {"requests": 0, "issues_served": 0, "injected_429": 0, "injected_5xx": 0, "by_endpoint": {}}
+
+    def board_filter(self, board_id: int) -> str | None:
+        """JQL del filtro guardado del board (1..boards), o None."""
+        if not 1 <= board_id <= self.config["boards"]:
+            return None
+        label = BOARD_LABELS[(board_id - 1) % len(BOARD_LABELS)]
+        return f'project = {self.config["project_key"]} AND labels = "{label}" ORDER BY Rank ASC'
+
+    def count(self, endpoint: str, status: int):
+        with self._lock:
+            self.stats["requests"] += 1
+            key = f"{endpoint} {status}"
+            self.stats["by_endpoint"][key] = self.stats["by_endpoint"].get(key, 0) + 1
+
+    def inject_fault(self) -> int | None:
+        with self._lock:
+            r = self.rng.random()
+            if r < self.config["error_rate_429"]:
+                self.stats["injected_429"] += 1
+                return 429
+            if r < self.config["error_rate_429"] + self.config["error_rate_5xx"]:
+                self.stats["injected_5xx"] += 1
+                return 503
+        return None
+
+    def search(self, jql: str) -> list:
+        with self._lock:
+            cached = self._searches.get(jql)
+        if cached is not None:
+            return cached
+        predicate, sort_key, descending = compile_jql(jql)
+        result = sorted((i for i in self.issues if predicate(i)), key=sort_key, reverse=descending)
+        with self._lock:
+            self._searches[jql] = result
+        return result
+
+    def render(self, issue: dict, fields, expand_changelog: bool) -> dict:
+        if fields is None or "*all" in fields:
+            projected = issue["fields"]
+        else:
+            projected = {f: issue["fields"][f] for f in fields if f in issue["fields"]}
+        out = {"id": issue["id"], "key": issue["key"], "self": issue["self"], "fields": projected}
+        if expand_changelog:
+            histories = issue["changelog"]["histories"]
+            inline = histories[-self.config["changelog_inline"]:] if self.config["changelog_inline"] else []
+            out["changelog"] = {
+                "startAt": 0,
+                "maxResults": len(inline),
+                "total": len(histories),
+                "histories": inline,
+            }
+        return out
+
+    def page(self, jql: str, offset: int, max_results: int, fields, expand_changelog: bool):
+        matches = self.search(jql)
+        limit = max(1, min(int(max_results), self.config["max_results_cap"]))
+        chunk = matches[offset:offset + limit]
+        with self._lock:
+            self.stats["issues_served"] += len(chunk)
+        return [self.render(i, fields, expand_changelog) for i in chunk], len(matches), limit
+
+    def touch(self, fraction: float) -> int:
+        """Edita una fracción de los issues (updated posterior al máximo actual)."""
+        with self._lock:
+            latest = max(_issue_datetime(i, "updated") for i in self.issues)
+            chosen = self.rng.sample(self.issues, int(len(self.issues) * fraction))
+            for n, issue in enumerate(chosen):
+                self.factory.touch(issue, latest + timedelta(minutes=1, seconds=n))
+            self._searches = {}
+        return len(chosen)
+
+
+def _handler(jira: FakeJira):
+    config = jira.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers y cuerpo van en writes separados: sin esto Nagle + ACK
+        # retardado agregan ~40 ms a cada respuesta con keep-alive.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, payload, endpoint: str, headers: dict | None = None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if config["compress"] and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            jira.count(endpoint, status)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _fault(self, endpoint: str) -> bool:
+            status = jira.inject_fault()
+            if status is None:
+                return False
+            headers = {}
+            if status == 429 and config["retry_after"] is not None:
+                headers["Retry-After"] = str(config["retry_after"])
+            self._send(status, {"errorMessages": ["bench: falla inyectada"]}, endpoint, headers)
+            return True
+
+        def _delay(self, issues: int = 0):
+            wait = (config["latency_ms"] + config["per_issue_ms"] * issues) / 1000
+            if wait > 0:
+                time.sleep(wait)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/__bench/stats":
+                return self._send(200, jira.stats, "__bench")
+
+            if self._fault(url.path):
+                return
+
+            if url.path == "/rest/api/3/field":
+                self._delay()
+                return self._send(200, jira.fields, "field")
+
+            match = re.fullmatch(r"/rest/agile/1.0/board/(\d+)/configuration", url.path)
+            if match:
+                board_id = int(match.group(1))
+                if jira.board_filter(board_id) is None:
+                    return self._send(404, {"errorMessages": ["Board no existe"]}, "board/configuration")
+                self._delay()
+                return self._send(
+                    200,
+                    {"id": board_id, "name": f"Board {board_id}", "filter": {"id": str(FILTER_ID_BASE + board_id)}},
+                    "board/configuration",
+                )
+
+            match = re.fullmatch(r"/rest/api/3/filter/(\d+)", url.path)
+            if match:
+                jql = jira.board_filter(int(match.group(1)) - FILTER_ID_BASE)
+                if jql is None:
+                    return self._send(404, {"errorMessages": ["Filtro no existe"]}, "filter")
+                self._delay()
+                return self._send(200, {"id": match.group(1), "jql": jql}, "filter")
+
+            match = re.fullmatch(r"/rest/api/3/issue/([^/]+)/changelog", url.path)
+            if match:
+                issue = jira.by_id.get(match.group(1))
+                if issue is None:
+                    return self._send(404, {"errorMessages": ["Issue no existe"]}, "issue/changelog")
+                histories = issue["changelog"]["histories"]
+                start_at = int(query.get("startAt", 0))
+                max_results = int(query.get("maxResults", 100))
+                values = histories[start_at:start_at + max_results]
+                self._delay(len(values))
+                return self._send(
+                    200,
+                    {
+                        "startAt": start_at,
+                        "maxResults": max_results,
+                        "total": len(histories),
+                        "isLast": start_at + len(values) >= len(histories),
+                        "values": values,
+                    },
+                    "issue/changelog",
+                )
+
+            self._send(404, {"errorMessages": [f"bench: ruta desconocida {url.path}"]}, url.path)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            body = self._body()
+
+            if url.path == "/__bench/touch":
+                touched = jira.touch(float(body.get("fraction", 0.1)))
+                return self._send(200, {"touched": touched}, "__bench")
+
+            if url.path == "/rest/api/3/search/jql":
+                if config["search_jql_status"]:
+                    return self._send(
+                        int(config["search_jql_status"]),
+                        {"errorMessages": ["bench: search/jql deshabilitado"]},
+                        "search/jql",
+                    )
+                if self._fault("search/jql"):
+                    return
+                token = body.get("nextPageToken")
+                offset = _decode_token(token) if token else 0
+                try:
+                    issues, total, limit = jira.page(
+                        body["jql"],
+                        offset,
+                        body.get("maxResults", 50),
+                        body.get("fields"),
+                        "changelog" in (body.get("expand") or ""),
+                    )
+                except JqlError as e:
+                    return self._send(400, {"errorMessages": [str(e)]}, "search/jql")
+                self._delay(len(issues))
+                payload = {"issues": issues, "maxResults": limit, "isLast": offset + len(issues) >= total}
+                if not payload["isLast"]:
+                    payload["nextPageToken"] = _encode_token(offset + len(issues))
+                return self._send(200, payload, "search/jql")
+
+            if url.path == "/rest/api/3/search":
+                if self._fault("search"):
+                    return
+                start_at = int(body.get("startAt", 0))
+                try:
+                    issues, total, limit = jira.page(
+                        body["jql"],
+                        start_at,
+                        body.get("maxResults", 50),
+                        body.get("fields"),
+                        "changelog" in (body.get("expand") or []),
+                    )
+                except JqlError as e:
+                    return self._send(400, {"errorMessages": [str(e)]}, "search")
+                self._delay(len(issues))
+                return self._send(
+                    200,
+                    {"startAt": start_at, "maxResults": limit, "total": total, "issues": issues},
+                    "search",
+                )
+
+            self._send(404, {"errorMessages": [f"bench: ruta desconocida {url.path}"]}, url.path)
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # El cliente cierra sin leer el cuerpo tras un 429/5xx: no es un error.
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def serve(config: dict, ready=None, host: str = "127.0.0.1", port: int = 0):
+    """Levanta el servidor (bloqueante). `ready` recibe el puerto asignado."""
+    jira = FakeJira(config)
+    server = _Server((host, port), _handler(jira))
+    if ready is not None:
+        ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+class FakeJiraServer:
+    """
+    Jira simulado en un proceso aparte (no compite por el GIL ni suma su
+    memoria al RSS del ETL medido).
+
+        with FakeJiraServer({"issues": 5000, "error_rate_429": 0.02}) as jira:
+            jira.url  # → JIRA_URL del secreto
+    """
+
+    def __init__(self, config: dict | None = None, *, host: str = "127.0.0.1"):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self.host = host
+        self.url = None
+        self._process = None
+
+    def start(self, timeout: float = 120.0):
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe(duplex=False)
+        self._process = ctx.Process(
+            target=serve,
+            args=(self.config, child, self.host),
+            daemon=True,
+        )
+        self._process.start()
+        if not parent.poll(timeout):
+            self.stop()
+            raise RuntimeError("bench: el Jira simulado no arrancó a tiempo")
+        self.url = f"http://{self.host}:{parent.recv()}"
+        return self
+
+    def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=10)
+            self._process = None
+
+    def stats(self) -> dict:
+        return requests.get(f"{self.url}/__bench/stats", timeout=30).json()
+
+    def touch(self, fraction: float) -> int:
+        """Simula ediciones entre corridas (para medir cargas incrementales)."""
+        response = requests.post(f"{self.url}/__bench/touch", json={"fraction": fraction}, timeout=120)
+        response.raise_for_status()
+        return response.json()["touched"]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
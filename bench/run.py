@@ -0,0 +1,252 @@
+# bench/run.py
+"""
+Benchmark end-to-end del ETL contra dobles locales: Jira simulado
+(bench.fake_jira, proceso aparte) y BigQuery en memoria
+(bench.fake_bigquery). Corre el mismo flujo de main.main() y reporta
+issues/s, tiempo por etapa y RSS máximo.
+
+    python -m bench.run --issues 5000 --runtime '{"merge_mode": "staged"}'
+    python -m bench.run --issues 20000 --runs 3 --touch-fraction 0.05 --json
+    python -m bench.run --issues 5000 --runs 2 --fail-merge 5 --runtime '{"resume": true}'
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from time import perf_counter
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bench.fake_jira import FakeJiraServer
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__.split("\n\n")[0])
+    data = parser.add_argument_group("datos")
+    data.add_argument("--issues", type=int, default=2000)
+    data.add_argument("--project-key", default="BENCH")
+    data.add_argument("--custom-fields", type=int, default=10)
+    data.add_argument("--changelog-depth", type=int, default=5)
+    data.add_argument("--payload-bytes", type=int, default=0, help="texto de relleno por issue")
+    data.add_argument("--seed", type=int, default=0)
+    data.add_argument("--boards", type=int, default=0, help="boards con filtro propio (0 = nivel proyecto)")
+
+    jira = parser.add_argument_group("jira simulado")
+    jira.add_argument("--page-cap", type=int, default=100, help="tope de maxResults del servidor")
+    jira.add_argument("--changelog-inline", type=int, default=100)
+    jira.add_argument("--latency-ms", type=float, default=0.0)
+    jira.add_argument("--per-issue-ms", type=float, default=0.0)
+    jira.add_argument("--no-compress", action="store_true")
+    jira.add_argument("--error-rate-429", type=float, default=0.0)
+    jira.add_argument("--error-rate-5xx", type=float, default=0.0)
+    jira.add_argument("--retry-after", default="0", help="header Retry-After de los 429")
+    jira.add_argument("--search-jql-status", type=int, default=None, help="p. ej. 404 para forzar /search")
+
+    bq = parser.add_argument_group("bigquery simulado")
+    bq.add_argument("--bq-job-latency-ms", type=float, default=0.0)
+    bq.add_argument("--keep-payload", action="store_true", help="guardar raw_json en las tablas simuladas")
+    bq.add_argument(
+        "--fail-merge",
+        type=int,
+        action="append",
+        default=[],
+        metavar="N",
+        help="falla el N-ésimo MERGE sobre tablas raw, contado desde la 1ª corrida (repetible)",
+    )
+    bq.add_argument("--fail-merge-target", default=r"_raw$", help="regex de las tablas cuyos MERGE se cuentan")
+
+    run = parser.add_argument_group("ejecución")
+    run.add_argument("--runtime", default="{}", help="overrides de runtime config (JSON o @archivo.json)")
+    run.add_argument("--runs", type=int, default=1, help="corridas sucesivas (la 1ª es full load)")
+    run.add_argument("--touch-fraction", type=float, default=0.1, help="issues editados entre corridas")
+    run.add_argument("--json", action="store_true", help="reporte en JSON")
+    run.add_argument("--verbose", action="store_true", help="mantener los logs del ETL")
+    return parser.parse_args(argv)
+
+
+def _load_overrides(value: str) -> dict:
+    if value.startswith("@"):
+        with open(value[1:], encoding="utf-8") as fh:
+            return json.load(fh)
+    return json.loads(value)
+
+
+def _delta(after: dict, before: dict) -> dict:
+    out = {}
+    for key, value in after.items():
+        if isinstance(value, dict):
+            prev = before.get(key, {})
+            out[key] = {k: v - prev.get(k, 0) for k, v in value.items()}
+        else:
+            out[key] = value - before.get(key, 0)
+    return out
+
+
+def run_benchmark(args) -> list:
+    if not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    # Se importan después de fijar LOG_LEVEL (el logger se crea al importar).
+    import main
+    from bq.client import JobLimitedClient
+    from core.telemetry import STAGES
+    from etl.runner import peak_rss_mb
+
+    runtime = {
+        "jira_project_key": args.project_key,
+        "bq_project_id": "bench",
+        "bq_dataset_id": "bench",
+        # Sin límite de tasa propio: se mide el pipeline, no el rate limiter.
+        "jira_rate_limit_per_second": 10000,
+        "jira_rate_limit_burst": 10000,
+        "boards": [
+            {"board_id": n, "target_table": f"{args.project_key}_board_{n}_raw"}
+            for n in range(1, args.boards + 1)
+        ],
+        **_load_overrides(args.runtime),
+    }
+
+    server = FakeJiraServer({
+        "issues": args.issues,
+        "project_key": args.project_key,
+        "custom_fields": args.custom_fields,
+        "changelog_depth": args.changelog_depth,
+        "payload_bytes": args.payload_bytes,
+        "seed": args.seed,
+        "boards": args.boards,
+        "max_results_cap": args.page_cap,
+        "changelog_inline": args.changelog_inline,
+        "latency_ms": args.latency_ms,
+        "per_issue_ms": args.per_issue_ms,
+        "compress": not args.no_compress,
+        "error_rate_429": args.error_rate_429,
+        "error_rate_5xx": args.error_rate_5xx,
+        "retry_after": args.retry_after,
+        "search_jql_status": args.search_jql_status,
+    })
+    fake_bq = FakeBigQueryClient(
+        runtime["bq_project_id"],
+        job_latency=args.bq_job_latency_ms / 1000,
+        drop_columns=() if args.keep_payload else ("raw_json",),
+        fail_merges=args.fail_merge,
+        fail_merge_target=args.fail_merge_target,
+    )
+    bq_client = JobLimitedClient(fake_bq, int(runtime.get("max_concurrent_bq_jobs", 1)))
+    summary_full = f"{runtime['bq_project_id']}.{runtime['bq_dataset_id']}.jira_summary_etl"
+
+    raw_tables = (
+        [b["target_table"] for b in runtime["boards"]]
+        or [f"{args.project_key}_project_raw"]
+    )
+
+    reports = []
+    loaded = failed = False
+    server.start()
+    try:
+        for n in range(1, args.runs + 1):
+            # Tras una corrida fallida no se editan issues: la siguiente
+            # repite la misma carga (p. ej. para medir resume).
+            touched = server.touch(args.touch_fraction) if loaded and not failed else 0
+            summaries_before = len(fake_bq.rows.get(summary_full, []))
+            merges_failed_before = fake_bq.merges_failed
+            bq_before = {k: dict(v) for k, v in fake_bq.stats.items()}
+            jira_before = server.stats()
+
+            t0 = perf_counter()
+            results = main.main(
+                runtime=runtime,
+                secrets={"JIRA_URL": server.url, "JIRA_USER": "bench", "JIRA_TOKEN": "bench"},
+                bq_client=bq_client,
+            )
+            wall = perf_counter() - t0
+
+            summaries = fake_bq.rows.get(summary_full, [])[summaries_before:]
+            jira_stats = _delta(
+                {k: v for k, v in server.stats().items() if k != "by_endpoint"},
+                {k: v for k, v in jira_before.items() if k != "by_endpoint"},
+            )
+            # Tiempos por etapa de jira_summary_etl (suma de los boards; el
+            # p95 es el peor de los boards).
+            stages = {
+                stage: sum(s.get(f"stage_{stage}_seconds") or 0 for s in summaries)
+                for stage in STAGES
+            }
+            stage_p95 = {
+                stage: max((s.get(f"stage_{stage}_p95_ms") or 0 for s in summaries), default=0)
+                for stage in STAGES
+            }
+            for kind, entry in _delta(fake_bq.stats, bq_before).items():
+                stages[f"bq_{kind}"] = entry["seconds"]
+
+            received = sum(r["rows_received"] for r in results)
+            failed = any(r["status"] != "SUCCESS" for r in results)
+            reports.append({
+                "run": n,
+                "load": "incremental" if loaded else "full",
+                "touched": touched,
+                "status": [r["status"] for r in results],
+                "issues": received,
+                "wall_seconds": round(wall, 3),
+                "issues_per_second": round(received / wall, 1) if wall else None,
+                "stage_seconds": {k: round(v, 3) for k, v in stages.items()},
+                "stage_p95_ms": stage_p95,
+                "jira": jira_stats,
+                "api_retries": sum(s.get("api_retries_total") or 0 for s in summaries),
+                "rate_limit_wait_seconds": round(
+                    sum(s.get("rate_limit_wait_seconds") or 0 for s in summaries), 3
+                ),
+                "bq_jobs": {k: v["count"] for k, v in _delta(fake_bq.stats, bq_before).items()},
+                "rows_inserted": sum(r["rows_inserted"] for r in results),
+                "rows_updated": sum(r["rows_updated"] for r in results),
+                "merges_failed": fake_bq.merges_failed - merges_failed_before,
+                "raw_rows": {
+                    t: len(fake_bq.rows.get(f"{runtime['bq_project_id']}.{runtime['bq_dataset_id']}.{t}", []))
+                    for t in raw_tables
+                },
+                "peak_rss_mb": round(peak_rss_mb() or 0, 1),
+            })
+            loaded = loaded or not failed
+    finally:
+        server.stop()
+    return reports
+
+
+def _print_report(reports):
+    for r in reports:
+        print(
+            f"run {r['run']} | {r['load']} | status={','.join(r['status'])} | issues={r['issues']} "
+            f"| {r['wall_seconds']:.2f}s | {r['issues_per_second']} issues/s | peak_rss={r['peak_rss_mb']} MB"
+        )
+        print("  stages (busy s): " + " ".join(f"{k}={v:.3f}" for k, v in r["stage_seconds"].items()))
+        print("  stages (p95 ms): " + " ".join(f"{k}={v}" for k, v in r["stage_p95_ms"].items() if v))
+        print(
+            f"  jira: requests={r['jira']['requests']} issues_served={r['jira']['issues_served']} "
+            f"429={r['jira']['injected_429']} 5xx={r['jira']['injected_5xx']} retries={r['api_retries']} "
+            f"rate_limit_wait={r['rate_limit_wait_seconds']}s"
+        )
+        print(
+            "  bq jobs: " + " ".join(f"{k}={v}" for k, v in sorted(r["bq_jobs"].items()))
+            + f" | inserted={r['rows_inserted']} updated={r['rows_updated']}"
+            + f" | merges_failed={r['merges_failed']}"
+        )
+        print("  raw rows: " + " ".join(f"{k}={v}" for k, v in r["raw_rows"].items()))
+
+
+def cli(argv=None):
+    args = _parse_args(argv)
+    if args.json:
+        # Los prints de carga de módulos no deben mezclarse con el JSON.
+        with contextlib.redirect_stdout(sys.stderr):
+            reports = run_benchmark(args)
+    else:
+        reports = run_benchmark(args)
+    if args.json:
+        json.dump(reports, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        _print_report(reports)
+    return reports
+
+
+if __name__ == "__main__":
+    cli()
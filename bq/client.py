@@ -1,23 +1,232 @@
 # bq/client.py
+import threading
+import time
+import uuid
+
 from google.cloud import bigquery
-from google.api_core.exceptions import NotFound
+from google.api_core.exceptions import GoogleAPICallError, NotFound
+
+from core import telemetry
+from core.rate_limiter import decorrelated_jitter
+
+DML_RETRIES = 5
+
+
+class JobLimitedClient:
+    """
+    Envuelve un bigquery.Client y limita los jobs (query / load) que
+    corren al mismo tiempo en el proceso.
+
+    El job se espera dentro del cupo; el .result() que hacen los
+    llamadores después retorna de inmediato. El resto de métodos se
+    delega tal cual al cliente original.
+    """
+
+    def __init__(self, client: bigquery.Client, max_concurrent_jobs: int):
+        self._client = client
+        self.max_concurrent_jobs = max(1, int(max_concurrent_jobs))
+        self._job_slots = threading.BoundedSemaphore(self.max_concurrent_jobs)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _run_job(self, submit):
+        with self._job_slots:
+            job = submit()
+            job.result()
+        return job
+
+    def query(self, *args, **kwargs):
+        return self._run_job(lambda: self._client.query(*args, **kwargs))
 
-def get_client(project_id: str) -> bigquery.Client:
-    return bigquery.Client(project=project_id)
+    def load_table_from_json(self, *args, **kwargs):
+        return self._run_job(lambda: self._client.load_table_from_json(*args, **kwargs))
+
+    def load_table_from_file(self, *args, **kwargs):
+        return self._run_job(lambda: self._client.load_table_from_file(*args, **kwargs))
+
+
+def get_client(project_id: str, max_concurrent_jobs: int | None = None):
+    client = bigquery.Client(project=project_id)
+    if max_concurrent_jobs:
+        return JobLimitedClient(client, max_concurrent_jobs)
+    return client
 
 def ensure_dataset(client, project_id: str, dataset_id: str):
     ref = f"{project_id}.{dataset_id}"
-    try:
-        client.get_dataset(ref)
-    except NotFound:
-        client.create_dataset(bigquery.Dataset(ref))
+    with telemetry.stage("infra", op="ensure_dataset", dataset=ref):
+        try:
+            client.get_dataset(ref)
+        except NotFound:
+            client.create_dataset(bigquery.Dataset(ref))
+
+def _new_table(
+    full_table: str,
+    schema,
+    partition_field: str | None = None,
+    partition_type: str = "MONTH",
+    clustering_fields: list | None = None,
+) -> bigquery.Table:
+    table = bigquery.Table(full_table, schema=schema)
+    if partition_field:
+        table.time_partitioning = bigquery.TimePartitioning(
+            type_=partition_type,
+            field=partition_field,
+        )
+    if clustering_fields:
+        table.clustering_fields = list(clustering_fields)
+    return table
+
+
+def ensure_table(
+    client,
+    full_table: str,
+    schema,
+    *,
+    partition_field: str | None = None,
+    partition_type: str = "MONTH",
+    clustering_fields: list | None = None,
+) -> list:
+    """
+    Crea la tabla si NO existe (con particionado / clustering opcionales).
+    Si existe, agrega columnas faltantes (evolución de esquema).
+    Retorna los nombres de las columnas agregadas a una tabla existente.
+    """
+    with telemetry.stage("infra", op="ensure_table", table=full_table) as span:
+        try:
+            table = client.get_table(full_table)
+        except NotFound:
+            client.create_table(
+                _new_table(full_table, schema, partition_field, partition_type, clustering_fields)
+            )
+            span.set("created", True)
+            return []
+
+        existing_fields = {f.name for f in table.schema}
+        missing_fields = [field for field in schema if field.name not in existing_fields]
+
+        if missing_fields:
+            table.schema = list(table.schema) + missing_fields
+            client.update_table(table, ["schema"])
+            span.set("added_columns", len(missing_fields))
+
+        return [field.name for field in missing_fields]
+
+def is_concurrent_abort(error: Exception) -> bool:
+    message = str(error).lower()
+    return "concurrent" in message and ("transaction" in message or "update" in message)
+
+
+def query_with_retries(client, sql: str, *, job_config=None, retries: int = DML_RETRIES):
+    """
+    Ejecuta un DML (o script) y espera el resultado. Si aborta por otra
+    sentencia o transacción concurrente sobre la misma tabla, se reintenta
+    con backoff: la sentencia debe dar lo mismo al repetirse.
+    Retorna (job, intentos).
+    """
+    backoff = 1.0
+    for attempt in range(1, retries + 1):
+        try:
+            job = client.query(sql, job_config=job_config)
+            job.result()
+            return job, attempt
+        except GoogleAPICallError as e:
+            if attempt == retries or not is_concurrent_abort(e):
+                raise
+            backoff = decorrelated_jitter(backoff, cap=30.0)
+            time.sleep(backoff)
 
-def ensure_table(client, full_table: str, schema):
-    try:
-        client.get_table(full_table)
-    except NotFound:
-        client.create_table(bigquery.Table(full_table, schema=schema))
 
 def count_rows(client, full_table: str) -> int:
-    q = f"SELECT COUNT(*) c FROM `{full_table}`"
-    return int(next(client.query(q).result()).c)
+    """Filas según la metadata de la tabla (sin query ni escaneo)."""
+    with telemetry.stage("row_count", table=full_table):
+        return int(client.get_table(full_table).num_rows or 0)
+
+def truncate_table(client, full_table: str):
+    client.query(f"TRUNCATE TABLE `{full_table}`").result()
+
+
+def ensure_table_layout(
+    client,
+    full_table: str,
+    *,
+    partition_field: str | None,
+    partition_type: str = "MONTH",
+    clustering_fields: list | None = None,
+    migrate: bool = False,
+    logger=None,
+):
+    """
+    Ajusta particionado y clustering de una tabla existente.
+
+    - El clustering se cambia en el lugar (operación de metadata).
+    - El particionado no se puede agregar a una tabla existente: con
+      migrate=True se copia a una tabla nueva particionada, se borra la
+      original y se copia de vuelta. Si la copia final falla, los datos
+      quedan en la tabla __layout_* indicada en el error.
+    """
+    with telemetry.stage("infra", op="ensure_table_layout", table=full_table):
+        _ensure_table_layout(
+            client,
+            full_table,
+            partition_field=partition_field,
+            partition_type=partition_type,
+            clustering_fields=clustering_fields,
+            migrate=migrate,
+            logger=logger,
+        )
+
+
+def _ensure_table_layout(
+    client,
+    full_table: str,
+    *,
+    partition_field: str | None,
+    partition_type: str,
+    clustering_fields: list | None,
+    migrate: bool,
+    logger,
+):
+    table = client.get_table(full_table)
+
+    if clustering_fields and list(table.clustering_fields or []) != list(clustering_fields):
+        table.clustering_fields = list(clustering_fields)
+        client.update_table(table, ["clustering_fields"])
+        if logger:
+            logger.info("🧲 Clustering actualizado | %s | %s", full_table, clustering_fields)
+
+    current = table.time_partitioning
+    if not partition_field or (current is not None and current.field == partition_field):
+        return
+    if not migrate:
+        if logger:
+            logger.info(
+                "ℹ️ %s no está particionada por %s (migración desactivada)",
+                full_table,
+                partition_field,
+            )
+        return
+
+    staging = f"{full_table}__layout_{uuid.uuid4().hex[:8]}"
+    cluster_sql = (
+        f"CLUSTER BY {', '.join(clustering_fields)}" if clustering_fields else ""
+    )
+    if logger:
+        logger.warning("🚚 Migrando %s a particionado por %s", full_table, partition_field)
+
+    client.query(f"""
+      CREATE TABLE `{staging}`
+      PARTITION BY TIMESTAMP_TRUNC({partition_field}, {partition_type})
+      {cluster_sql}
+      AS SELECT * FROM `{full_table}`
+    """).result()
+
+    try:
+        client.delete_table(full_table)
+        client.copy_table(staging, full_table).result()
+    except Exception as e:
+        raise RuntimeError(
+            f"Migración de {full_table} incompleta; los datos están en {staging}"
+        ) from e
+
+    client.delete_table(staging, not_found_ok=True)
@@ -0,0 +1,125 @@
+# bq/infra_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 3600
+
+
+def schema_fingerprint(schema, **extra) -> str:
+    """
+    Huella de un esquema (nombre, tipo, modo de cada campo) más opciones
+    extra (particionado, clustering...). Si el código cambia el esquema,
+    cambia la huella y el objeto se vuelve a verificar.
+    """
+    payload = {
+        "fields": [
+            [f.name, f.field_type, f.mode] for f in (schema or [])
+        ],
+        "extra": extra,
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class InfraCache:
+    """
+    Cache por proceso de verificaciones de infraestructura (datasets,
+    tablas, esquemas) con TTL y archivo en disco opcional.
+
+    once(key, check) ejecuta check() solo si la clave no fue verificada
+    dentro del TTL. Varios boards en paralelo que piden la misma clave
+    esperan a la primera verificación en vez de repetirla.
+    """
+
+    def __init__(self, *, path: str | None = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+        if path:
+            self._checked.update(self._read_disk())
+
+    def _read_disk(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return {k: float(v) for k, v in data.items() if isinstance(v, (int, float))}
+
+    def _write_disk(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._checked, fh)
+            os.replace(tmp, self.path)
+        except OSError:
+            # El cache en disco es una optimización: si falla, sigue en memoria.
+            pass
+
+    def _fresh(self, key: str) -> bool:
+        checked_at = self._checked.get(key)
+        return checked_at is not None and time.time() - checked_at < self.ttl_seconds
+
+    def once(self, key: str, check):
+        """
+        Ejecuta check() si la clave no está vigente y retorna su resultado.
+        Retorna None si la clave ya estaba verificada.
+        """
+        with self._lock:
+            if self._fresh(key):
+                self.hits += 1
+                return None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if self._fresh(key):
+                    self.hits += 1
+                    return None
+
+            result = check()
+
+            with self._lock:
+                self.misses += 1
+                self._checked[key] = time.time()
+                self._write_disk()
+            return result
+
+    def invalidate(self, prefix: str):
+        """Olvida las claves que empiezan con prefix (p. ej. un table id)."""
+        with self._lock:
+            for key in [k for k in self._checked if k.startswith(prefix)]:
+                del self._checked[key]
+            self._write_disk()
+
+
+_CACHE = InfraCache()
+_CACHE_LOCK = threading.Lock()
+
+
+def configure_infra_cache(*, path: str | None = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+    """
+    Fija el cache del proceso. Con la misma configuración conserva el
+    actual (un proceso residente no lo enfría en cada ejecución).
+    """
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE.path != path or _CACHE.ttl_seconds != ttl_seconds:
+            _CACHE = InfraCache(path=path, ttl_seconds=ttl_seconds)
+        return _CACHE
+
+
+def get_infra_cache() -> InfraCache:
+    with _CACHE_LOCK:
+        return _CACHE
@@ -0,0 +1,197 @@
+# bq/staging.py
+import io
+import json
+import os
+import struct
+import zlib
+from datetime import datetime, timezone
+from time import perf_counter
+
+from google.cloud import bigquery
+
+from core import telemetry
+
+STAGING_FORMATS = ("avro", "json")
+AVRO_BLOCK_ROWS = 1000
+
+_AVRO_TYPES = {
+    "STRING": "string",
+    "INTEGER": "long",
+    "INT64": "long",
+    "FLOAT": "double",
+    "FLOAT64": "double",
+    "BOOLEAN": "boolean",
+    "BOOL": "boolean",
+    "TIMESTAMP": {"type": "long", "logicalType": "timestamp-micros"},
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+# ==========================================================
+# 🧱 Avro (Object Container File, codec deflate)
+# ==========================================================
+def avro_schema(schema, name: str = "staging_row") -> dict:
+    """
+    Esquema Avro derivado del esquema BigQuery. Todos los campos son
+    nullable (unión ["null", tipo]) como en RAW_SCHEMA.
+    """
+    fields = []
+    for f in schema:
+        avro_type = _AVRO_TYPES.get(f.field_type)
+        if avro_type is None:
+            raise ValueError(f"Tipo BigQuery sin mapeo Avro: {f.name} {f.field_type}")
+        fields.append({"name": f.name, "type": ["null", avro_type], "default": None})
+    return {"type": "record", "name": name, "fields": fields}
+
+
+def _write_long(buf: bytearray, value: int):
+    n = (value << 1) ^ (value >> 63)
+    while n & ~0x7F:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _write_bytes(buf: bytearray, value: bytes):
+    _write_long(buf, len(value))
+    buf += value
+
+
+def _timestamp_micros(value) -> int:
+    """
+    Acepta datetime o el string "YYYY-MM-DD HH:MM:SS" que produce
+    parse_dt. Sin zona horaria se interpreta como UTC, igual que
+    TIMESTAMP() en BigQuery.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _field_writer(field_type: str):
+    if field_type == "TIMESTAMP":
+        return lambda buf, v: _write_long(buf, _timestamp_micros(v))
+    if field_type in ("INTEGER", "INT64"):
+        return lambda buf, v: _write_long(buf, int(v))
+    if field_type in ("FLOAT", "FLOAT64"):
+        return lambda buf, v: buf.extend(struct.pack("<d", float(v)))
+    if field_type in ("BOOLEAN", "BOOL"):
+        return lambda buf, v: buf.append(1 if v else 0)
+    return lambda buf, v: _write_bytes(buf, v if isinstance(v, bytes) else str(v).encode("utf-8"))
+
+
+def encode_avro(rows, schema) -> bytes:
+    """Serializa filas (dicts) a un archivo Avro en memoria."""
+    writers = [(f.name, _field_writer(f.field_type)) for f in schema]
+    sync = os.urandom(16)
+
+    out = bytearray(b"Obj\x01")
+    metadata = {
+        "avro.schema": json.dumps(avro_schema(schema)).encode("utf-8"),
+        "avro.codec": b"deflate",
+    }
+    _write_long(out, len(metadata))
+    for key, value in metadata.items():
+        _write_bytes(out, key.encode("utf-8"))
+        _write_bytes(out, value)
+    _write_long(out, 0)
+    out += sync
+
+    for start in range(0, len(rows), AVRO_BLOCK_ROWS):
+        block_rows = rows[start:start + AVRO_BLOCK_ROWS]
+        block = bytearray()
+        for row in block_rows:
+            for name, write in writers:
+                value = row.get(name)
+                if value is None:
+                    block.append(0)  # rama "null" de la unión
+                else:
+                    block.append(2)  # rama 1 (zigzag)
+                    write(block, value)
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        data = compressor.compress(bytes(block)) + compressor.flush()
+        _write_long(out, len(block_rows))
+        _write_bytes(out, data)
+        out += sync
+
+    return bytes(out)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def encode_ndjson(rows) -> bytes:
+    return b"".join(
+        json.dumps(row, ensure_ascii=False, default=_json_default).encode("utf-8") + b"\n"
+        for row in rows
+    )
+
+
+# ==========================================================
+# 🚚 Carga a staging
+# ==========================================================
+def load_rows(
+    client,
+    rows,
+    destination: str,
+    *,
+    schema,
+    write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    staging_format: str = "avro",
+    stats: dict | None = None,
+):
+    """
+    Carga filas a una tabla de staging con esquema explícito.
+
+    - avro: archivo Avro comprimido (deflate) con TIMESTAMP como
+      timestamp-micros, sin re-inferir tipos en BigQuery.
+    - json: NDJSON, equivalente a load_table_from_json.
+
+    Suma a stats el tiempo de serialización (staging_encode_seconds) y
+    los bytes enviados (staging_load_bytes).
+    """
+    if staging_format not in STAGING_FORMATS:
+        raise ValueError(f"staging_format inválido: {staging_format}")
+
+    t0 = perf_counter()
+    if staging_format == "avro":
+        payload = encode_avro(rows, schema)
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.AVRO,
+            use_avro_logical_types=True,
+            write_disposition=write_disposition,
+        )
+    else:
+        payload = encode_ndjson(rows)
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            schema=schema,
+            write_disposition=write_disposition,
+        )
+    encode_seconds = perf_counter() - t0
+
+    if stats is not None:
+        stats["staging_encode_seconds"] = stats.get("staging_encode_seconds", 0.0) + encode_seconds
+        stats["staging_load_bytes"] = stats.get("staging_load_bytes", 0) + len(payload)
+
+    telemetry.record("staging_encode", encode_seconds, rows=len(rows), format=staging_format)
+
+    with telemetry.stage("staging_load", destination=destination, bytes=len(payload)):
+        job = client.load_table_from_file(
+            io.BytesIO(payload),
+            destination,
+            size=len(payload),
+            job_config=job_config,
+        )
+        job.result()
+    return job
@@ -0,0 +1,91 @@
+# core/field_catalog.py
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+
+class FieldCatalog:
+    """
+    Copia local del catálogo de campos de Jira (/rest/api/3/field).
+
+    Se descarga a lo más una vez por TTL: en memoria por proceso y, con
+    `path`, también en disco entre ejecuciones. Sirve para traducir
+    nombres de campos custom ("Story Points", "Sprint") a su id
+    (customfield_XXXXX), que cambia entre sitios de Jira.
+    """
+
+    def __init__(self, *, path: str | None = None, ttl_seconds: float = DEFAULT_TTL_SECONDS, logger=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.logger = logger
+
+        self._fields = None
+        self._fetched_at = 0.0
+        self._url = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, url: str) -> bool:
+        return (
+            self._fields is not None
+            and self._url == url
+            and time.time() - self._fetched_at < self.ttl_seconds
+        )
+
+    def _read_disk(self, url: str):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if data.get("url") == url and isinstance(data.get("fields"), list):
+            self._fields = data["fields"]
+            self._fetched_at = float(data.get("fetched_at", 0))
+            self._url = url
+
+    def _write_disk(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(
+                    {"url": self._url, "fetched_at": self._fetched_at, "fields": self._fields},
+                    fh,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def fields(self, *, jira, stats: dict) -> list:
+        with self._lock:
+            if not self._fresh(jira.url):
+                self._read_disk(jira.url)
+            if not self._fresh(jira.url):
+                self._fields = jira.fetch_fields(stats=stats)
+                self._fetched_at = time.time()
+                self._url = jira.url
+                self._write_disk()
+                if self.logger:
+                    self.logger.info("🗂 Catálogo de campos Jira actualizado | fields=%d", len(self._fields))
+            return self._fields
+
+    def resolve(self, name_or_id: str, *, jira, stats: dict) -> str | None:
+        """id, key o nombre (sin distinguir mayúsculas) → id del campo."""
+        wanted = name_or_id.strip().lower()
+        for field in self.fields(jira=jira, stats=stats):
+            if wanted in (
+                str(field.get("id", "")).lower(),
+                str(field.get("key", "")).lower(),
+                str(field.get("name", "")).lower(),
+            ):
+                return field.get("id")
+        return None
@@ -1,13 +1,158 @@
 # core/jira_client.py
+import re
+import threading
 import time
+from datetime import datetime
 from typing import Generator, List
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from core import telemetry
+from core.json_stream import JsonArrayStream
+from core.page_sizer import AdaptivePageSize
+from core.rate_limiter import decorrelated_jitter, get_rate_limiter, parse_retry_after
+
 DEFAULT_TIMEOUT = (10, 120)
 TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+# Errores de search/jql que activan el fallback a /search.
+FALLBACK_STATUS_CODES = {404, 500, 502, 503, 504}
 MAX_RETRIES = 5
+DEFAULT_RATE_LIMIT_PER_SECOND = 10.0
+DEFAULT_RATE_LIMIT_BURST = 10.0
+STREAM_CHUNK_BYTES = 64 * 1024
+# Corte de la conexión a mitad del cuerpo de una página: se pide de nuevo.
+BODY_ERRORS = (requests.exceptions.ChunkedEncodingError, requests.exceptions.ConnectionError)
+CHANGELOG_PAGE_SIZE = 100
+BOARD_JQL_TTL_SECONDS = 3600
+
+# Strings entre comillas u ORDER BY: el primer ORDER BY fuera de comillas
+# corta la JQL (un "order by" dentro de un texto buscado no).
+_QUOTED_OR_ORDER_BY = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|\bORDER\s+BY\b',
+    re.IGNORECASE,
+)
+
+# JQL de alcance por board, compartida por todos los JiraClient del
+# proceso: (url, board_id) → (jql, resuelto_en).
+_board_jql_cache = {}
+_board_jql_lock = threading.Lock()
+
+
+def accept_encoding() -> str:
+    """
+    Compresiones que el cliente sabe decodificar: gzip/deflate siempre,
+    br solo si hay soporte brotli instalado (urllib3 lo usa).
+    """
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+def _wire_bytes(response) -> int:
+    try:
+        return int(response.raw.tell())
+    except Exception:
+        return 0
+
+# Campos que el ETL siempre necesita (fecha_creacion / fecha_actualizacion).
+REQUIRED_FIELDS = ("created", "updated")
+
+
+def effective_fields(fields: list | None) -> list:
+    """
+    Proyección de campos que realmente se pide a Jira.
+    Sin lista explícita se piden todos (*all).
+    """
+    if not fields:
+        return ["*all"]
+    projection = list(dict.fromkeys(fields))
+    if "*all" not in projection:
+        projection += [f for f in REQUIRED_FIELDS if f not in projection]
+    return projection
+
+
+def _strip_order_by(jql: str) -> str:
+    for match in _QUOTED_OR_ORDER_BY.finditer(jql):
+        if match.group(0)[0] not in "\"'":
+            return jql[:match.start()]
+    return jql
+
+
+def board_scope_jql(filter_jql: str, sub_query: str | None = None) -> str | None:
+    """
+    Condición (sin ORDER BY) que define los issues de un board: el JQL de
+    su filtro guardado y, en boards kanban, el subfiltro. Lista para
+    combinarse con AND (updated >= ..., ventanas de backfill). None si el
+    filtro no restringe nada.
+    """
+    clauses = [
+        f"({clause})"
+        for clause in (_strip_order_by(filter_jql or "").strip(), (sub_query or "").strip())
+        if clause
+    ]
+    return " AND ".join(clauses) or None
+
+
+def build_search_jql_body(
+    *,
+    jql: str,
+    max_results: int,
+    fields: list | None,
+    expand_changelog: bool,
+    next_page_token: str | None = None,
+) -> dict:
+    body = {
+        "jql": jql,
+        "maxResults": max_results,
+        "fields": effective_fields(fields),
+    }
+    if expand_changelog:
+        body["expand"] = "changelog"
+    if next_page_token:
+        body["nextPageToken"] = next_page_token
+    return body
+
+
+def build_search_body(
+    *,
+    jql: str,
+    start_at: int,
+    max_results: int,
+    fields: list | None,
+    expand_changelog: bool,
+) -> dict:
+    body = {
+        "jql": jql,
+        "startAt": start_at,
+        "maxResults": max_results,
+        "fields": effective_fields(fields),
+    }
+    if expand_changelog:
+        body["expand"] = ["changelog"]
+    return body
+
+
+class IssuePage(list):
+    """
+    Lista de issues de una búsqueda + cursor para retomar la paginación
+    justo después de ella: {"endpoint", "page", "skip"}, donde page es
+    el nextPageToken (search/jql) o startAt (search) con que se pidió la
+    página y skip cuántos issues de esa página ya se entregaron.
+    """
+
+    def __init__(self, issues, cursor: dict | None = None):
+        super().__init__(issues)
+        self.cursor = cursor
 
 
 class JiraClient:
@@ -19,16 +164,46 @@ class JiraClient:
         token: str,
         logger,
         timeout: tuple | None = None,
+        max_concurrent_requests: int = 1,
+        rate_limit_per_second: float = DEFAULT_RATE_LIMIT_PER_SECOND,
+        rate_limit_burst: float = DEFAULT_RATE_LIMIT_BURST,
+        stream_decode: bool = False,
+        stream_chunk_issues: int | None = None,
     ):
         self.logger = logger
         self.url = url.rstrip("/")
         self.timeout = timeout or DEFAULT_TIMEOUT
 
+        # Con stream_decode las páginas se decodifican de forma incremental
+        # (sin bufferear el cuerpo completo). stream_chunk_issues > 0 además
+        # parte cada página en sublistas de ese tamaño (ver _read_body); no
+        # adelanta el primer issue: el cuerpo se lee entero antes.
+        self.stream_decode = stream_decode
+        self.stream_chunk_issues = stream_chunk_issues
+
+        # Presupuesto de requests compartido por todos los hilos que usan
+        # este cliente: con N boards en paralelo nunca hay más de
+        # max_concurrent_requests llamadas en vuelo contra Jira.
+        self.max_concurrent_requests = max(1, int(max_concurrent_requests))
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        # Rate limiter por proceso (compartido por todos los JiraClient que
+        # apuntan al mismo Jira). Tras un 429 todos los hilos esperan el
+        # mismo Retry-After y la tasa se reduce.
+        self.rate_limiter = get_rate_limiter(
+            self.url,
+            rate=rate_limit_per_second,
+            burst=rate_limit_burst,
+        )
+
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.max_concurrent_requests)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.auth = HTTPBasicAuth(user, token)
         self.session.headers.update(
             {
                 "Accept": "application/json",
+                "Accept-Encoding": accept_encoding(),
                 "Content-Type": "application/json",
             }
         )
@@ -36,68 +211,117 @@ class JiraClient:
         # Prefer search/jql but keep robust fallback to /search.
         self.search_jql_api = f"{self.url}/rest/api/3/search/jql"
         self.search_api = f"{self.url}/rest/api/3/search"
+        self.issue_api = f"{self.url}/rest/api/3/issue"
 
         self.logger.info(
-            "[jira] JiraClient init | url=%s | timeout=%s",
+            "[jira] JiraClient init | url=%s | timeout=%s | max_concurrent_requests=%d | rate=%.1f/s",
             self.url,
             self.timeout,
+            self.max_concurrent_requests,
+            self.rate_limiter.max_rate,
         )
 
-    def _post_with_retries(
+    def _request_with_retries(
         self,
         *,
         url: str,
-        body: dict,
         stats: dict,
         endpoint_name: str,
+        method: str = "POST",
+        body: dict | None = None,
+        params: dict | None = None,
+        stream: bool = False,
     ) -> requests.Response:
         last_response = None
+        backoff = 1.0
 
         for attempt in range(1, MAX_RETRIES + 1):
             stats["api_requests"] += 1
 
             self.logger.info(
-                "[jira] POST %s | endpoint=%s | attempt=%d/%d",
+                "[jira] %s %s | endpoint=%s | attempt=%d/%d",
+                method,
                 url,
                 endpoint_name,
                 attempt,
                 MAX_RETRIES,
             )
 
-            response = self.session.post(
-                url,
-                json=body,
-                timeout=self.timeout,
-            )
+            # Con stream=True el cuerpo se lee después (_read_page): el slot
+            # sigue tomado hasta cerrarlo, así max_concurrent_requests
+            # también limita los cuerpos abiertos.
+            self._request_slots.acquire()
+            try:
+                waited = self.rate_limiter.acquire()
+                if waited > 0:
+                    stats["rate_limit_wait_proactive_seconds"] += waited
+                    stats["rate_limit_wait_seconds"] += waited
+                with telemetry.stage("jira_request", endpoint=endpoint_name, attempt=attempt) as span:
+                    t0 = time.perf_counter()
+                    response = self.session.request(
+                        method,
+                        url,
+                        json=body,
+                        params=params,
+                        timeout=self.timeout,
+                        stream=stream,
+                    )
+                    response.jira_elapsed = time.perf_counter() - t0
+                    span.set("status", response.status_code)
+            except BODY_ERRORS as e:
+                # Sin stream, el cuerpo se lee dentro de session.request.
+                self._request_slots.release()
+                if attempt == MAX_RETRIES:
+                    raise
+                if attempt > 1:
+                    stats["api_retries_total"] += 1
+                backoff = decorrelated_jitter(backoff)
+                self.logger.warning(
+                    "[jira] connection error in %s (%s). Retrying in %.1fs",
+                    endpoint_name,
+                    e,
+                    backoff,
+                )
+                time.sleep(backoff)
+                continue
+            except BaseException:
+                self._request_slots.release()
+                raise
+            if stream and response.status_code == 200:
+                response.jira_slot = self._request_slots
+            else:
+                self._request_slots.release()
             last_response = response
 
             self.logger.info("[jira] status=%s", response.status_code)
 
             if response.status_code == 200:
+                self.rate_limiter.on_success()
                 return response
 
             if response.status_code in TRANSIENT_STATUS_CODES:
                 if attempt > 1:
                     stats["api_retries_total"] += 1
 
-                retry_after = response.headers.get("Retry-After")
-                if retry_after and retry_after.isdigit():
-                    wait = int(retry_after)
-                else:
-                    wait = min(2 ** attempt, 60)
+                backoff = decorrelated_jitter(backoff)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                wait = retry_after if retry_after is not None else backoff
 
                 if response.status_code == 429:
                     stats["rate_limit_events"] += 1
+                    stats["rate_limit_wait_reactive_seconds"] += wait
                     stats["rate_limit_wait_seconds"] += wait
+                    self.rate_limiter.on_throttled(wait)
                 elif response.status_code >= 500:
                     stats["api_5xx_events"] += 1
 
                 self.logger.warning(
-                    "[jira] transient error %s in %s. Retrying in %ss",
+                    "[jira] transient error %s in %s. Retrying in %.1fs",
                     response.status_code,
                     endpoint_name,
                     wait,
                 )
+                response.close()
                 time.sleep(wait)
                 continue
 
@@ -107,48 +331,189 @@ class JiraClient:
         self.logger.error(
             "[jira] retries exhausted in %s. Last status=%s",
             endpoint_name,
-            last_response.status_code if last_response else "N/A",
+            last_response.status_code if last_response is not None else "N/A",
         )
         if last_response is not None:
             self.logger.error("[jira] response body: %s", last_response.text)
             last_response.raise_for_status()
         raise RuntimeError(f"Jira request failed for {endpoint_name}")
 
+    def _close_response(self, response):
+        """Cierra la respuesta y libera su slot si aún lo tenía."""
+        response.close()
+        slot = getattr(response, "jira_slot", None)
+        if slot is not None:
+            response.jira_slot = None
+            slot.release()
+
+    def _read_body(self, response):
+        """
+        Lee y decodifica el cuerpo de una página de búsqueda.
+
+        - Sin stream_decode: response.json().
+        - Con stream_decode: decodifica el arreglo "issues" de forma
+          incremental desde la red, sin bufferear los bytes del cuerpo;
+          los issues se entregan cuando termina la página.
+        - Con stream_chunk_issues: el cuerpo se lee completo (comprimido
+          en la red, en bytes en memoria) y el arreglo se decodifica de a
+          sublistas al entregarlas. Así ninguna conexión queda abierta
+          mientras el consumidor mergea, y el árbol de dicts de la página
+          nunca está completo en memoria.
+
+        Retorna (issues o None si se decodifican al entregar, resto del
+        cuerpo o el JsonArrayStream pendiente, bytes decodificados, buffer
+        máximo en bytes).
+        """
+        if not self.stream_decode:
+            data = response.json()
+            decoded = len(response.content)
+            return data.pop("issues", []), data, decoded, decoded
+
+        if self.stream_chunk_issues:
+            body = response.content
+            view = memoryview(body)
+            stream = JsonArrayStream(
+                (view[i:i + STREAM_CHUNK_BYTES] for i in range(0, len(body), STREAM_CHUNK_BYTES)),
+                "issues",
+            )
+            return None, stream, len(body), len(body)
+
+        stream = JsonArrayStream(
+            response.iter_content(chunk_size=STREAM_CHUNK_BYTES),
+            "issues",
+        )
+        issues = list(stream)
+        return issues, stream.meta, stream.bytes_read, stream.peak_bytes
+
+    def _read_page(self, request, stats: dict, cursor: dict, skip: int = 0):
+        """
+        Pide una página de búsqueda (request() → _request_with_retries) y
+        entrega sus issues como IssuePage (con el cursor de la página y la
+        posición alcanzada): la página completa, o sublistas de
+        stream_chunk_issues issues (ver _read_body).
+
+        El cuerpo se lee entero antes de entregar el primer issue, con el
+        slot de concurrencia tomado. Si la conexión se corta a mitad del
+        cuerpo, la página se pide de nuevo (aún no se entregó nada).
+
+        Los primeros `skip` issues (ya procesados antes de un resume) se
+        leen pero no se entregan.
+
+        Retorna (resto del cuerpo, issues leídos, bytes decodificados,
+        segundos de red + decode sin contar el tiempo del consumidor).
+        """
+        backoff = 1.0
+        for attempt in range(1, MAX_RETRIES + 1):
+            response = request()
+            t0 = time.perf_counter()
+            try:
+                issues, data, decoded, peak = self._read_body(response)
+                break
+            except BODY_ERRORS as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                stats["api_retries_total"] += 1
+                backoff = decorrelated_jitter(backoff)
+                self.logger.warning(
+                    "[jira] connection dropped reading %s body (%s). Retrying page in %.1fs",
+                    cursor["endpoint"],
+                    e,
+                    backoff,
+                )
+            finally:
+                self._close_response(response)
+            time.sleep(backoff)
+
+        stats["api_bytes_wire"] += _wire_bytes(response) or decoded
+        stats["api_bytes_decoded"] += decoded
+        suspended = 0.0
+        if issues is not None:
+            returned = len(issues)
+            if issues[skip:]:
+                t = time.perf_counter()
+                yield IssuePage(issues[skip:], {**cursor, "skip": returned})
+                suspended += time.perf_counter() - t
+        else:
+            stream = data
+            returned = 0
+            chunk = []
+            for issue in stream:
+                returned += 1
+                if returned <= skip:
+                    continue
+                chunk.append(issue)
+                if len(chunk) >= self.stream_chunk_issues:
+                    t = time.perf_counter()
+                    yield IssuePage(chunk, {**cursor, "skip": returned})
+                    suspended += time.perf_counter() - t
+                    chunk = []
+            if chunk:
+                t = time.perf_counter()
+                yield IssuePage(chunk, {**cursor, "skip": returned})
+                suspended += time.perf_counter() - t
+            data = stream.meta
+            peak += stream.peak_bytes
+
+        stats["page_peak_buffer_bytes"] = max(stats["page_peak_buffer_bytes"], peak)
+
+        decode_seconds = time.perf_counter() - t0 - suspended
+        telemetry.record("jira_decode", decode_seconds, issues=returned, bytes=decoded)
+        elapsed = response.jira_elapsed + decode_seconds
+        return data, returned, decoded, elapsed
+
     def _fetch_issues_search_jql(
         self,
         *,
         jql: str,
         batch_size: int,
         stats: dict,
+        fields: list | None = None,
+        expand_changelog: bool = True,
+        page_size: AdaptivePageSize | None = None,
+        resume_cursor: dict | None = None,
     ) -> Generator[List[dict], None, None]:
-        next_page_token = None
+        next_page_token = resume_cursor["page"] if resume_cursor else None
+        skip = resume_cursor["skip"] if resume_cursor else 0
 
         while True:
-            body = {
-                "jql": jql,
-                "maxResults": batch_size,
-                "fields": ["*all"],
-                "expand": "changelog",
-            }
-            if next_page_token:
-                body["nextPageToken"] = next_page_token
+            requested = page_size.current if page_size else batch_size
+            body = build_search_jql_body(
+                jql=jql,
+                max_results=requested,
+                fields=fields,
+                expand_changelog=expand_changelog,
+                next_page_token=next_page_token,
+            )
 
-            response = self._post_with_retries(
-                url=self.search_jql_api,
-                body=body,
-                stats=stats,
-                endpoint_name="search/jql",
+            data, returned, nbytes, elapsed = yield from self._read_page(
+                lambda: self._request_with_retries(
+                    url=self.search_jql_api,
+                    body=body,
+                    stats=stats,
+                    endpoint_name="search/jql",
+                    stream=self.stream_decode,
+                ),
+                stats,
+                {"endpoint": "search/jql", "page": next_page_token},
+                skip,
             )
+            skip = max(0, skip - returned)
+            next_page_token = data.get("nextPageToken")
 
-            data = response.json()
-            issues = data.get("issues", [])
-            if not issues:
+            if page_size:
+                page_size.observe(
+                    requested=requested,
+                    returned=returned,
+                    elapsed=elapsed,
+                    nbytes=nbytes,
+                    server_max=data.get("maxResults"),
+                    is_last=not next_page_token,
+                )
+
+            if not returned:
                 self.logger.info("[jira] no more issues (search/jql)")
                 break
 
-            yield issues
-
-            next_page_token = data.get("nextPageToken")
             if not next_page_token:
                 self.logger.info("[jira] no nextPageToken, end")
                 break
@@ -159,40 +524,178 @@ class JiraClient:
         jql: str,
         batch_size: int,
         stats: dict,
+        fields: list | None = None,
+        expand_changelog: bool = True,
+        page_size: AdaptivePageSize | None = None,
+        resume_cursor: dict | None = None,
     ) -> Generator[List[dict], None, None]:
         start_at = 0
+        if resume_cursor:
+            start_at = int(resume_cursor["page"] or 0) + int(resume_cursor["skip"])
 
         while True:
-            body = {
-                "jql": jql,
-                "startAt": start_at,
-                "maxResults": batch_size,
-                "fields": ["*all"],
-                "expand": ["changelog"],
-            }
-
-            response = self._post_with_retries(
-                url=self.search_api,
-                body=body,
-                stats=stats,
-                endpoint_name="search",
+            requested = page_size.current if page_size else batch_size
+            body = build_search_body(
+                jql=jql,
+                start_at=start_at,
+                max_results=requested,
+                fields=fields,
+                expand_changelog=expand_changelog,
             )
 
-            data = response.json()
-            issues = data.get("issues", [])
+            data, returned, nbytes, elapsed = yield from self._read_page(
+                lambda: self._request_with_retries(
+                    url=self.search_api,
+                    body=body,
+                    stats=stats,
+                    endpoint_name="search",
+                    stream=self.stream_decode,
+                ),
+                stats,
+                {"endpoint": "search", "page": start_at},
+            )
             total = data.get("total", 0)
 
-            if not issues:
+            if page_size:
+                page_size.observe(
+                    requested=requested,
+                    returned=returned,
+                    elapsed=elapsed,
+                    nbytes=nbytes,
+                    server_max=data.get("maxResults"),
+                    is_last=start_at + returned >= total,
+                )
+
+            if not returned:
                 self.logger.info("[jira] no more issues (search)")
                 break
 
-            yield issues
-
-            start_at += len(issues)
+            start_at += returned
             if start_at >= total:
                 self.logger.info("[jira] pagination complete startAt=%s total=%s", start_at, total)
                 break
 
+    def fetch_field_bounds(
+        self,
+        *,
+        jql: str,
+        field: str,
+        stats: dict,
+    ) -> tuple:
+        """
+        Retorna (min, max) de un campo fecha (created / updated) para el JQL
+        dado, como datetimes naive en hora de pared de Jira. Usa dos
+        búsquedas de 1 issue ordenadas ASC / DESC.
+        """
+        bounds = []
+        for direction in ("ASC", "DESC"):
+            response = self._request_with_retries(
+                url=self.search_jql_api,
+                body={
+                    "jql": f"{jql} ORDER BY {field} {direction}",
+                    "maxResults": 1,
+                    "fields": [field],
+                },
+                stats=stats,
+                endpoint_name="search/jql",
+            )
+            issues = response.json().get("issues", [])
+            value = issues[0].get("fields", {}).get(field) if issues else None
+            bounds.append(
+                datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+                if value
+                else None
+            )
+
+        self.logger.info("[jira] bounds %s for %s → %s", field, jql, bounds)
+        return bounds[0], bounds[1]
+
+    def fetch_fields(self, *, stats: dict) -> list:
+        """Catálogo de campos del sitio (GET /field), sistema y custom."""
+        response = self._request_with_retries(
+            method="GET",
+            url=f"{self.url}/rest/api/3/field",
+            stats=stats,
+            endpoint_name="field",
+        )
+        return response.json()
+
+    def fetch_board_jql(
+        self,
+        *,
+        board_id: int,
+        stats: dict,
+        ttl_seconds: float = BOARD_JQL_TTL_SECONDS,
+    ) -> str | None:
+        """
+        JQL de alcance de un board (ver board_scope_jql): configuración del
+        board en la API Agile → filtro guardado vía /filter/{id}. Se
+        resuelve una vez por proceso y se reutiliza durante ttl_seconds.
+        """
+        key = (self.url, int(board_id))
+        with _board_jql_lock:
+            cached = _board_jql_cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < ttl_seconds:
+            return cached[0]
+
+        config = self._request_with_retries(
+            method="GET",
+            url=f"{self.url}/rest/agile/1.0/board/{int(board_id)}/configuration",
+            stats=stats,
+            endpoint_name="board/configuration",
+        ).json()
+        filter_id = (config.get("filter") or {}).get("id")
+        if filter_id is None:
+            raise RuntimeError(f"Board {board_id} sin filtro asociado")
+
+        saved_filter = self._request_with_retries(
+            method="GET",
+            url=f"{self.url}/rest/api/3/filter/{filter_id}",
+            stats=stats,
+            endpoint_name="filter",
+        ).json()
+        jql = board_scope_jql(
+            saved_filter.get("jql"),
+            (config.get("subQuery") or {}).get("query"),
+        )
+
+        self.logger.info("[jira] board=%s | filter=%s | scope JQL: %s", board_id, filter_id, jql)
+        with _board_jql_lock:
+            _board_jql_cache[key] = (jql, time.monotonic())
+        return jql
+
+    def fetch_issue_changelog(
+        self,
+        *,
+        issue_id: str,
+        stats: dict,
+        start_at: int = 0,
+        page_size: int = CHANGELOG_PAGE_SIZE,
+    ) -> Generator[List[dict], None, None]:
+        """
+        Historias del changelog de un issue vía GET /issue/{id}/changelog.
+        La búsqueda con expand=changelog trae solo las más recientes; esto
+        completa las que faltan desde start_at.
+        """
+        while True:
+            response = self._request_with_retries(
+                method="GET",
+                url=f"{self.issue_api}/{issue_id}/changelog",
+                params={"startAt": start_at, "maxResults": page_size},
+                stats=stats,
+                endpoint_name="issue/changelog",
+            )
+            data = response.json()
+            histories = data.get("values", [])
+            if not histories:
+                break
+
+            yield histories
+
+            start_at += len(histories)
+            if data.get("isLast", True) or start_at >= data.get("total", 0):
+                break
+
     def fetch_issues_by_project(
         self,
         *,
@@ -200,21 +703,55 @@ class JiraClient:
         jql: str,
         batch_size: int,
         stats: dict,
+        fields: list | None = None,
+        expand_changelog: bool = True,
+        page_size: AdaptivePageSize | None = None,
+        resume_cursor: dict | None = None,
     ) -> Generator[List[dict], None, None]:
+        """
+        Issues del JQL en páginas (IssuePage). Con resume_cursor (el
+        .cursor de una página entregada antes, con el mismo JQL) la
+        paginación retoma justo después de esa página.
+        """
         self.logger.info("[jira] fetch_issues_by_project start")
         self.logger.info("[jira] project=%s", project_key)
         self.logger.info("[jira] JQL final:\n%s", jql)
+        self.logger.info(
+            "[jira] fields=%s | expand_changelog=%s | resume_cursor=%s",
+            effective_fields(fields),
+            expand_changelog,
+            resume_cursor,
+        )
+
+        if resume_cursor and resume_cursor.get("endpoint") == "search":
+            stats["fallback_to_search_used"] = 1
+            yield from self._fetch_issues_search(
+                jql=jql,
+                batch_size=batch_size,
+                stats=stats,
+                fields=fields,
+                expand_changelog=expand_changelog,
+                page_size=page_size,
+                resume_cursor=resume_cursor,
+            )
+            return
 
         try:
             yield from self._fetch_issues_search_jql(
                 jql=jql,
                 batch_size=batch_size,
                 stats=stats,
+                fields=fields,
+                expand_changelog=expand_changelog,
+                page_size=page_size,
+                resume_cursor=resume_cursor,
             )
             return
         except requests.HTTPError as e:
             status = e.response.status_code if e.response is not None else None
-            if status not in {404, 500, 502, 503, 504}:
+            # Un nextPageToken no sirve en /search: con resume_cursor el
+            # llamador decide (p. ej. descartar el checkpoint).
+            if status not in FALLBACK_STATUS_CODES or resume_cursor:
                 raise
             self.logger.warning(
                 "[jira] search/jql failed with status=%s, using fallback /search",
@@ -226,4 +763,7 @@ class JiraClient:
             jql=jql,
             batch_size=batch_size,
             stats=stats,
+            fields=fields,
+            expand_changelog=expand_changelog,
+            page_size=page_size,
         )
@@ -0,0 +1,157 @@
+# core/json_stream.py
+import codecs
+import json
+
+_WHITESPACE = " \t\n\r"
+# Lo que puede seguir a un valor completo: separadores, cierre de
+# contenedor o el ":" tras una clave.
+_DELIMITERS = _WHITESPACE + ",]}:"
+_DECODER = json.JSONDecoder()
+
+
+class _Buffer:
+    """
+    Texto decodificado de forma incremental desde chunks de bytes.
+    Lleva la cuenta del máximo de texto retenido a la vez, medido en
+    bytes UTF-8 (peak_bytes).
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self.peak_bytes = 0
+
+    def fill(self, min_new: int = 1) -> bool:
+        """Lee chunks hasta sumar al menos min_new caracteres. False si EOF."""
+        if self.eof:
+            return False
+
+        if self.pos > 0:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+
+        added = 0
+        while added < min_new:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                tail = self._decoder.decode(b"", final=True)
+                self.text += tail
+                self.eof = True
+                break
+            if not chunk:
+                continue
+            self.bytes_read += len(chunk)
+            piece = self._decoder.decode(chunk)
+            self.text += piece
+            added += len(piece)
+
+        # UTF-8 usa a lo más 4 bytes por carácter: solo se mide si el
+        # buffer actual podría superar el máximo ya registrado.
+        if 4 * len(self.text) > self.peak_bytes:
+            size = len(self.text) if self.text.isascii() else len(self.text.encode("utf-8"))
+            self.peak_bytes = max(self.peak_bytes, size)
+        return added > 0 or not self.eof
+
+    def skip_ws(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.fill():
+                return
+
+    def peek(self) -> str:
+        self.skip_ws()
+        if self.pos >= len(self.text):
+            raise ValueError("JSON truncado")
+        return self.text[self.pos]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: se esperaba {char!r} en posición {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decodifica un valor JSON completo desde la posición actual.
+
+        Solo se acepta el resultado si el carácter siguiente es un
+        delimitador (espacio, ",", "]", "}" o ":") o se llegó a EOF: así un
+        escalar cortado en el borde de un chunk ("12" de "1234", "0" de
+        "0.5", "1" de "1e3") no se toma como completo. Ante un valor incompleto
+        se espera a que el buffer crezca al doble antes de reintentar, para
+        que los issues grandes no se re-escaneen en cada chunk.
+        """
+        self.skip_ws()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.text, self.pos)
+                if self.eof or (end < len(self.text) and self.text[end] in _DELIMITERS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            pending = len(self.text) - self.pos
+            if not self.fill(max(pending, 64 * 1024)) and not self.eof:
+                raise ValueError("JSON truncado")
+
+
+class JsonArrayStream:
+    """
+    Recorre un objeto JSON de nivel superior entregando, uno a uno, los
+    elementos del arreglo `array_key` (p. ej. "issues") a medida que se
+    decodifican. El resto de claves de nivel superior (nextPageToken,
+    total, ...) queda en `meta` al terminar la iteración.
+    """
+
+    def __init__(self, chunks, array_key: str):
+        self._buf = _Buffer(chunks)
+        self.array_key = array_key
+        self.meta = {}
+
+    @property
+    def bytes_read(self) -> int:
+        return self._buf.bytes_read
+
+    @property
+    def peak_bytes(self) -> int:
+        return self._buf.peak_bytes
+
+    def __iter__(self):
+        buf = self._buf
+        buf.expect("{")
+        if buf.peek() == "}":
+            buf.pos += 1
+            return
+
+        while True:
+            key = buf.value()
+            buf.expect(":")
+
+            if key == self.array_key and buf.peek() == "[":
+                buf.pos += 1
+                if buf.peek() == "]":
+                    buf.pos += 1
+                else:
+                    while True:
+                        yield buf.value()
+                        sep = buf.peek()
+                        buf.pos += 1
+                        if sep == "]":
+                            break
+                        if sep != ",":
+                            raise ValueError(f"JSON inválido: {sep!r} dentro de {key}")
+            else:
+                self.meta[key] = buf.value()
+
+            sep = buf.peek()
+            buf.pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"JSON inválido: {sep!r} en objeto raíz")
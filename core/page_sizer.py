@@ -0,0 +1,94 @@
+# core/page_sizer.py
+import threading
+
+
+class AdaptivePageSize:
+    """
+    Tamaño de página (maxResults) que se ajusta durante la ejecución.
+
+    - Crece (x1.5) hacia max_size cuando las respuestas son rápidas y livianas
+      y la página vino completa.
+    - Se reduce a la mitad cuando una respuesta es lenta, pesada o se acerca
+      al timeout de lectura.
+    - Si el servidor entrega menos issues de los pedidos sin ser la última
+      página, ese valor pasa a ser el máximo (tope del servidor).
+
+    Es thread-safe: varios shards de un mismo board pueden compartirlo.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int,
+        min_size: int = 10,
+        max_size: int = 1000,
+        target_seconds: float = 5.0,
+        max_bytes: int = 20 * 1024 * 1024,
+        timeout_seconds: float | None = None,
+        adaptive: bool = True,
+    ):
+        self.min_size = max(1, int(min_size))
+        self.max_size = max(self.min_size, int(max_size))
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+        self.adaptive = adaptive
+
+        self.initial = min(max(int(initial), self.min_size), self.max_size)
+        self._current = self.initial
+        self._lock = threading.Lock()
+
+        self.min_used = None
+        self.max_used = None
+
+    @property
+    def current(self) -> int:
+        with self._lock:
+            return self._current
+
+    def observe(
+        self,
+        *,
+        requested: int,
+        returned: int,
+        elapsed: float,
+        nbytes: int,
+        server_max: int | None = None,
+        is_last: bool = False,
+    ):
+        with self._lock:
+            self.min_used = requested if self.min_used is None else min(self.min_used, requested)
+            self.max_used = requested if self.max_used is None else max(self.max_used, requested)
+
+            if server_max and server_max < requested:
+                self.max_size = max(self.min_size, int(server_max))
+            elif not is_last and 0 < returned < requested:
+                self.max_size = max(self.min_size, returned)
+
+            if not self.adaptive:
+                self._current = min(self._current, self.max_size)
+                return
+
+            near_timeout = (
+                self.timeout_seconds is not None
+                and elapsed > self.timeout_seconds * 0.5
+            )
+            if near_timeout or elapsed > self.target_seconds * 2 or nbytes > self.max_bytes:
+                self._current = max(self.min_size, self._current // 2)
+            elif (
+                elapsed < self.target_seconds / 2
+                and nbytes < self.max_bytes / 2
+                and returned >= requested
+            ):
+                self._current = min(self.max_size, max(self._current + 1, int(self._current * 1.5)))
+
+            self._current = min(self._current, self.max_size)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "batch_size": self.initial,
+                "batch_size_min": self.min_used,
+                "batch_size_max": self.max_used,
+                "batch_size_final": self._current,
+            }
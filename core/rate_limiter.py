@@ -0,0 +1,120 @@
+# core/rate_limiter.py
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Interpreta Retry-After en sus dos formas (RFC 9110):
+    segundos ("120", "1.5") o HTTP-date ("Wed, 21 Oct 2015 07:28:00 GMT").
+    Retorna segundos a esperar (>= 0) o None si no es interpretable.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def decorrelated_jitter(previous: float, *, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Backoff "decorrelated jitter": sleep = min(cap, random(base, previous * 3)).
+    Evita que varios hilos reintenten sincronizados tras un mismo error.
+    """
+    return min(cap, random.uniform(base, max(base, previous) * 3))
+
+
+class TokenBucket:
+    """
+    Rate limiter proactivo (token bucket) con ajuste AIMD.
+
+    - reserve() reserva un token y retorna cuántos segundos hay que esperar.
+    - on_throttled(seconds) (tras un 429) baja la tasa a la mitad y bloquea
+      a todos los llamadores hasta que pase el Retry-After.
+    - on_success() sube la tasa de a poco hasta max_rate.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float,
+        burst: float,
+        min_rate: float = 0.5,
+        increase_step: float = 0.1,
+    ):
+        self.max_rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.burst = max(1.0, float(burst))
+        self.increase_step = increase_step
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self.rate
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self, seconds: float):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            self._blocked_until = max(self._blocked_until, now + seconds)
+
+
+_LIMITERS: dict = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(key: str, *, rate: float, burst: float) -> TokenBucket:
+    """
+    Limiter compartido por proceso: todos los clientes que apuntan al
+    mismo Jira (key) consumen del mismo bucket.
+    """
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = TokenBucket(rate=rate, burst=burst)
+            _LIMITERS[key] = limiter
+        return limiter
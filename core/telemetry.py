@@ -0,0 +1,209 @@
+# core/telemetry.py
+import contextvars
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from opentelemetry import trace
+
+# Etapas con columnas propias en jira_summary_etl
+# (stage_<etapa>_seconds / _p50_ms / _p95_ms): el hot path más los jobs
+# de metadata de BigQuery (infra = dataset / tablas / layout, state =
+# tabla de estado y checkpoint, row_count = filas de la tabla raw).
+STAGES = (
+    "jira_request",
+    "jira_decode",
+    "transform",
+    "validate",
+    "changelog",
+    "staging_encode",
+    "staging_load",
+    "merge",
+    "infra",
+    "state",
+    "row_count",
+)
+
+TRACER_NAME = "jira_etl"
+
+_current = contextvars.ContextVar("jira_etl_stage_recorder", default=None)
+_tracer = None
+_exporter = None
+
+
+def _percentile_ms(values: list, pct: float) -> float | None:
+    """Percentil por rango más cercano (values ordenado), en ms."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return round(values[int(rank) - 1] * 1000, 3)
+
+
+class StageRecorder:
+    """
+    Duraciones por etapa de una ejecución (1 por board). Thread-safe:
+    las etapas del pipeline y los workers de backfill registran en el
+    mismo recorder (ver propagate()).
+
+    attributes se agregan a cada span exportado (execution_id, tabla...).
+    """
+
+    def __init__(self, **attributes):
+        self.attributes = attributes
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def summary(self) -> dict:
+        """Columnas stage_* para la fila de summary."""
+        with self._lock:
+            samples = {stage: sorted(v) for stage, v in self._samples.items()}
+        row = {}
+        for stage in STAGES:
+            values = samples.get(stage, [])
+            row[f"stage_{stage}_seconds"] = round(sum(values), 3)
+            row[f"stage_{stage}_p50_ms"] = _percentile_ms(values, 50)
+            row[f"stage_{stage}_p95_ms"] = _percentile_ms(values, 95)
+        return row
+
+    def describe(self) -> str:
+        """Resumen de una línea para el log."""
+        row = self.summary()
+        return " | ".join(
+            f"{stage}={row[f'stage_{stage}_seconds']:.2f}s p95={row[f'stage_{stage}_p95_ms']}ms"
+            for stage in STAGES
+            if row[f"stage_{stage}_p95_ms"] is not None
+        )
+
+
+class _JsonLinesExporter:
+    """Exporter local: 1 línea JSON por span (stderr o archivo)."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self._lock = threading.Lock()
+        if target == "console":
+            self._fh = sys.stderr
+        else:
+            self._fh = open(target, "a", encoding="utf-8")
+
+    def export(self, name: str, start: float, seconds: float, attributes: dict, span):
+        ctx = span.get_span_context() if span is not None else None
+        line = json.dumps(
+            {
+                "name": name,
+                "start": start,
+                "duration_ms": round(seconds * 1000, 3),
+                "trace_id": format(ctx.trace_id, "032x") if ctx and ctx.is_valid else None,
+                "span_id": format(ctx.span_id, "016x") if ctx and ctx.is_valid else None,
+                "thread": threading.current_thread().name,
+                "attributes": attributes,
+            },
+            default=str,
+        )
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is not sys.stderr:
+            self._fh.close()
+
+
+def configure_telemetry(*, export: str | None = None, otel_spans: bool = False, logger=None):
+    """
+    - export: "console" (stderr) o ruta de archivo → cada etapa se
+      escribe como span en JSON lines (uso local, sin collector).
+    - otel_spans: además abre spans vía opentelemetry-api. Son no-op
+      salvo que el proceso tenga un TracerProvider del SDK configurado
+      (p. ej. opentelemetry-instrument en el despliegue).
+    """
+    global _tracer, _exporter
+
+    # Misma configuración (p. ej. ejecuciones sucesivas de service.py):
+    # se conserva el exporter abierto.
+    current = _exporter.target if _exporter is not None else None
+    if current != (export or None):
+        if _exporter is not None:
+            _exporter.close()
+        _exporter = _JsonLinesExporter(export) if export else None
+    _tracer = trace.get_tracer(TRACER_NAME) if otel_spans else None
+
+    if logger is not None and (export or otel_spans) and current != (export or None):
+        logger.info("🔭 Telemetry | export=%s | otel_spans=%s", export, otel_spans)
+
+
+def activate(recorder: StageRecorder):
+    """Fija el recorder del contexto actual; retorna el token para deactivate()."""
+    return _current.set(recorder)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def propagate(fn):
+    """
+    fn ligada a una copia del contexto actual (recorder y span padre),
+    para usarla como target de un threading.Thread.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+class _Stage:
+    def __init__(self, attributes: dict, span):
+        self.attributes = attributes
+        self.span = span
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+        if self.span is not None:
+            self.span.set_attribute(key, value)
+
+
+def _emit(name: str, start: float, seconds: float, attributes: dict, span=None):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.record(name, seconds)
+        if _exporter is not None:
+            attributes = {**recorder.attributes, **attributes}
+    if _exporter is not None:
+        _exporter.export(f"{TRACER_NAME}.{name}", start, seconds, attributes, span)
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """
+    Mide una etapa: suma la duración al recorder activo y, si está
+    configurado, abre un span. El objeto entregado permite agregar
+    atributos conocidos recién al final (status, filas...).
+    """
+    if _tracer is None:
+        handle = _Stage(attributes, None)
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            _emit(name, start, time.perf_counter() - t0, handle.attributes)
+        return
+
+    with _tracer.start_as_current_span(f"{TRACER_NAME}.{name}", attributes=attributes) as span:
+        handle = _Stage(attributes, span)
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            _emit(name, start, time.perf_counter() - t0, handle.attributes, span)
+
+
+def record(name: str, seconds: float, **attributes):
+    """Registra una duración ya medida (sin span propio)."""
+    _emit(name, time.time() - seconds, seconds, attributes)
@@ -0,0 +1,184 @@
+# etl/backfill.py
+import queue
+import threading
+from datetime import datetime
+
+from core.telemetry import propagate
+
+JQL_DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# Se generan más ventanas que workers para que las ventanas densas no
+# dejen a los demás hilos sin trabajo (balanceo dinámico).
+WINDOWS_PER_SHARD = 4
+
+_END = object()
+_POLL_SECONDS = 0.2
+
+
+def build_time_windows(start: datetime, end: datetime, count: int) -> list:
+    """
+    Divide [start, end] en `count` ventanas contiguas y disjuntas.
+
+    Retorna una lista de (lower, upper) donde la primera ventana no tiene
+    cota inferior y la última no tiene cota superior (None): así ningún
+    issue queda fuera aunque Jira interprete las fechas en otra zona
+    horaria o aparezcan issues nuevos durante la carga.
+    Las cotas se redondean al minuto (resolución del JQL).
+    """
+    if start is None or end is None or count <= 1 or end <= start:
+        return [(None, None)]
+
+    step = (end - start) / count
+    cuts = []
+    for i in range(1, count):
+        cut = (start + step * i).replace(second=0, microsecond=0)
+        if not cuts or cut > cuts[-1]:
+            cuts.append(cut)
+
+    lowers = [None] + cuts
+    uppers = cuts + [None]
+    return list(zip(lowers, uppers))
+
+
+def window_jql(base_jql: str, field: str, lower, upper) -> str:
+    clauses = [base_jql]
+    if lower is not None:
+        clauses.append(f'{field} >= "{lower.strftime(JQL_DATETIME_FORMAT)}"')
+    if upper is not None:
+        clauses.append(f'{field} < "{upper.strftime(JQL_DATETIME_FORMAT)}"')
+    return " AND ".join(clauses) + f" ORDER BY {field} ASC"
+
+
+def merge_api_stats(into: dict, other: dict):
+    """
+    Suma los contadores de Jira de un shard sobre las métricas del board.
+    fallback_to_search_used es un flag (0/1) y page_peak_buffer_bytes un
+    máximo, no contadores.
+    """
+    for key, value in other.items():
+        if key in ("fallback_to_search_used", "page_peak_buffer_bytes"):
+            into[key] = max(into.get(key, 0), value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def new_api_stats() -> dict:
+    return {
+        "api_requests": 0,
+        "rate_limit_events": 0,
+        "rate_limit_wait_seconds": 0.0,
+        "rate_limit_wait_proactive_seconds": 0.0,
+        "rate_limit_wait_reactive_seconds": 0.0,
+        "api_retries_total": 0,
+        "api_5xx_events": 0,
+        "fallback_to_search_used": 0,
+        "api_bytes_wire": 0,
+        "api_bytes_decoded": 0,
+        "page_peak_buffer_bytes": 0,
+    }
+
+
+def fetch_sharded(
+    *,
+    jira,
+    project_key: str,
+    jqls: list,
+    batch_size: int,
+    stats: dict,
+    max_workers: int,
+    logger,
+    queue_size: int = 4,
+    fields: list | None = None,
+    expand_changelog: bool = True,
+    page_size=None,
+):
+    """
+    Descarga varias ventanas JQL en paralelo y entrega las páginas en un
+    único generador, en el orden en que van llegando.
+
+    Cada ventana pagina de forma independiente (su propio nextPageToken /
+    startAt y su propio dict de stats, que se suma a `stats` al terminar).
+    Si un shard falla se cancelan los demás y se relanza el error.
+    """
+    pending = queue.Queue()
+    for jql in jqls:
+        pending.put(jql)
+
+    pages = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors = []
+    shard_stats = []
+    lock = threading.Lock()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        local_stats = new_api_stats()
+        with lock:
+            shard_stats.append(local_stats)
+        try:
+            while not stop.is_set():
+                try:
+                    jql = pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                generator = jira.fetch_issues_by_project(
+                    project_key=project_key,
+                    jql=jql,
+                    batch_size=batch_size,
+                    stats=local_stats,
+                    fields=fields,
+                    expand_changelog=expand_changelog,
+                    page_size=page_size,
+                )
+                try:
+                    for issues in generator:
+                        if not put(issues):
+                            break
+                finally:
+                    generator.close()
+        except BaseException as e:
+            with lock:
+                if not errors:
+                    logger.error("❌ backfill shard failed: %s", e)
+                    errors.append(e)
+            stop.set()
+        finally:
+            put(_END)
+
+    workers = max(1, min(max_workers, len(jqls)))
+    threads = [
+        threading.Thread(target=propagate(worker), name=f"backfill-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    finished = 0
+    try:
+        while finished < workers and not stop.is_set():
+            try:
+                item = pages.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if item is _END:
+                finished += 1
+                continue
+            yield item
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        for local_stats in shard_stats:
+            merge_api_stats(stats, local_stats)
+
+    if errors:
+        raise errors[0]
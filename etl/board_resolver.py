@@ -3,6 +3,20 @@ print(">>> etl/board_resolver.py LOADED")
 
 from typing import List, Dict, Optional
 
+# Overrides por board que se copian tal cual si vienen en el runtime.
+BOARD_OPTIONAL_KEYS = (
+    "jira_fields",
+    "expand_changelog",
+    "changelog_table",
+    "typed_columns",
+    "board_jql",
+)
+
+# Cómo se acota lo que descarga cada board:
+# - filter: JQL del filtro guardado del board (solo sus issues).
+# - project: el proyecto completo en cada board (comportamiento anterior).
+BOARD_SCOPES = ("filter", "project")
+
 
 def resolve_boards(
     *,
@@ -18,7 +32,9 @@ def resolve_boards(
     1) runtime_boards con elementos:
         → ejecutar SOLO esos boards
         → cada uno debe traer:
-            { board_id, target_table }
+            { board_id, target_table }   (board_id null = proyecto)
+        → opcionalmente overrides: jira_fields, expand_changelog,
+          board_jql (alcance explícito en vez del filtro del board)
 
     2) runtime_boards NO existe o es []:
         → ejecutar a NIVEL DE PROYECTO
@@ -46,14 +62,20 @@ def resolve_boards(
             if "target_table" not in b:
                 raise ValueError(f"runtime board inválido (falta target_table): {b}")
 
-            resolved.append(
-                {
-                    "scope": "BOARD",
-                    "jira_project_key": jira_project_key,
-                    "board_id": int(b["board_id"]),
-                    "target_table": str(b["target_table"]),
-                }
-            )
+            # board_id null = tabla a nivel de proyecto junto a las de
+            # boards (útil con fanout: una sola descarga para todas).
+            board_id = b["board_id"]
+            entry = {
+                "scope": "BOARD" if board_id is not None else "PROJECT",
+                "jira_project_key": jira_project_key,
+                "board_id": int(board_id) if board_id is not None else None,
+                "target_table": str(b["target_table"]),
+            }
+            for key in BOARD_OPTIONAL_KEYS:
+                if key in b:
+                    entry[key] = b[key]
+
+            resolved.append(entry)
 
         return resolved
 
@@ -0,0 +1,208 @@
+# etl/changelog.py
+import uuid
+
+from google.cloud import bigquery
+
+from bq.client import ensure_table
+from bq.infra_cache import get_infra_cache, schema_fingerprint
+from bq.staging import load_rows
+from core import telemetry
+from etl.merge import _merge_metrics_from_job, _sql_string
+from etl.transform import parse_datetime
+
+CHANGELOG_SUFFIX = "_changelog"
+
+CHANGELOG_SCHEMA = [
+    bigquery.SchemaField("jira_id", "STRING"),
+    bigquery.SchemaField("clave", "STRING"),
+    bigquery.SchemaField("history_id", "STRING"),
+    bigquery.SchemaField("item_index", "INTEGER"),
+    bigquery.SchemaField("autor_id", "STRING"),
+    bigquery.SchemaField("autor_nombre", "STRING"),
+    bigquery.SchemaField("fecha_cambio", "TIMESTAMP"),
+    bigquery.SchemaField("campo", "STRING"),
+    bigquery.SchemaField("campo_id", "STRING"),
+    bigquery.SchemaField("campo_tipo", "STRING"),
+    bigquery.SchemaField("desde", "STRING"),
+    bigquery.SchemaField("desde_texto", "STRING"),
+    bigquery.SchemaField("hacia", "STRING"),
+    bigquery.SchemaField("hacia_texto", "STRING"),
+]
+
+CHANGELOG_KEYS = ("history_id", "item_index")
+CHANGELOG_PARTITION_FIELD = "fecha_cambio"
+CHANGELOG_CLUSTERING_FIELDS = ["jira_id", "history_id"]
+
+
+def complete_histories(issue: dict, *, jira, stats: dict) -> list:
+    """
+    Historias completas del issue. expand=changelog trae como máximo una
+    página; si changelog.total indica que faltan, se pide el changelog
+    completo del issue (solo para esos issues).
+    """
+    changelog = issue.get("changelog") or {}
+    histories = changelog.get("histories") or []
+    total = changelog.get("total") or len(histories)
+
+    if jira is None or total <= len(histories) or not issue.get("id"):
+        return histories
+
+    complete = []
+    for page in jira.fetch_issue_changelog(issue_id=issue["id"], stats=stats):
+        complete.extend(page)
+    return complete or histories
+
+
+def flatten_changelog(issue: dict, histories: list | None = None) -> list:
+    """changelog.histories[].items[] → una fila por item."""
+    if histories is None:
+        histories = (issue.get("changelog") or {}).get("histories") or []
+
+    rows = []
+    for history in histories:
+        history_id = history.get("id")
+        if not history_id:
+            continue
+        author = history.get("author") or {}
+        changed_at = parse_datetime(history.get("created"))
+
+        for index, item in enumerate(history.get("items") or []):
+            rows.append({
+                "jira_id": issue.get("id"),
+                "clave": issue.get("key"),
+                "history_id": str(history_id),
+                "item_index": index,
+                "autor_id": author.get("accountId"),
+                "autor_nombre": author.get("displayName"),
+                "fecha_cambio": changed_at,
+                "campo": item.get("field"),
+                "campo_id": item.get("fieldId"),
+                "campo_tipo": item.get("fieldtype"),
+                "desde": item.get("from"),
+                "desde_texto": item.get("fromString"),
+                "hacia": item.get("to"),
+                "hacia_texto": item.get("toString"),
+            })
+    return rows
+
+
+def transform_changelog(issues, *, jira=None, stats: dict) -> list:
+    rows = []
+    for issue in issues:
+        rows.extend(flatten_changelog(issue, complete_histories(issue, jira=jira, stats=stats)))
+    return rows
+
+
+def _changelog_merge_sql(full: str, source: str, lower=None, upper=None) -> str:
+    """
+    MERGE solo-inserción por (history_id, item_index): una historia de
+    Jira no cambia, así que lo ya cargado se deja tal cual. Con el rango
+    de fecha_cambio del batch se podan particiones del destino.
+    """
+    columns = ", ".join(f.name for f in CHANGELOG_SCHEMA)
+    values = ", ".join(f"S.{f.name}" for f in CHANGELOG_SCHEMA)
+    on = " AND ".join(f"T.{k} = S.{k}" for k in CHANGELOG_KEYS)
+    if lower is not None and upper is not None:
+        on += (
+            f" AND T.{CHANGELOG_PARTITION_FIELD} BETWEEN TIMESTAMP({_sql_string(lower)})"
+            f" AND TIMESTAMP({_sql_string(upper)})"
+        )
+
+    return f"""
+      MERGE `{full}` T
+      USING {source} S
+      ON {on}
+      WHEN NOT MATCHED THEN
+        INSERT ({columns}) VALUES ({values})
+    """
+
+
+class ChangelogMerger:
+    """
+    Acumula filas de changelog y las inserta en `{tabla}_changelog`.
+
+    flush() corre al cruzar max_rows y, desde el runner, justo antes de
+    cada MERGE de la tabla raw: así el watermark nunca avanza sobre
+    issues cuyo changelog todavía no se cargó.
+    """
+
+    def __init__(
+        self,
+        client,
+        project_id,
+        dataset_id,
+        table_id,
+        *,
+        max_rows: int = 5000,
+        staging_format: str = "avro",
+        load_stats: dict | None = None,
+    ):
+        self.client = client
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = f"{table_id}{CHANGELOG_SUFFIX}"
+        self.full = f"{project_id}.{dataset_id}.{self.table_id}"
+        self.max_rows = max_rows
+        self.staging_format = staging_format
+        self.load_stats = load_stats
+
+        self._pending = {}
+
+        get_infra_cache().once(
+            f"{self.full}|{schema_fingerprint(CHANGELOG_SCHEMA, partition=CHANGELOG_PARTITION_FIELD)}",
+            lambda: ensure_table(
+                client,
+                self.full,
+                CHANGELOG_SCHEMA,
+                partition_field=CHANGELOG_PARTITION_FIELD,
+                partition_type="MONTH",
+                clustering_fields=CHANGELOG_CLUSTERING_FIELDS,
+            ),
+        )
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._pending)
+
+    def add(self, rows) -> dict | None:
+        for row in rows:
+            self._pending[(row["history_id"], row["item_index"])] = row
+        if self.pending_rows >= self.max_rows:
+            return self.flush()
+        return None
+
+    def flush(self) -> dict | None:
+        if not self._pending:
+            return None
+
+        rows = list(self._pending.values())
+        changed = [r["fecha_cambio"] for r in rows]
+        lower, upper = (None, None) if None in changed else (min(changed), max(changed))
+
+        temp_full = (
+            f"{self.project_id}.{self.dataset_id}."
+            f"tmp_{self.table_id}_{uuid.uuid4().hex[:8]}"
+        )
+        try:
+            self.client.create_table(
+                bigquery.Table(temp_full, schema=CHANGELOG_SCHEMA),
+                exists_ok=True,
+            )
+            load_rows(
+                self.client,
+                rows,
+                temp_full,
+                schema=CHANGELOG_SCHEMA,
+                staging_format=self.staging_format,
+                stats=self.load_stats,
+            )
+            with telemetry.stage("merge", table=self.full):
+                job = self.client.query(
+                    _changelog_merge_sql(self.full, f"`{temp_full}`", lower, upper)
+                )
+                job.result()
+        finally:
+            self.client.delete_table(temp_full, not_found_ok=True)
+
+        self._pending = {}
+        return _merge_metrics_from_job(job, len(rows))
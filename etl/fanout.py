@@ -0,0 +1,363 @@
+# etl/fanout.py
+import queue
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from core.jira_client import IssuePage
+from core.telemetry import propagate
+from etl.backfill import JQL_DATETIME_FORMAT, merge_api_stats, new_api_stats
+
+# Página de la búsqueda de membresía (solo ids; Jira acepta más por página).
+MEMBERSHIP_PAGE_SIZE = 1000
+# Issues actualizados desde (resolución de la membresía - margen) se
+# vuelven a consultar: el índice de búsqueda de Jira va con atraso.
+MEMBERSHIP_RECHECK_MARGIN = timedelta(minutes=5)
+JIRA_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+_END = object()
+_POLL_SECONDS = 0.2
+
+# Alcance que es solo una cláusula de proyecto: `project = X` o
+# `project in (X, Y)`, con claves de proyecto (no nombres ni ids).
+_PROJECT_SCOPE = re.compile(r"project\s*(?:=\s*(\S+)|in\s*\(([^)]*)\))", re.I)
+_PROJECT_KEY = re.compile(r"[A-Z][A-Z0-9_]+")
+
+
+def _project_issue(issue: dict, fields: list | None, expand_changelog: bool) -> dict:
+    """
+    Vista del issue con la proyección de un target: la descarga compartida
+    pide la unión de campos, pero cada tabla guarda solo los suyos.
+    """
+    if fields and "*all" not in fields:
+        keep = set(fields) | {"created", "updated"}
+        issue = {**issue, "fields": {k: v for k, v in issue.get("fields", {}).items() if k in keep}}
+    if not expand_changelog and "changelog" in issue:
+        issue = {k: v for k, v in issue.items() if k != "changelog"}
+    return issue
+
+
+def project_keys(scope_jql: str) -> set | None:
+    """Claves de proyecto si el alcance es solo `project = ...`; si no, None."""
+    scope = scope_jql.strip()
+    while scope.startswith("(") and scope.endswith(")"):
+        scope = scope[1:-1].strip()
+    match = _PROJECT_SCOPE.fullmatch(scope)
+    if not match:
+        return None
+    values = [match.group(1)] if match.group(1) else match.group(2).split(",")
+    keys = {v.strip().strip("\"'") for v in values if v.strip()}
+    if not keys or not all(_PROJECT_KEY.fullmatch(k) for k in keys):
+        return None
+    return keys
+
+
+def _issue_updated(issue: dict):
+    try:
+        return datetime.strptime(issue.get("fields", {}).get("updated") or "", JIRA_DATETIME_FORMAT)
+    except ValueError:
+        return None
+
+
+class _ProjectMembers:
+    """
+    Target con alcance de solo proyecto(s) dentro de una unión más amplia:
+    filtra por prefijo de clave, sin búsqueda de membresía.
+    """
+
+    def __init__(self, keys):
+        self.prefixes = tuple(f"{k}-" for k in sorted(keys))
+
+    def select(self, page) -> list:
+        return [i for i in page if (i.get("key") or "").startswith(self.prefixes)]
+
+
+class _BoardMembers:
+    """
+    Issues de la unión que le tocan a un board. Los ids se resuelven al
+    empezar con una búsqueda de solo ids (filtro + watermark del board).
+
+    Un issue que entra al filtro durante la descarga no está en ese set:
+    los de cada página que no están y se actualizaron después de
+    resolverlo (menos MEMBERSHIP_RECHECK_MARGIN) se consultan de nuevo
+    con `(<filtro>) AND id in (...)`. Sin eso se perderían mientras el
+    watermark del board avanza sobre ellos.
+    """
+
+    def __init__(self, fanout, target_table: str, target: dict, stats: dict):
+        self.fanout = fanout
+        self.target_table = target_table
+        self.scope_jql = target["scope_jql"]
+        self.stats = stats
+
+        self.since = datetime.now(timezone.utc) - MEMBERSHIP_RECHECK_MARGIN
+        self.ids = self._search(fanout._updated_clause(self.scope_jql, target["last_updated"]))
+        fanout.logger.info("🔀 Fan-out membership | %s | issues=%d", target_table, len(self.ids))
+
+    def _search(self, jql: str) -> set:
+        ids = set()
+        for page in self.fanout.jira.fetch_issues_by_project(
+            project_key=self.fanout.jira_project_key,
+            jql=jql,
+            batch_size=MEMBERSHIP_PAGE_SIZE,
+            stats=self.stats,
+            fields=["id"],
+            expand_changelog=False,
+        ):
+            ids.update(issue["id"] for issue in page)
+        return ids
+
+    def select(self, page) -> list:
+        recent = [
+            i["id"]
+            for i in page
+            if i["id"] not in self.ids
+            and (_issue_updated(i) is None or _issue_updated(i) >= self.since)
+        ]
+        if recent:
+            added = self._search(f"({self.scope_jql}) AND id in ({', '.join(recent)})")
+            if added:
+                self.ids |= added
+                self.fanout.logger.info(
+                    "🔀 Fan-out membership | %s | +%d issues que entraron al filtro",
+                    self.target_table,
+                    len(added),
+                )
+        return [i for i in page if i["id"] in self.ids]
+
+
+class FanOutFetch:
+    """
+    Una sola paginación de Jira repartida entre varios targets (boards o
+    proyecto + boards) del mismo jira_project_key.
+
+    Cada run_board del grupo llama a source() con su alcance y su
+    watermark en vez de paginar por su cuenta; cuando todos se
+    registraron (o abandonaron por error), un hilo:
+
+      1) arma la unión (OR) de los alcances con el watermark más bajo,
+      2) resuelve la membresía de cada board (búsqueda de solo ids con su
+         filtro y su propio watermark; ver _BoardMembers para los issues
+         que entran al filtro durante la descarga),
+      3) pagina la unión una vez y entrega a cada target, por una cola
+         acotada, solo los issues que le corresponden.
+
+    Un target cuyo alcance es la unión completa no necesita membresía, y
+    uno de solo `project = X` (o `project in (...)`) se filtra por clave
+    sin búsqueda. Los demás (filtros de board) pagan su búsqueda de ids:
+    con boards que no se solapan el fan-out pide más a Jira que un fetch
+    por board. Los targets pueden ver issues anteriores a su propio
+    watermark: el MERGE los deja como unchanged.
+    El target más lento marca el ritmo. Las páginas repartidas no llevan
+    cursor: en fan-out no se guardan checkpoints de reanudación.
+
+    Los contadores de la descarga compartida se suman a las métricas del
+    primer target registrado (fanout_fetch_owner en el summary); las
+    búsquedas de membresía se cuentan en cada target.
+    """
+
+    def __init__(self, *, jira, jira_project_key: str, targets: list, queue_size: int, logger):
+        self.jira = jira
+        self.jira_project_key = jira_project_key
+        self.project_jql = f"project={jira_project_key}"
+        self.targets = list(targets)
+        self.queue_size = max(1, int(queue_size))
+        self.logger = logger
+        self.group_id = str(uuid.uuid4())
+        self.owner = None
+
+        self._lock = threading.Lock()
+        self._registered = {}
+        self._withdrawn = set()
+        self._queues = {}
+        self._closed = set()
+        self._started = False
+        self._errors = []
+
+    # ----------------------------------------------------------
+    # Registro de targets
+    # ----------------------------------------------------------
+    def source(
+        self,
+        *,
+        target_table: str,
+        scope_jql: str,
+        last_updated,
+        stats: dict,
+        fields: list | None,
+        expand_changelog: bool,
+        batch_size: int,
+        page_size=None,
+    ):
+        """
+        Registra el target y retorna el generador de sus páginas. La
+        primera página llega cuando arranca la descarga compartida.
+        """
+        with self._lock:
+            self._registered[target_table] = {
+                "scope_jql": scope_jql,
+                "last_updated": last_updated,
+                "stats": stats,
+                "fields": fields,
+                "expand_changelog": expand_changelog,
+                "batch_size": batch_size,
+                "page_size": page_size,
+            }
+            self._queues[target_table] = queue.Queue(maxsize=self.queue_size)
+        self._maybe_start()
+        return self._consume(target_table)
+
+    def withdraw(self, target_table: str):
+        """
+        El target terminó (bien o con error): deja de recibir páginas. Si
+        falló antes de registrarse, el grupo arranca sin él.
+        """
+        with self._lock:
+            if target_table in self._registered:
+                self._closed.add(target_table)
+            else:
+                self._withdrawn.add(target_table)
+        self._maybe_start()
+
+    def _maybe_start(self):
+        with self._lock:
+            if self._started:
+                return
+            if len(self._registered) + len(self._withdrawn) < len(self.targets):
+                return
+            self._started = True
+            if not self._registered:
+                return
+            self.owner = next(t for t in self.targets if t in self._registered)
+        threading.Thread(
+            target=propagate(self._broadcast),
+            name="fanout-fetch",
+            daemon=True,
+        ).start()
+
+    # ----------------------------------------------------------
+    # Consumo por target
+    # ----------------------------------------------------------
+    def _consume(self, target_table: str):
+        q = self._queues[target_table]
+        try:
+            while True:
+                try:
+                    item = q.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    break
+                yield item
+            if self._errors:
+                raise self._errors[0]
+        finally:
+            with self._lock:
+                self._closed.add(target_table)
+
+    def _put(self, target_table: str, item) -> bool:
+        q = self._queues[target_table]
+        while True:
+            with self._lock:
+                if target_table in self._closed:
+                    return False
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+
+    # ----------------------------------------------------------
+    # Descarga compartida
+    # ----------------------------------------------------------
+    def _union(self, targets: dict) -> tuple:
+        """(JQL de la unión, watermark más bajo o None si alguno es full load)."""
+        scopes = list(dict.fromkeys(t["scope_jql"] for t in targets.values()))
+        if len(scopes) == 1:
+            scope = scopes[0]
+        else:
+            scope = "(" + " OR ".join(f"({s})" for s in scopes) + ")"
+
+        watermarks = [t["last_updated"] for t in targets.values()]
+        lower = None if any(w is None for w in watermarks) else min(watermarks)
+        return scope, lower
+
+    def _updated_clause(self, jql: str, lower) -> str:
+        if lower is None:
+            return jql
+        return f'{jql} AND updated >= "{lower.strftime(JQL_DATETIME_FORMAT)}"'
+
+    def _members(self, target_table: str, target: dict, union_scope: str, stats: dict):
+        """Selector de los issues del target (None = recibe toda la unión)."""
+        if target["scope_jql"] == union_scope:
+            return None
+        keys = project_keys(target["scope_jql"])
+        if keys:
+            return _ProjectMembers(keys)
+        return _BoardMembers(self, target_table, target, stats)
+
+    def _broadcast(self):
+        with self._lock:
+            targets = dict(self._registered)
+        owner = targets[self.owner]
+        stats = new_api_stats()
+        member_stats = {name: new_api_stats() for name in targets}
+        try:
+            scope, lower = self._union(targets)
+            members = {
+                name: self._members(name, t, scope, member_stats[name])
+                for name, t in targets.items()
+            }
+
+            field_lists = [t["fields"] for t in targets.values()]
+            if any(not f or "*all" in f for f in field_lists):
+                fields = None
+            else:
+                fields = list(dict.fromkeys(f for fl in field_lists for f in fl))
+            expand_changelog = any(t["expand_changelog"] for t in targets.values())
+
+            jql = self._updated_clause(scope, lower) + " ORDER BY updated ASC"
+            self.logger.info(
+                "🔀 Fan-out fetch | targets=%d | owner=%s | JQL: %s",
+                len(targets),
+                self.owner,
+                jql,
+            )
+
+            generator = self.jira.fetch_issues_by_project(
+                project_key=self.jira_project_key,
+                jql=jql,
+                batch_size=owner["batch_size"],
+                stats=stats,
+                fields=fields,
+                expand_changelog=expand_changelog,
+                page_size=owner["page_size"],
+            )
+            try:
+                for page in generator:
+                    for name, target in targets.items():
+                        with self._lock:
+                            if name in self._closed:
+                                continue
+                        selected = page if members[name] is None else members[name].select(page)
+                        issues = [
+                            _project_issue(i, target["fields"], target["expand_changelog"])
+                            for i in selected
+                        ]
+                        if issues:
+                            self._put(name, IssuePage(issues))
+                    with self._lock:
+                        if len(self._closed) == len(targets):
+                            break
+            finally:
+                generator.close()
+        except BaseException as e:
+            self.logger.error("❌ fan-out fetch failed: %s", e)
+            self._errors.append(e)
+        finally:
+            merge_api_stats(owner["stats"], stats)
+            for name, target in targets.items():
+                merge_api_stats(target["stats"], member_stats[name])
+            for name in targets:
+                self._put(name, _END)
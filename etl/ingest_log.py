@@ -0,0 +1,235 @@
+# etl/ingest_log.py
+from datetime import datetime, timezone
+
+from google.cloud import bigquery
+
+from bq.client import ensure_table
+from bq.infra_cache import get_infra_cache, schema_fingerprint
+from bq.staging import load_rows
+from etl.merge import (
+    MERGE_KEY,
+    RAW_SCHEMA,
+    BatchBounds,
+    _merge_metrics_from_job,
+    _merge_sql,
+    _run_merge,
+)
+
+INGEST_LOG_SUFFIX = "__ingest_log"
+
+INGEST_LOG_COLUMNS = [
+    bigquery.SchemaField("execution_id", "STRING"),
+    bigquery.SchemaField("ingested_at", "TIMESTAMP"),
+]
+INGEST_LOG_SCHEMA = RAW_SCHEMA + INGEST_LOG_COLUMNS
+
+
+def ingest_log_table(full_table: str) -> str:
+    return f"{full_table}{INGEST_LOG_SUFFIX}"
+
+
+class LoadJobAppender:
+    """
+    Stand-in de la Storage Write API con la misma forma de uso
+    (append_rows / finalize): cada append es un load job WRITE_APPEND.
+
+    Las filas quedan visibles al terminar cada carga; la compactación
+    filtra por execution_id, así que no necesita el commit diferido de un
+    stream PENDING.
+    """
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        *,
+        schema=INGEST_LOG_SCHEMA,
+        staging_format: str = "avro",
+        stats: dict | None = None,
+    ):
+        self.client = client
+        self.table = table
+        self.schema = schema
+        self.staging_format = staging_format
+        self.stats = stats
+
+    def append_rows(self, rows):
+        load_rows(
+            self.client,
+            rows,
+            self.table,
+            schema=self.schema,
+            staging_format=self.staging_format,
+            stats=self.stats,
+        )
+
+    def finalize(self):
+        pass
+
+
+def _ensure_ingest_log(client, log_full: str, schema=INGEST_LOG_SCHEMA):
+    get_infra_cache().once(
+        f"{log_full}|{schema_fingerprint(schema, partition='ingested_at')}",
+        lambda: ensure_table(
+            client,
+            log_full,
+            schema,
+            partition_field="ingested_at",
+            partition_type="DAY",
+            clustering_fields=["execution_id", MERGE_KEY],
+        ),
+    )
+
+
+def _compaction_source(log_full: str, where: str) -> str:
+    return f"""(
+      SELECT * FROM `{log_full}`
+      WHERE {where}
+      QUALIFY ROW_NUMBER() OVER (
+        PARTITION BY {MERGE_KEY}
+        ORDER BY TIMESTAMP(fecha_actualizacion) DESC, ingested_at DESC
+      ) = 1
+    )"""
+
+
+def compact_ingest_log(client, full_table: str, schema=RAW_SCHEMA) -> dict:
+    """
+    Pliega todo el ingest log (restos de corridas que murieron antes de
+    compactar o descartar) en la tabla raw y lo vacía. El runner la
+    llama al empezar cada ejecución append_log (compact_log_leftovers).
+    Sin poda por rangos: el log puede traer filas de cualquier corrida.
+    """
+    log_full = ingest_log_table(full_table)
+    _ensure_ingest_log(client, log_full, list(schema) + INGEST_LOG_COLUMNS)
+
+    cutoff = datetime.now(timezone.utc)
+    params = [bigquery.ScalarQueryParameter("cutoff", "TIMESTAMP", cutoff)]
+    where = "ingested_at <= @cutoff"
+
+    count_job = client.query(
+        f"SELECT COUNT(DISTINCT {MERGE_KEY}) c FROM `{log_full}` WHERE {where}",
+        job_config=bigquery.QueryJobConfig(query_parameters=params),
+    )
+    staged = int(next(iter(count_job.result())).c)
+    if not staged:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    job = _run_merge(
+        client,
+        _merge_sql(full_table, _compaction_source(log_full, where), schema),
+        after_sql=f"DELETE FROM `{log_full}` WHERE {where};",
+        params=params,
+    )
+    return _merge_metrics_from_job(job, staged)
+
+
+class IngestLog:
+    """
+    Backend de ingesta append-only (merge_mode="append_log").
+
+    Cada página se agrega al ingest log `{tabla}__ingest_log` sin DML.
+    El MERGE contra la tabla raw corre en la compactación: cuando lo
+    pendiente de esta ejecución cruza compact_every_rows (0 = solo al
+    final) o al llamar flush(). El MERGE y el borrado de lo compactado
+    van en una misma transacción; el watermark lo guarda el runner después.
+
+    Mismo contrato que StagedMerger (add / flush / close / pending_rows).
+    """
+
+    def __init__(
+        self,
+        client,
+        project_id,
+        dataset_id,
+        table_id,
+        *,
+        execution_id: str,
+        compact_every_rows: int = 0,
+        prune_on_created: bool = False,
+        staging_format: str = "avro",
+        load_stats: dict | None = None,
+        appender=None,
+        before_merge=None,
+        schema=RAW_SCHEMA,
+    ):
+        self.client = client
+        self.full = f"{project_id}.{dataset_id}.{table_id}"
+        self.log_full = ingest_log_table(self.full)
+        self.execution_id = execution_id
+        self.compact_every_rows = compact_every_rows
+        self.prune_on_created = prune_on_created
+        self.before_merge = before_merge
+        self.schema = schema
+
+        log_schema = list(schema) + INGEST_LOG_COLUMNS
+        _ensure_ingest_log(client, self.log_full, log_schema)
+        self.appender = appender or LoadJobAppender(
+            client,
+            self.log_full,
+            schema=log_schema,
+            staging_format=staging_format,
+            stats=load_stats,
+        )
+
+        self._pending_ids = set()
+        self._bounds = BatchBounds()
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._pending_ids)
+
+    def add(self, rows) -> dict | None:
+        if not rows:
+            return None
+
+        ingested_at = datetime.now(timezone.utc)
+        self.appender.append_rows(
+            [{**r, "execution_id": self.execution_id, "ingested_at": ingested_at} for r in rows]
+        )
+        self._pending_ids.update(r[MERGE_KEY] for r in rows)
+        self._bounds.update(rows)
+
+        if self.compact_every_rows and self.pending_rows >= self.compact_every_rows:
+            return self.flush()
+        return None
+
+    def flush(self) -> dict | None:
+        if not self._pending_ids:
+            return None
+
+        self.appender.finalize()
+        if self.before_merge is not None:
+            self.before_merge()
+        params = [bigquery.ScalarQueryParameter("execution_id", "STRING", self.execution_id)]
+        where = "execution_id = @execution_id"
+
+        job = _run_merge(
+            self.client,
+            _merge_sql(
+                self.full,
+                _compaction_source(self.log_full, where),
+                self.schema,
+                prune=self._bounds.predicates(self.prune_on_created),
+            ),
+            after_sql=f"DELETE FROM `{self.log_full}` WHERE {where};",
+            params=params,
+        )
+
+        metrics = _merge_metrics_from_job(job, self.pending_rows, self._bounds)
+        self._pending_ids = set()
+        self._bounds = BatchBounds()
+        return metrics
+
+    def close(self):
+        """Si la corrida falló antes de compactar, descarta sus filas del log."""
+        if not self._pending_ids:
+            return
+        self.client.query(
+            f"DELETE FROM `{self.log_full}` WHERE execution_id = @execution_id",
+            job_config=bigquery.QueryJobConfig(
+                query_parameters=[
+                    bigquery.ScalarQueryParameter("execution_id", "STRING", self.execution_id),
+                ]
+            ),
+        ).result()
+        self._pending_ids = set()
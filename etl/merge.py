@@ -3,77 +3,375 @@ import time
 import uuid
 from google.cloud import bigquery
 
+from bq.client import query_with_retries
+from bq.staging import load_rows
+from core import telemetry
+
 RAW_SCHEMA = [
     bigquery.SchemaField("jira_id", "STRING"),
     bigquery.SchemaField("clave", "STRING"),
     bigquery.SchemaField("fecha_creacion", "TIMESTAMP"),
     bigquery.SchemaField("fecha_actualizacion", "TIMESTAMP"),
     bigquery.SchemaField("raw_json", "STRING"),
+    bigquery.SchemaField("hash_contenido", "STRING"),
 ]
 
-def merge_with_metrics(client, project_id, dataset_id, table_id, rows):
+MERGE_KEY = "jira_id"
+PARTITION_FIELD = "fecha_creacion"
+CLUSTERING_FIELDS = ["jira_id"]
+
+def _source_expr(field) -> str:
+    if field.field_type == "TIMESTAMP":
+        return f"TIMESTAMP(S.{field.name})"
+    return f"S.{field.name}"
+
+
+def _sql_string(value) -> str:
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+class BatchBounds:
+    """
+    Rango de jira_id y fecha_creacion de las filas que van al MERGE.
+
+    Se usa para agregar predicados constantes sobre T en el ON del MERGE,
+    de modo que BigQuery pode particiones (fecha_creacion) y bloques del
+    clustering (jira_id) en vez de escanear la tabla destino completa.
+    También guarda la fecha_actualizacion máxima (y su clave) para el
+    watermark de la tabla de estado.
+    """
+
+    def __init__(self):
+        self.min_id = None
+        self.max_id = None
+        self.min_created = None
+        self.max_created = None
+        self.created_complete = True
+        self.max_updated = None
+        self.max_updated_key = None
+
+    def update(self, rows):
+        for r in rows:
+            updated = r.get("fecha_actualizacion")
+            if updated is not None and (self.max_updated is None or updated > self.max_updated):
+                self.max_updated = updated
+                self.max_updated_key = r.get("clave")
+
+            key = r[MERGE_KEY]
+            if self.min_id is None or key < self.min_id:
+                self.min_id = key
+            if self.max_id is None or key > self.max_id:
+                self.max_id = key
+
+            created = r.get(PARTITION_FIELD)
+            if created is None:
+                self.created_complete = False
+                continue
+            if self.min_created is None or created < self.min_created:
+                self.min_created = created
+            if self.max_created is None or created > self.max_created:
+                self.max_created = created
+
+    def predicates(self, prune_on_created: bool) -> list:
+        """
+        Predicados sobre T. Solo se poda por fecha_creacion si todas las
+        filas la traen (un NULL no cae en ningún BETWEEN y el issue se
+        insertaría duplicado).
+        """
+        preds = []
+        if self.min_id is not None:
+            preds.append(
+                f"T.{MERGE_KEY} BETWEEN {_sql_string(self.min_id)} AND {_sql_string(self.max_id)}"
+            )
+        if prune_on_created and self.created_complete and self.min_created is not None:
+            preds.append(
+                f"T.{PARTITION_FIELD} BETWEEN TIMESTAMP({_sql_string(self.min_created)})"
+                f" AND TIMESTAMP({_sql_string(self.max_created)})"
+            )
+        return preds
+
+
+def _merge_sql(full: str, source: str, schema=RAW_SCHEMA, prune: list | None = None) -> str:
+    """
+    MERGE de staging → destino con columnas explícitas (la tabla destino
+    puede tener columnas agregadas por evolución de esquema en otro orden).
+
+    Un issue ya existente se actualiza si viene con fecha_actualizacion más
+    nueva, o con la misma fecha pero distinto hash_contenido. Comparar la
+    huella evita leer raw_json de la tabla destino. Filas antiguas sin hash
+    (NULL) se reescriben la próxima vez que llegan.
+
+    `prune` son predicados constantes sobre T (ver BatchBounds) que se
+    agregan al ON para podar particiones y clustering.
+    """
+    updates = ",\n                   ".join(
+        f"{f.name}={_source_expr(f)}" for f in schema if f.name != MERGE_KEY
+    )
+    columns = ", ".join(f.name for f in schema)
+    values = ", ".join(_source_expr(f) for f in schema)
+    on = " AND ".join([f"T.{MERGE_KEY} = S.{MERGE_KEY}", *(prune or [])])
+
+    return f"""
+      MERGE `{full}` T
+      USING {source} S
+      ON {on}
+      WHEN MATCHED AND (
+        TIMESTAMP(S.fecha_actualizacion) > T.fecha_actualizacion
+        OR (
+          TIMESTAMP(S.fecha_actualizacion) = T.fecha_actualizacion
+          AND (T.hash_contenido IS NULL OR S.hash_contenido != T.hash_contenido)
+        )
+      ) THEN
+        UPDATE SET {updates}
+      WHEN NOT MATCHED THEN
+        INSERT ({columns}) VALUES ({values})
+    """
+
+
+def _run_merge(
+    client,
+    merge_sql: str,
+    after_sql: str | None = None,
+    params: list | None = None,
+):
+    """
+    Ejecuta el MERGE y retorna el job con sus dml_stats.
+
+    Sin `after_sql` es un solo job DML: sus dml_stats se leen directo.
+    Con `after_sql` (p. ej. borrar lo compactado del ingest log) ambos
+    van en una transacción, y las dml_stats se leen del job hijo del
+    MERGE (una llamada extra a list_jobs, solo en ese caso).
+
+    El watermark no va aquí: lo guarda el runner después del MERGE con un
+    DML propio sobre la tabla de estado (ver WatermarkState.save), para
+    que boards en paralelo no abran transacciones sobre la misma tabla.
+
+    Los abortos por DML concurrente sobre la misma tabla se reintentan con
+    backoff; el staging no cambia, así que el reintento da lo mismo.
+    """
+    with telemetry.stage("merge", transactional=after_sql is not None) as span:
+        job_config = bigquery.QueryJobConfig(query_parameters=list(params or []))
+        if after_sql is None:
+            job, attempts = query_with_retries(client, merge_sql, job_config=job_config)
+            span.set("attempts", attempts)
+            return job
+
+        script = f"""
+          BEGIN TRANSACTION;
+          {merge_sql};
+          {after_sql}
+          COMMIT TRANSACTION;
+        """
+        job, attempts = query_with_retries(client, script, job_config=job_config)
+        span.set("attempts", attempts)
+
+        for child in client.list_jobs(parent_job=job.job_id):
+            if getattr(child, "statement_type", None) == "MERGE":
+                return child
+        raise RuntimeError(f"MERGE no encontrado en el script {job.job_id}")
+
+
+def _merge_metrics_from_job(job, staged_rows: int, bounds: BatchBounds | None = None) -> dict:
+    """
+    Deriva inserted/updated/unchanged de las estadísticas DML del MERGE.
+
+    Cada fila de staging (única por jira_id) termina en exactamente uno
+    de los tres casos, así que unchanged = staged - inserted - updated:
+    mismo resultado que los COUNT separados, sin volver a escanear la
+    tabla destino.
+
+    max_updated / max_updated_key (de bounds) son el candidato a
+    watermark que el runner guarda tras el MERGE.
+    """
+    dml = job.dml_stats
+    inserted = int(dml.inserted_row_count or 0)
+    updated = int(dml.updated_row_count or 0)
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": max(staged_rows - inserted - updated, 0),
+        "max_updated": bounds.max_updated if bounds is not None else None,
+        "max_updated_key": bounds.max_updated_key if bounds is not None else None,
+    }
+
+
+def merge_with_metrics(
+    client,
+    project_id,
+    dataset_id,
+    table_id,
+    rows,
+    *,
+    prune_on_created: bool = False,
+    staging_format: str = "avro",
+    load_stats: dict | None = None,
+    schema=RAW_SCHEMA,
+):
     if not rows:
-        return {"inserted": 0, "updated": 0, "unchanged": 0}
+        return {"inserted": 0, "updated": 0, "unchanged": 0, "max_updated": None, "max_updated_key": None}
 
     temp = f"{dataset_id}.tmp_{table_id}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
     full = f"{project_id}.{dataset_id}.{table_id}"
     temp_full = f"{project_id}.{temp}"
 
     try:
-        client.create_table(bigquery.Table(temp_full, schema=RAW_SCHEMA), exists_ok=True)
-        client.load_table_from_json(rows, temp_full).result()
-
-        inserted = next(client.query(f"""
-          SELECT COUNT(*) c FROM `{temp_full}` s
-          LEFT JOIN `{full}` t ON t.jira_id = s.jira_id
-          WHERE t.jira_id IS NULL
-        """).result()).c
-
-        updated = next(client.query(f"""
-          SELECT COUNT(*) c FROM `{temp_full}` s
-          JOIN `{full}` t ON t.jira_id = s.jira_id
-          WHERE
-            TIMESTAMP(s.fecha_actualizacion) > t.fecha_actualizacion
-            OR (
-              TIMESTAMP(s.fecha_actualizacion) = t.fecha_actualizacion
-              AND s.raw_json != t.raw_json
-            )
-        """).result()).c
-
-        unchanged = next(client.query(f"""
-          SELECT COUNT(*) c FROM `{temp_full}` s
-          JOIN `{full}` t ON t.jira_id = s.jira_id
-          WHERE
-            TIMESTAMP(s.fecha_actualizacion) < t.fecha_actualizacion
-            OR (
-              TIMESTAMP(s.fecha_actualizacion) = t.fecha_actualizacion
-              AND s.raw_json = t.raw_json
-            )
-        """).result()).c
-
-        client.query(f"""
-          MERGE `{full}` T
-          USING `{temp_full}` S
-          ON T.jira_id = S.jira_id
-          WHEN MATCHED AND (
-            TIMESTAMP(S.fecha_actualizacion) > T.fecha_actualizacion
-            OR (
-              TIMESTAMP(S.fecha_actualizacion) = T.fecha_actualizacion
-              AND S.raw_json != T.raw_json
-            )
-          ) THEN
-            UPDATE SET clave=S.clave,
-                       fecha_creacion=TIMESTAMP(S.fecha_creacion),
-                       fecha_actualizacion=TIMESTAMP(S.fecha_actualizacion),
-                       raw_json=S.raw_json
-          WHEN NOT MATCHED THEN
-            INSERT ROW
-        """).result()
-
-        return {
-            "inserted": int(inserted),
-            "updated": int(updated),
-            "unchanged": int(unchanged),
-        }
+        client.create_table(bigquery.Table(temp_full, schema=schema), exists_ok=True)
+        load_rows(
+            client,
+            rows,
+            temp_full,
+            schema=schema,
+            staging_format=staging_format,
+            stats=load_stats,
+        )
+
+        bounds = BatchBounds()
+        bounds.update(rows)
+        job = _run_merge(
+            client,
+            _merge_sql(full, f"`{temp_full}`", schema, prune=bounds.predicates(prune_on_created)),
+        )
+
+        return _merge_metrics_from_job(job, len(rows), bounds)
     finally:
         client.delete_table(temp_full, not_found_ok=True)
+
+
+def _estimate_row_bytes(row: dict) -> int:
+    return sum(
+        len(v) if isinstance(v, (bytes, str)) else len(str(v))
+        for v in row.values()
+        if v is not None
+    )
+
+
+class StagedMerger:
+    """
+    Merge por micro-batches con una sola tabla de staging por ejecución.
+
+    Cada página se carga (append) en la misma tabla tmp; el MERGE contra
+    la tabla destino corre solo cuando lo acumulado cruza max_rows o
+    max_bytes, o al llamar flush() al final del stream. Tras cada MERGE
+    la siguiente carga trunca el staging (WRITE_TRUNCATE), sin jobs extra.
+
+    Un mismo issue puede llegar en varias páginas: el MERGE toma la
+    versión con fecha_actualizacion más nueva de cada jira_id.
+
+    Los rangos de jira_id / fecha_creacion acumulados desde el último
+    MERGE se agregan al ON para podar la tabla destino.
+    """
+
+    def __init__(
+        self,
+        client,
+        project_id,
+        dataset_id,
+        table_id,
+        *,
+        run_id: str,
+        max_rows: int,
+        max_bytes: int,
+        prune_on_created: bool = False,
+        staging_format: str = "avro",
+        load_stats: dict | None = None,
+        before_merge=None,
+        schema=RAW_SCHEMA,
+    ):
+        self.client = client
+        self.full = f"{project_id}.{dataset_id}.{table_id}"
+        self.before_merge = before_merge
+        self.schema = schema
+        self.staging_full = (
+            f"{project_id}.{dataset_id}.tmp_{table_id}_{run_id}_{uuid.uuid4().hex[:8]}"
+        )
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.prune_on_created = prune_on_created
+        self.staging_format = staging_format
+        self.load_stats = load_stats
+
+        self._created = False
+        self._truncate_next = False
+        self._pending_ids = set()
+        self._pending_bytes = 0
+        self._bounds = BatchBounds()
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._pending_ids)
+
+    def _load(self, rows):
+        if not self._created:
+            self.client.create_table(
+                bigquery.Table(self.staging_full, schema=self.schema),
+                exists_ok=True,
+            )
+            self._created = True
+
+        write_disposition = (
+            bigquery.WriteDisposition.WRITE_TRUNCATE
+            if self._truncate_next
+            else bigquery.WriteDisposition.WRITE_APPEND
+        )
+        load_rows(
+            self.client,
+            rows,
+            self.staging_full,
+            schema=self.schema,
+            write_disposition=write_disposition,
+            staging_format=self.staging_format,
+            stats=self.load_stats,
+        )
+        self._truncate_next = False
+
+    def add(self, rows) -> dict | None:
+        """
+        Carga filas al staging. Retorna las métricas del MERGE si esta
+        carga cruzó el umbral, o None si solo se acumuló.
+        """
+        if not rows:
+            return None
+
+        self._load(rows)
+        self._pending_ids.update(r["jira_id"] for r in rows)
+        self._bounds.update(rows)
+        self._pending_bytes += sum(_estimate_row_bytes(r) for r in rows)
+
+        if self.pending_rows >= self.max_rows or self._pending_bytes >= self.max_bytes:
+            return self.flush()
+        return None
+
+    def flush(self) -> dict | None:
+        if not self._pending_ids:
+            return None
+
+        source = f"""(
+          SELECT * FROM `{self.staging_full}`
+          WHERE TRUE
+          QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY jira_id
+            ORDER BY TIMESTAMP(fecha_actualizacion) DESC
+          ) = 1
+        )"""
+        if self.before_merge is not None:
+            self.before_merge()
+        job = _run_merge(
+            self.client,
+            _merge_sql(
+                self.full,
+                source,
+                self.schema,
+                prune=self._bounds.predicates(self.prune_on_created),
+            ),
+        )
+
+        metrics = _merge_metrics_from_job(job, self.pending_rows, self._bounds)
+        self._pending_ids = set()
+        self._pending_bytes = 0
+        self._bounds = BatchBounds()
+        self._truncate_next = True
+        return metrics
+
+    def close(self):
+        if self._created:
+            self.client.delete_table(self.staging_full, not_found_ok=True)
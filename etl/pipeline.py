@@ -0,0 +1,108 @@
+# etl/pipeline.py
+import queue
+import threading
+
+from core.telemetry import propagate
+
+_END = object()
+_POLL_SECONDS = 0.2
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _END
+
+
+def run_pipeline(
+    *,
+    source,
+    transform,
+    sink,
+    queue_size: int,
+    logger,
+):
+    """
+    Ejecuta fetch → transform → merge como etapas concurrentes.
+
+    - source: iterable de páginas (p. ej. el generador de JiraClient),
+      consumido en un hilo propio.
+    - transform(page) → item: corre en un segundo hilo.
+    - sink(item): corre en el hilo que llama (merge a BigQuery).
+
+    Las etapas se conectan con colas acotadas (queue_size) para que un
+    productor rápido no acumule páginas en memoria. Si cualquier etapa
+    falla, se cancelan las demás y se relanza la primera excepción.
+    """
+    fetched = queue.Queue(maxsize=max(1, queue_size))
+    transformed = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    errors = []
+
+    def fail(stage: str, exc: BaseException):
+        if not errors:
+            logger.error("❌ pipeline stage %s failed: %s", stage, exc)
+            errors.append(exc)
+        stop.set()
+
+    def fetch_stage():
+        iterator = iter(source)
+        try:
+            for page in iterator:
+                if not _put(fetched, page, stop):
+                    break
+        except BaseException as e:
+            fail("fetch", e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            _put(fetched, _END, stop)
+
+    def transform_stage():
+        try:
+            while True:
+                page = _get(fetched, stop)
+                if page is _END:
+                    break
+                if not _put(transformed, transform(page), stop):
+                    break
+        except BaseException as e:
+            fail("transform", e)
+        finally:
+            _put(transformed, _END, stop)
+
+    threads = [
+        threading.Thread(target=propagate(fetch_stage), name="pipeline-fetch", daemon=True),
+        threading.Thread(target=propagate(transform_stage), name="pipeline-transform", daemon=True),
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = _get(transformed, stop)
+            if item is _END:
+                break
+            sink(item)
+    except BaseException as e:
+        fail("merge", e)
+    finally:
+        for t in threads:
+            t.join()
+
+    if errors:
+        raise errors[0]
@@ -1,21 +1,97 @@
 # etl/runner.py
 print(">>> etl/runner.py LOADED")
 
+import itertools
 import uuid
 from time import perf_counter
 from datetime import datetime, timezone
 
+import requests
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
 from etl.transform import transform_issue
-from etl.merge import RAW_SCHEMA, merge_with_metrics
+from etl.merge import (
+    CLUSTERING_FIELDS,
+    PARTITION_FIELD,
+    RAW_SCHEMA,
+    StagedMerger,
+    merge_with_metrics,
+)
+from etl.changelog import ChangelogMerger, transform_changelog
+from etl.ingest_log import IngestLog, compact_ingest_log
+from etl.board_resolver import BOARD_SCOPES
+from etl.typed_columns import backfill_typed_columns, resolve_typed_columns, typed_schema
 from etl.quality import validate_and_dedupe_rows
-from bq.client import ensure_dataset, ensure_table, count_rows
+from etl.pipeline import run_pipeline
+from etl.backfill import (
+    WINDOWS_PER_SHARD,
+    build_time_windows,
+    fetch_sharded,
+    merge_api_stats,
+    new_api_stats,
+    window_jql,
+)
+from core import telemetry
+from core.jira_client import board_scope_jql, effective_fields
+from core.page_sizer import AdaptivePageSize
+from bq.client import (
+    count_rows,
+    ensure_dataset,
+    ensure_table,
+    ensure_table_layout,
+    truncate_table,
+)
 from bq.utils import get_max_updated_at
-from metadata.summary import ensure_summary_table, SUMMARY_TABLE_ID
+from bq.infra_cache import get_infra_cache, schema_fingerprint
+from metadata.summary import SUMMARY_SCHEMA, SUMMARY_TABLE_ID, ensure_summary_table
+from metadata.state import (
+    STATE_SCHEMA,
+    STATE_TABLE_ID,
+    WatermarkState,
+    clear_checkpoint,
+    delete_state,
+    ensure_state_table,
+    get_state,
+    load_checkpoint,
+)
+
+
+# Contadores que se guardan en el checkpoint: solo lo ya mergeado, para
+# que una ejecución reanudada los sume sin contar dos veces.
+CHECKPOINT_COUNTERS = (
+    "rows_received",
+    "rows_processed",
+    "rows_invalid",
+    "rows_null_jira_id",
+    "rows_null_fecha_actualizacion",
+    "rows_duplicate_jira_id",
+    "rows_inserted",
+    "rows_updated",
+    "rows_unchanged",
+    "batches",
+    "merges",
+    "changelog_rows",
+    "changelog_inserted",
+)
 
 
 # ==========================================================
 # 🧠 Utils
 # ==========================================================
+def peak_rss_mb() -> float | None:
+    """
+    RSS máximo del proceso en MB (Linux: ru_maxrss viene en KB).
+    None donde no existe el módulo resource (Windows).
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
 def format_jira_datetime_for_jql(dt: datetime) -> str:
     """
     EXACTAMENTE el formato que Jira acepta y que el script funcional usa:
@@ -24,6 +100,80 @@ def format_jira_datetime_for_jql(dt: datetime) -> str:
     return dt.strftime("%Y-%m-%d %H:%M")
 
 
+def _transform_batch(
+    issues,
+    metrics,
+    logger,
+    *,
+    typed_columns=(),
+    changelog_jira=None,
+    changelog_stats=None,
+):
+    """
+    Transforma y valida una página de Jira.
+    Retorna (n° de batch, filas válidas, stats de calidad, filas de
+    changelog). Las filas de changelog solo se arman si se pasan
+    changelog_stats (con changelog_jira se completan los changelogs
+    truncados).
+    """
+    metrics["batches"] += 1
+    batch_no = metrics["batches"]
+
+    logger.info(
+        "📦 Batch %d received | issues=%d",
+        batch_no,
+        len(issues),
+    )
+
+    with telemetry.stage("transform", batch=batch_no, issues=len(issues)):
+        raw_rows = [transform_issue(i, typed_columns) for i in issues]
+    metrics["rows_received"] += len(raw_rows)
+
+    with telemetry.stage("validate", batch=batch_no):
+        rows, quality = validate_and_dedupe_rows(raw_rows)
+
+    metrics["rows_invalid"] += quality["rows_invalid"]
+    metrics["rows_null_jira_id"] += quality["rows_null_jira_id"]
+    metrics["rows_null_fecha_actualizacion"] += quality["rows_null_fecha_actualizacion"]
+    metrics["rows_duplicate_jira_id"] += quality["rows_duplicate_jira_id"]
+    metrics["rows_processed"] += quality["rows_valid"]
+
+    changelog_rows = []
+    if changelog_stats is not None:
+        with telemetry.stage("changelog", batch=batch_no):
+            changelog_rows = transform_changelog(issues, jira=changelog_jira, stats=changelog_stats)
+        metrics["changelog_rows"] += len(changelog_rows)
+
+    return batch_no, rows, quality, changelog_rows
+
+
+def _is_rejected_cursor(error: requests.HTTPError) -> bool:
+    """4xx de Jira (salvo 429, que ya se reintenta): el cursor guardado no sirve."""
+    status = error.response.status_code if error.response is not None else None
+    return status is not None and 400 <= status < 500 and status != 429
+
+
+def _batch_counts(quality: dict, changelog_rows: list) -> dict:
+    """Contadores de CHECKPOINT_COUNTERS que aporta un batch transformado."""
+    return {
+        "batches": 1,
+        "rows_received": quality["rows_received"],
+        "rows_processed": quality["rows_valid"],
+        "rows_invalid": quality["rows_invalid"],
+        "rows_null_jira_id": quality["rows_null_jira_id"],
+        "rows_null_fecha_actualizacion": quality["rows_null_fecha_actualizacion"],
+        "rows_duplicate_jira_id": quality["rows_duplicate_jira_id"],
+        "changelog_rows": len(changelog_rows),
+    }
+
+
+def _accumulate_merge(metrics, merge_metrics):
+    metrics["merges"] += 1
+    metrics["rows_inserted"] += merge_metrics["inserted"]
+    metrics["rows_updated"] += merge_metrics["updated"]
+    metrics["rows_unchanged"] += merge_metrics["unchanged"]
+
+
 # ==========================================================
 # 🚀 MAIN ETL
 # ==========================================================
@@ -41,6 +191,34 @@ def run_board(
     bq_dataset_id: str,
     logger,
     summary_writer,
+    pipelined: bool = False,
+    pipeline_queue_size: int = 2,
+    merge_mode: str = "per_batch",
+    merge_max_rows: int = 5000,
+    merge_max_bytes: int = 200 * 1024 * 1024,
+    log_compact_every_rows: int = 0,
+    compact_log_leftovers: bool = True,
+    backfill_shards: int = 1,
+    backfill_shard_field: str = "created",
+    jira_fields: list | None = None,
+    expand_changelog: bool = True,
+    batch_size: int = 100,
+    adaptive_batch_size: bool = True,
+    batch_size_min: int = 10,
+    batch_size_max: int = 1000,
+    raw_partition_field: str | None = PARTITION_FIELD,
+    raw_partition_type: str = "MONTH",
+    raw_clustering_fields: list | None = None,
+    migrate_raw_layout: bool = False,
+    staging_format: str = "avro",
+    changelog_table: bool = False,
+    typed_columns=None,
+    field_catalog=None,
+    resume: bool = False,
+    board_scope: str = "filter",
+    board_scope_migrate: bool = False,
+    board_jql: str | None = None,
+    fanout=None,
 ):
     print(">>> run_board() ENTERED PROJECT")
 
@@ -59,19 +237,51 @@ def run_board(
         "rows_updated": 0,
         "rows_unchanged": 0,
         "batches": 0,
+        "merges": 0,
         "api_requests": 0,
         "rate_limit_events": 0,
         "rate_limit_wait_seconds": 0.0,
+        "rate_limit_wait_proactive_seconds": 0.0,
+        "rate_limit_wait_reactive_seconds": 0.0,
         "api_retries_total": 0,
         "api_5xx_events": 0,
         "fallback_to_search_used": 0,
+        "api_bytes_wire": 0,
+        "api_bytes_decoded": 0,
+        "page_peak_buffer_bytes": 0,
+        "staging_encode_seconds": 0.0,
+        "staging_load_bytes": 0,
+        "changelog_rows": 0,
+        "changelog_inserted": 0,
     }
+    # Lo ya mergeado (CHECKPOINT_COUNTERS): en modo pipelined metrics
+    # incluye batches transformados que aún no llegan al MERGE.
+    merged = dict.fromkeys(CHECKPOINT_COUNTERS, 0)
+
+    # Tiempos por etapa (Jira, transform, staging, MERGE): los registran
+    # los módulos del hot path en el recorder activo de este contexto.
+    stages = telemetry.StageRecorder(execution_id=exec_id, run_id=run_id, target_table=target_table)
+    stages_token = telemetry.activate(stages)
 
     status = "SUCCESS"
     error_message = None
     total_rows = None
     jql = None
     last_updated = None
+    merger = None
+    changelog_merger = None
+    changelog_stats = new_api_stats()
+    raw_full = None
+    sharded_backfill = False
+    checkpoint = None
+
+    page_size = AdaptivePageSize(
+        initial=batch_size,
+        min_size=batch_size_min,
+        max_size=batch_size_max,
+        timeout_seconds=jira.timeout[1],
+        adaptive=adaptive_batch_size,
+    )
 
     try:
         # ------------------------------------------------------
@@ -79,25 +289,178 @@ def run_board(
         # ------------------------------------------------------
         logger.info("🏗 Ensuring dataset & tables")
 
-        ensure_dataset(bq_client, bq_project_id, bq_dataset_id)
+        # Cada objeto se verifica a lo más una vez por proceso (o por TTL
+        # con cache en disco); la clave incluye la huella del esquema.
+        infra = get_infra_cache()
+        dataset_ref = f"{bq_project_id}.{bq_dataset_id}"
+        infra.once(
+            f"{dataset_ref}|dataset",
+            lambda: ensure_dataset(bq_client, bq_project_id, bq_dataset_id),
+        )
+
+        summary_full = f"{dataset_ref}.{SUMMARY_TABLE_ID}"
+        infra.once(
+            f"{summary_full}|{schema_fingerprint(SUMMARY_SCHEMA)}",
+            lambda: ensure_summary_table(bq_client, summary_full),
+        )
+
+        state_full = f"{dataset_ref}.{STATE_TABLE_ID}"
+        infra.once(
+            f"{state_full}|{schema_fingerprint(STATE_SCHEMA)}",
+            lambda: ensure_state_table(bq_client, state_full),
+        )
+        watermark_state = WatermarkState(state_full, target_table=target_table, run_id=run_id)
+
+        # Columnas tipadas: ids de campos custom resueltos con el catálogo
+        # cacheado; el esquema raw crece con ellas (evolución de esquema).
+        typed = resolve_typed_columns(
+            typed_columns,
+            catalog=field_catalog,
+            jira=jira,
+            stats=metrics,
+            logger=logger,
+        )
+        raw_schema = RAW_SCHEMA + typed_schema(typed)
+        if jira_fields:
+            jira_fields = list(jira_fields) + [
+                c.field_id for c in typed if c.field_id not in jira_fields
+            ]
+
+        raw_full = f"{dataset_ref}.{target_table}"
+        clustering_fields = raw_clustering_fields or CLUSTERING_FIELDS
+        prune_on_created = raw_partition_field == PARTITION_FIELD
+
+        def ensure_raw_table():
+            added_columns = ensure_table(
+                bq_client,
+                raw_full,
+                raw_schema,
+                partition_field=raw_partition_field,
+                partition_type=raw_partition_type,
+                clustering_fields=clustering_fields,
+            )
+            ensure_table_layout(
+                bq_client,
+                raw_full,
+                partition_field=raw_partition_field,
+                partition_type=raw_partition_type,
+                clustering_fields=clustering_fields,
+                migrate=migrate_raw_layout,
+                logger=logger,
+            )
+            return added_columns
+
+        raw_key = schema_fingerprint(
+            raw_schema,
+            partition_field=raw_partition_field,
+            partition_type=raw_partition_type,
+            clustering_fields=clustering_fields,
+            migrate=migrate_raw_layout,
+        )
+        added_columns = infra.once(f"{raw_full}|{raw_key}", ensure_raw_table) or []
 
-        summary_full = f"{bq_project_id}.{bq_dataset_id}.{SUMMARY_TABLE_ID}"
-        ensure_summary_table(bq_client, summary_full)
+        # Columnas tipadas nuevas en una tabla con datos: se completan una
+        # vez desde raw_json (el MERGE solo las llena al editarse el issue).
+        typed_added = [c for c in typed if c.name in added_columns]
+        if typed_added:
+            backfilled = backfill_typed_columns(bq_client, raw_full, typed_added)
+            logger.info(
+                "🧮 Columnas tipadas backfilled | %s | rows=%d",
+                ", ".join(c.name for c in typed_added),
+                backfilled,
+            )
 
-        raw_full = f"{bq_project_id}.{bq_dataset_id}.{target_table}"
-        ensure_table(bq_client, raw_full, RAW_SCHEMA)
+        logger.info("🏗 Infra cache | hits=%d | misses=%d", infra.hits, infra.misses)
 
         # ------------------------------------------------------
         # 🕒 Construcción JQL (idéntica al script funcional)
         # ------------------------------------------------------
-        last_updated = get_max_updated_at(bq_client, raw_full)
+        state = get_state(bq_client, state_full, target_table)
+        if state is not None and state.get("backfill_execution_id"):
+            # Backfill por shards que murió sin pasar por el rollback
+            # (proceso terminado): la tabla quedó con huecos por ventana.
+            logger.warning(
+                "↩️ Backfill por shards inconcluso (execution_id=%s): se vacía %s y se repite el full load",
+                state["backfill_execution_id"],
+                raw_full,
+            )
+            truncate_table(bq_client, raw_full)
+            delete_state(bq_client, state_full, target_table)
+            state = None
+
+        if state is not None:
+            last_updated = state["watermark"]
+            logger.info("🧭 Watermark desde estado | cursor=%s", state["last_cursor"])
+        else:
+            # Primera ejecución con tabla de estado: se siembra una sola vez
+            # desde la tabla raw (único MAX que escanea la tabla).
+            with telemetry.stage("state", op="seed_watermark", table=raw_full):
+                last_updated = get_max_updated_at(bq_client, raw_full)
+            if last_updated:
+                watermark_state.save(bq_client, last_updated)
+                logger.info("🧭 Estado sembrado desde %s", raw_full)
+
+        # ------------------------------------------------------
+        # 🎯 Alcance: proyecto completo o issues del board
+        # ------------------------------------------------------
+        # Con board_scope=filter cada board trae solo los issues de su
+        # filtro guardado (resuelto una vez por proceso), no el proyecto.
+        if board_scope not in BOARD_SCOPES:
+            raise ValueError(f"board_scope inválido: {board_scope}")
+
+        project_jql = f"project={jira_project_key}"
+        scope_jql = project_jql
+        if jira_board_id is not None and board_scope == "filter":
+            if board_jql:
+                board_jql = board_scope_jql(board_jql)
+            else:
+                board_jql = jira.fetch_board_jql(board_id=jira_board_id, stats=metrics)
+            if board_jql:
+                scope_jql = board_jql
+            else:
+                logger.warning("⚠️ Board %s: el filtro no restringe issues; se usa el proyecto", jira_board_id)
+        logger.info("🎯 Scope | board=%s | %s", jira_board_id, scope_jql)
+
+        # Alcance con que se cargó la tabla. Sin registro pero con datos es
+        # una tabla de antes de board_scope=filter: se cargó con el proyecto.
+        loaded_scope = (state or {}).get("scope_jql") or (project_jql if last_updated else None)
+        if loaded_scope is not None and loaded_scope != scope_jql:
+            if board_scope_migrate:
+                # Full load solo con el alcance actual.
+                logger.warning(
+                    "🚚 Scope cambió (%s → %s): se vacía %s para recargarla completa",
+                    loaded_scope,
+                    scope_jql,
+                    raw_full,
+                )
+                truncate_table(bq_client, raw_full)
+                delete_state(bq_client, state_full, target_table)
+                state = None
+                last_updated = None
+            elif loaded_scope == project_jql:
+                # Un filtro sobre una tabla con el proyecto completo dejaría
+                # ahí los issues de fuera del board: se mantiene el proyecto.
+                logger.warning(
+                    "⚠️ %s se cargó con el proyecto completo; se mantiene ese alcance "
+                    "(board_scope_migrate=true la recarga solo con el board)",
+                    raw_full,
+                )
+                scope_jql = project_jql
+            else:
+                logger.warning(
+                    "⚠️ Scope distinto al de la carga anterior (%s); los issues fuera del "
+                    "alcance actual quedan en %s (board_scope_migrate=true la recarga)",
+                    loaded_scope,
+                    raw_full,
+                )
+        watermark_state.scope_jql = scope_jql
 
         if last_updated:
             last_updated = last_updated.replace(second=0, microsecond=0)
             jira_dt = format_jira_datetime_for_jql(last_updated)
 
             jql = (
-                f'project={jira_project_key} '
+                f'{scope_jql} '
                 f'AND updated >= "{jira_dt}" '
                 f'ORDER BY updated ASC'
             )
@@ -106,9 +469,26 @@ def run_board(
             logger.info("🧠 last_updated_raw = %s", last_updated)
             logger.info("🧠 jira_dt_for_jql = %s", jira_dt)
         else:
-            jql = f"project={jira_project_key} ORDER BY updated ASC"
+            jql = f"{scope_jql} ORDER BY updated ASC"
             logger.info("🆕 Full load (no previous data)")
 
+        # ------------------------------------------------------
+        # ⏯ Reanudación desde checkpoint
+        # ------------------------------------------------------
+        # Si la ejecución anterior cayó a mitad de camino, se retoma la
+        # misma JQL desde la página siguiente a la última ya mergeada.
+        watermark_jql = jql
+        checkpoint = load_checkpoint(state) if resume and fanout is None else None
+        if checkpoint is not None:
+            jql = checkpoint["jql"]
+            logger.info(
+                "⏯ Resuming | execution_id=%s | cursor=%s | last_key=%s | last_updated=%s",
+                checkpoint["execution_id"],
+                checkpoint["cursor"],
+                checkpoint["last_key"],
+                checkpoint["last_updated"],
+            )
+
         logger.info("🔎 JQL FINAL → %s", jql)
 
         # ------------------------------------------------------
@@ -116,56 +496,296 @@ def run_board(
         # ------------------------------------------------------
         logger.info(
             "🚀 Calling JiraClient.fetch_issues_by_project | "
-            "project_key=%s | batch_size=%s",
+            "project_key=%s | batch_size=%s | adaptive=%s [%d..%d]",
             jira_project_key,
-            100,
+            page_size.current,
+            adaptive_batch_size,
+            page_size.min_size,
+            page_size.max_size,
         )
 
-        issue_generator = jira.fetch_issues_by_project(
-            project_key=jira_project_key,   # 🔥 CLAVE
-            jql=jql,
-            batch_size=100,
-            stats=metrics,
-        )
+        def fetch_pages(resume_cursor=None):
+            return jira.fetch_issues_by_project(
+                project_key=jira_project_key,   # 🔥 CLAVE
+                jql=jql,
+                batch_size=page_size.current,
+                stats=metrics,
+                fields=jira_fields,
+                expand_changelog=expand_changelog,
+                page_size=page_size,
+                resume_cursor=resume_cursor,
+            )
 
-        # ------------------------------------------------------
-        # 🔁 Loop batches
-        # ------------------------------------------------------
-        for issues in issue_generator:
-            metrics["batches"] += 1
+        if fanout is not None:
+            # --------------------------------------------------
+            # 🔀 Descarga compartida con los demás targets
+            # --------------------------------------------------
+            issue_generator = fanout.source(
+                target_table=target_table,
+                scope_jql=scope_jql,
+                last_updated=last_updated,
+                stats=metrics,
+                fields=jira_fields,
+                expand_changelog=expand_changelog,
+                batch_size=page_size.current,
+                page_size=page_size,
+            )
+        elif checkpoint is not None:
+            issue_generator = fetch_pages(resume_cursor=checkpoint["cursor"])
+            try:
+                # La primera página se pide ya: si Jira rechaza el cursor
+                # (token vencido, startAt fuera de rango) el checkpoint no
+                # sirve, y sin borrarlo todo resume posterior fallaría igual.
+                first_page = next(issue_generator, None)
+            except requests.HTTPError as e:
+                if not _is_rejected_cursor(e):
+                    raise
+                logger.warning(
+                    "⏯ Checkpoint rechazado por Jira (status=%s); se descarta y se sigue desde el watermark",
+                    e.response.status_code,
+                )
+                clear_checkpoint(bq_client, state_full, target_table)
+                checkpoint = None
+                jql = watermark_jql
+                logger.info("🔎 JQL FINAL → %s", jql)
+                issue_generator = fetch_pages()
+            else:
+                issue_generator = itertools.chain(
+                    [first_page] if first_page is not None else [],
+                    issue_generator,
+                )
+                for key in CHECKPOINT_COUNTERS:
+                    value = checkpoint["metrics"].get(key)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        metrics[key] += value
+                        merged[key] += value
+        elif last_updated is None and backfill_shards > 1:
+            # --------------------------------------------------
+            # 🧩 Full load en ventanas de tiempo paralelas
+            # --------------------------------------------------
+            base_jql = scope_jql
+            lower, upper = jira.fetch_field_bounds(
+                jql=base_jql,
+                field=backfill_shard_field,
+                stats=metrics,
+            )
+            windows = build_time_windows(
+                lower,
+                upper,
+                backfill_shards * WINDOWS_PER_SHARD,
+            )
+            shard_jqls = [
+                window_jql(base_jql, backfill_shard_field, lo, up)
+                for lo, up in windows
+            ]
+            jql = "\n".join(shard_jqls)
+            sharded_backfill = True
+
+            # Las ventanas son por created: el máximo updated llega casi
+            # al empezar. El watermark se escribe una vez, al terminar
+            # todas; mientras tanto el estado marca el backfill en curso.
+            watermark_state.backfill = exec_id
+            watermark_state.save(bq_client, None)
 
             logger.info(
-                "📦 Batch %d received | issues=%d",
-                metrics["batches"],
-                len(issues),
+                "🧩 Sharded backfill | field=%s | windows=%d | workers=%d | range=%s → %s",
+                backfill_shard_field,
+                len(shard_jqls),
+                backfill_shards,
+                lower,
+                upper,
             )
 
-            raw_rows = [transform_issue(i) for i in issues]
-            metrics["rows_received"] += len(raw_rows)
-
-            rows, quality = validate_and_dedupe_rows(raw_rows)
-
-            metrics["rows_invalid"] += quality["rows_invalid"]
-            metrics["rows_null_jira_id"] += quality["rows_null_jira_id"]
-            metrics["rows_null_fecha_actualizacion"] += quality["rows_null_fecha_actualizacion"]
-            metrics["rows_duplicate_jira_id"] += quality["rows_duplicate_jira_id"]
-            metrics["rows_processed"] += quality["rows_valid"]
+            issue_generator = fetch_sharded(
+                jira=jira,
+                project_key=jira_project_key,
+                jqls=shard_jqls,
+                batch_size=page_size.current,
+                page_size=page_size,
+                stats=metrics,
+                max_workers=backfill_shards,
+                logger=logger,
+                fields=jira_fields,
+                expand_changelog=expand_changelog,
+            )
+        else:
+            issue_generator = fetch_pages()
 
-            merge_metrics = merge_with_metrics(
+        # ------------------------------------------------------
+        # 🔁 Loop batches
+        # ------------------------------------------------------
+        if changelog_table and not expand_changelog:
+            logger.warning("⚠️ changelog_table requiere expand_changelog=true; se omite")
+        elif changelog_table:
+            changelog_merger = ChangelogMerger(
                 bq_client,
                 bq_project_id,
                 bq_dataset_id,
                 target_table,
-                rows,
+                max_rows=merge_max_rows,
+                staging_format=staging_format,
+                load_stats=metrics,
+            )
+            logger.info("🪵 Changelog table | %s", changelog_merger.full)
+
+        def transform_stage(issues):
+            # El cursor de la página viaja con el batch hasta el MERGE.
+            cursor = getattr(issues, "cursor", None)
+            if changelog_merger is None:
+                return _transform_batch(issues, metrics, logger, typed_columns=typed) + (cursor,)
+            return _transform_batch(
+                issues,
+                metrics,
+                logger,
+                typed_columns=typed,
+                changelog_jira=jira,
+                changelog_stats=changelog_stats,
+            ) + (cursor,)
+
+        def flush_changelog():
+            # Corre antes de cada MERGE raw: el watermark no debe avanzar
+            # sobre issues cuyo changelog aún no está cargado.
+            if changelog_merger is None:
+                return
+            cm = changelog_merger.flush()
+            if cm is not None:
+                metrics["changelog_inserted"] += cm["inserted"]
+                merged["changelog_inserted"] += cm["inserted"]
+                logger.info("🪵 Changelog merged | inserted=%d", cm["inserted"])
+
+        if merge_mode == "staged":
+            merger = StagedMerger(
+                bq_client,
+                bq_project_id,
+                bq_dataset_id,
+                target_table,
+                run_id=run_id,
+                max_rows=merge_max_rows,
+                max_bytes=merge_max_bytes,
+                prune_on_created=prune_on_created,
+                staging_format=staging_format,
+                load_stats=metrics,
+                before_merge=flush_changelog,
+                schema=raw_schema,
+            )
+            logger.info(
+                "🧺 Staged merge mode | staging=%s | max_rows=%d | max_bytes=%d",
+                merger.staging_full,
+                merge_max_rows,
+                merge_max_bytes,
+            )
+        elif merge_mode == "append_log":
+            merger = IngestLog(
+                bq_client,
+                bq_project_id,
+                bq_dataset_id,
+                target_table,
+                execution_id=exec_id,
+                compact_every_rows=log_compact_every_rows,
+                prune_on_created=prune_on_created,
+                staging_format=staging_format,
+                load_stats=metrics,
+                before_merge=flush_changelog,
+                schema=raw_schema,
+            )
+            logger.info(
+                "📜 Append-log mode | log=%s | compact_every_rows=%d",
+                merger.log_full,
+                log_compact_every_rows,
             )
 
-            metrics["rows_inserted"] += merge_metrics["inserted"]
-            metrics["rows_updated"] += merge_metrics["updated"]
-            metrics["rows_unchanged"] += merge_metrics["unchanged"]
+            # Filas que dejó en el log una corrida que murió sin compactar
+            # ni descartar (proceso terminado): se pliegan antes de empezar.
+            if compact_log_leftovers:
+                leftovers = compact_ingest_log(bq_client, raw_full, raw_schema)
+                if leftovers["inserted"] or leftovers["updated"] or leftovers["unchanged"]:
+                    logger.warning(
+                        "📜 Ingest log leftovers compacted | inserted=%d | updated=%d | unchanged=%d",
+                        leftovers["inserted"],
+                        leftovers["updated"],
+                        leftovers["unchanged"],
+                    )
+
+        backfill_watermark = {"max_updated": None, "max_updated_key": None}
+
+        def save_state(merge_metrics):
+            # Watermark y checkpoint en un DML propio, después del MERGE:
+            # el checkpoint lleva solo los contadores ya mergeados.
+            # Sin filas mergeadas no hay nada que avanzar.
+            if merge_metrics["max_updated"] is None:
+                return
+            if sharded_backfill:
+                # Se guarda al terminar todos los shards.
+                latest = backfill_watermark["max_updated"]
+                if latest is None or merge_metrics["max_updated"] > latest:
+                    backfill_watermark["max_updated"] = merge_metrics["max_updated"]
+                    backfill_watermark["max_updated_key"] = merge_metrics["max_updated_key"]
+                return
+            if watermark_state.checkpoint is not None:
+                watermark_state.checkpoint["metrics"] = dict(merged)
+            watermark_state.save(
+                bq_client,
+                merge_metrics["max_updated"],
+                merge_metrics["max_updated_key"],
+            )
+
+        def merge_stage(item):
+            batch_no, rows, quality, changelog_rows, cursor = item
+
+            # Este batch entra en el próximo MERGE (los mergers
+            # acumulativos incluyen todo hasta aquí).
+            for key, value in _batch_counts(quality, changelog_rows).items():
+                merged[key] += value
+
+            # Checkpoint que se guarda tras el próximo MERGE.
+            # El backfill por shards no es reanudable: hace rollback.
+            if cursor is not None and not sharded_backfill:
+                watermark_state.checkpoint = {
+                    "execution_id": exec_id,
+                    "jql": jql,
+                    "cursor": cursor,
+                    "last_key": rows[-1]["clave"] if rows else None,
+                    "last_updated": rows[-1]["fecha_actualizacion"] if rows else None,
+                }
+
+            if changelog_merger is not None:
+                cm = changelog_merger.add(changelog_rows)
+                if cm is not None:
+                    metrics["changelog_inserted"] += cm["inserted"]
+                    merged["changelog_inserted"] += cm["inserted"]
+
+            if merger is not None:
+                merge_metrics = merger.add(rows)
+                if merge_metrics is None:
+                    logger.info(
+                        "📥 Batch %d staged | pending=%d | valid=%d | invalid=%d",
+                        batch_no,
+                        merger.pending_rows,
+                        quality["rows_valid"],
+                        quality["rows_invalid"],
+                    )
+                    return
+            else:
+                flush_changelog()
+                merge_metrics = merge_with_metrics(
+                    bq_client,
+                    bq_project_id,
+                    bq_dataset_id,
+                    target_table,
+                    rows,
+                    prune_on_created=prune_on_created,
+                    staging_format=staging_format,
+                    load_stats=metrics,
+                    schema=raw_schema,
+                )
+
+            _accumulate_merge(metrics, merge_metrics)
+            _accumulate_merge(merged, merge_metrics)
+            save_state(merge_metrics)
 
             logger.info(
                 "✅ Batch %d merged | inserted=%d | updated=%d | unchanged=%d | valid=%d | invalid=%d",
-                metrics["batches"],
+                batch_no,
                 merge_metrics["inserted"],
                 merge_metrics["updated"],
                 merge_metrics["unchanged"],
@@ -173,6 +793,47 @@ def run_board(
                 quality["rows_invalid"],
             )
 
+        if pipelined:
+            logger.info(
+                "🧵 Pipelined mode | queue_size=%d",
+                pipeline_queue_size,
+            )
+            run_pipeline(
+                source=issue_generator,
+                transform=transform_stage,
+                sink=merge_stage,
+                queue_size=pipeline_queue_size,
+                logger=logger,
+            )
+        else:
+            for issues in issue_generator:
+                merge_stage(transform_stage(issues))
+
+        if merger is not None:
+            merge_metrics = merger.flush()
+            if merge_metrics is not None:
+                _accumulate_merge(metrics, merge_metrics)
+                _accumulate_merge(merged, merge_metrics)
+                save_state(merge_metrics)
+                logger.info(
+                    "✅ Final staged merge | inserted=%d | updated=%d | unchanged=%d",
+                    merge_metrics["inserted"],
+                    merge_metrics["updated"],
+                    merge_metrics["unchanged"],
+                )
+        flush_changelog()
+
+        if sharded_backfill:
+            watermark_state.backfill = None
+            watermark_state.save(
+                bq_client,
+                backfill_watermark["max_updated"],
+                backfill_watermark["max_updated_key"],
+            )
+
+        # Ejecución completa: el próximo run no debe reanudar.
+        clear_checkpoint(bq_client, state_full, target_table)
+
         total_rows = count_rows(bq_client, raw_full)
 
     except Exception as e:
@@ -180,6 +841,35 @@ def run_board(
         error_message = str(e)
         logger.exception("❌ run_board FAILED")
 
+        # Si el error vino de un objeto que desapareció desde que se
+        # cacheó, el próximo board debe verificarlo de nuevo.
+        if raw_full is not None:
+            get_infra_cache().invalidate(f"{raw_full}|")
+
+        # Un backfill por shards no avanza en orden de updated: si queda a
+        # medias, el watermark escondería huecos en la próxima corrida
+        # incremental. La tabla estaba vacía al empezar, así que se vacía
+        # de nuevo (y se borra el estado) para que el próximo run repita
+        # el full load.
+        if sharded_backfill:
+            try:
+                logger.warning("↩️ Rolling back sharded backfill on %s", raw_full)
+                truncate_table(bq_client, raw_full)
+                delete_state(bq_client, state_full, target_table)
+            except Exception:
+                logger.exception("⚠️ No se pudo revertir el backfill por shards")
+
+    finally:
+        if fanout is not None:
+            fanout.withdraw(target_table)
+        telemetry.deactivate(stages_token)
+        merge_api_stats(metrics, changelog_stats)
+        if merger is not None:
+            try:
+                merger.close()
+            except Exception:
+                logger.exception("⚠️ No se pudo limpiar el staging / ingest log")
+
     # ------------------------------------------------------
     # 🧾 Summary
     # ------------------------------------------------------
@@ -197,7 +887,9 @@ def run_board(
         "target_table": target_table,
         "jql_applied": jql,
         "last_updated_seen": last_updated.isoformat() if isinstance(last_updated, datetime) else None,
-        "batch_size": 100,
+        **page_size.summary(),
+        "jira_fields_requested": ",".join(effective_fields(jira_fields)),
+        "changelog_expanded": bool(expand_changelog),
         "rows_received": metrics["rows_received"],
         "rows_processed": metrics["rows_processed"],
         "rows_invalid": metrics["rows_invalid"],
@@ -209,12 +901,27 @@ def run_board(
         "rows_unchanged": metrics["rows_unchanged"],
         "total_rows_bq": total_rows,
         "batches": metrics["batches"],
+        "merges": metrics["merges"],
         "api_requests": metrics["api_requests"],
         "api_retries_total": metrics["api_retries_total"],
         "api_5xx_events": metrics["api_5xx_events"],
         "fallback_to_search_used": metrics["fallback_to_search_used"],
+        "api_bytes_wire": metrics["api_bytes_wire"],
+        "api_bytes_decoded": metrics["api_bytes_decoded"],
+        "page_peak_buffer_bytes": metrics["page_peak_buffer_bytes"],
+        "staging_format": staging_format,
+        "staging_encode_seconds": round(metrics["staging_encode_seconds"], 3),
+        "staging_load_bytes": metrics["staging_load_bytes"],
+        "changelog_rows": metrics["changelog_rows"],
+        "changelog_inserted": metrics["changelog_inserted"],
+        "peak_rss_mb": peak_rss_mb(),
         "rate_limit_events": metrics["rate_limit_events"],
         "rate_limit_wait_seconds": metrics["rate_limit_wait_seconds"],
+        "rate_limit_wait_proactive_seconds": metrics["rate_limit_wait_proactive_seconds"],
+        "rate_limit_wait_reactive_seconds": metrics["rate_limit_wait_reactive_seconds"],
+        **stages.summary(),
+        "fanout_group": fanout.group_id if fanout is not None else None,
+        "fanout_fetch_owner": fanout.owner == target_table if fanout is not None else None,
         "status": status,
         "execution_seconds": elapsed,
         "error_message": error_message,
@@ -227,6 +934,7 @@ def run_board(
         metrics["batches"],
         elapsed,
     )
+    logger.info("⏱ Stages | %s", stages.describe() or "-")
 
     return {
         "status": status,
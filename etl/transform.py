@@ -1,18 +1,89 @@
 # etl/transform.py
+import hashlib
 import json
 from datetime import datetime
+from typing import TypedDict
 
-def parse_dt(dt):
+import orjson
+
+
+class RawRow(TypedDict):
+    """
+    Fila raw interna, de transform hasta la carga a BigQuery.
+
+    Las fechas viajan ya parseadas (datetime naive, hora de pared de
+    Jira truncada al segundo, igual que el string que se cargaba antes)
+    y raw_json ya serializado en bytes UTF-8: nada se vuelve a parsear
+    ni a serializar en quality, merge o staging.
+    """
+    jira_id: str | None
+    clave: str | None
+    fecha_creacion: datetime | None
+    fecha_actualizacion: datetime | None
+    raw_json: bytes
+    hash_contenido: str
+
+
+def parse_datetime(dt) -> datetime | None:
     if not dt:
         return None
-    return datetime.fromisoformat(dt.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
+    return datetime.fromisoformat(dt.replace("Z", "+00:00")).replace(tzinfo=None, microsecond=0)
+
+
+def parse_dt(dt):
+    value = parse_datetime(dt)
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
+
+def canonical_json(issue: dict) -> str:
+    """
+    Serialización canónica del issue (claves ordenadas, sin espacios):
+    el mismo contenido produce siempre el mismo string.
+    """
+    return json.dumps(issue, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def canonical_json_bytes(issue: dict) -> bytes:
+    """
+    raw_json canónico en bytes UTF-8 (claves ordenadas, sin espacios),
+    que es lo que se hashea en hash_contenido. Siempre con orjson: la
+    stdlib formatea algunos floats distinto (1e+16 vs 1e16), así que
+    mezclar encoders cambiaría el hash del mismo contenido.
+
+    Única excepción: enteros de más de 64 bits, que orjson no acepta; ese
+    issue se serializa con canonical_json. Depende solo del contenido, así
+    que el mismo issue siempre produce los mismos bytes.
+    """
+    try:
+        return orjson.dumps(issue, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        return canonical_json(issue).encode("utf-8")
+
+
+def content_hash(raw_json: str | bytes) -> str:
+    """
+    Huella del contenido: SHA-256 hex del raw_json en UTF-8.
+    Equivale a TO_HEX(SHA256(raw_json)) en BigQuery.
+    """
+    if isinstance(raw_json, str):
+        raw_json = raw_json.encode("utf-8")
+    return hashlib.sha256(raw_json).hexdigest()
+
 
-def transform_issue(issue: dict) -> dict:
+def transform_issue(issue: dict, typed_columns=()) -> RawRow:
+    """
+    Issue de Jira → fila raw. typed_columns (etl.typed_columns) agrega
+    columnas tipadas extraídas de issue.fields en la misma pasada.
+    """
     fields = issue.get("fields", {})
-    return {
+    raw_json = canonical_json_bytes(issue)
+    row = {
         "jira_id": issue.get("id"),
         "clave": issue.get("key"),
-        "fecha_creacion": parse_dt(fields.get("created")),
-        "fecha_actualizacion": parse_dt(fields.get("updated")),
-        "raw_json": json.dumps(issue, ensure_ascii=False),
+        "fecha_creacion": parse_datetime(fields.get("created")),
+        "fecha_actualizacion": parse_datetime(fields.get("updated")),
+        "raw_json": raw_json,
+        "hash_contenido": content_hash(raw_json),
     }
+    for column in typed_columns:
+        row[column.name] = column.extract(fields)
+    return row
@@ -0,0 +1,175 @@
+# etl/typed_columns.py
+import re
+
+from google.cloud import bigquery
+
+from bq.client import query_with_retries
+from core import telemetry
+from etl.transform import parse_datetime
+
+# Columnas "calientes" disponibles por nombre. `field` es el id de un campo
+# de sistema o el/los nombre(s) de un campo custom (se resuelven con el
+# catálogo de campos); `path` navega dentro del valor del campo.
+DEFAULT_TYPED_COLUMNS = {
+    "estado": {"field": "status", "path": "name"},
+    "estado_categoria": {"field": "status", "path": "statusCategory.key"},
+    "responsable_id": {"field": "assignee", "path": "accountId"},
+    "responsable_nombre": {"field": "assignee", "path": "displayName"},
+    "prioridad": {"field": "priority", "path": "name"},
+    "tipo_issue": {"field": "issuetype", "path": "name"},
+    "padre_clave": {"field": "parent", "path": "key"},
+    "sprint": {"field": "Sprint", "path": "name"},
+    "story_points": {"field": ["Story Points", "Story point estimate"], "type": "FLOAT"},
+}
+
+_SYSTEM_FIELDS = {"status", "assignee", "reporter", "priority", "issuetype", "parent", "resolution", "labels"}
+
+# Conversión SQL del valor (JSON_VALUE, STRING) al tipo de la columna.
+_SQL_CASTS = {
+    "FLOAT": "SAFE_CAST({} AS FLOAT64)",
+    "FLOAT64": "SAFE_CAST({} AS FLOAT64)",
+    "INTEGER": "SAFE_CAST({} AS INT64)",
+    "INT64": "SAFE_CAST({} AS INT64)",
+    "BOOLEAN": "SAFE_CAST({} AS BOOL)",
+    "BOOL": "SAFE_CAST({} AS BOOL)",
+    "TIMESTAMP": "SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%E*S%z', {})",
+}
+
+
+def _json_path(keys) -> str:
+    return "$" + "".join(f".{k}" if re.fullmatch(r"\w+", k) else f'."{k}"' for k in keys)
+
+
+class TypedColumn:
+    """Columna tipada de la tabla raw, extraída de issue.fields en transform."""
+
+    def __init__(self, name: str, field_id: str, path: str | None = None, field_type: str = "STRING"):
+        self.name = name
+        self.field_id = field_id
+        self.path = tuple(path.split(".")) if path else ()
+        self.field_type = field_type.upper()
+
+    def schema_field(self) -> bigquery.SchemaField:
+        return bigquery.SchemaField(self.name, self.field_type)
+
+    def extract(self, fields: dict):
+        value = fields.get(self.field_id)
+        # Campos multivalor (p. ej. Sprint): se toma el último (el más reciente).
+        if isinstance(value, list):
+            value = value[-1] if value else None
+
+        for key in self.path:
+            if not isinstance(value, dict):
+                break
+            value = value.get(key)
+
+        if value is None or isinstance(value, (dict, list)):
+            return None
+        try:
+            if self.field_type in ("FLOAT", "FLOAT64"):
+                return float(value)
+            if self.field_type in ("INTEGER", "INT64"):
+                return int(value)
+            if self.field_type in ("BOOLEAN", "BOOL"):
+                return bool(value)
+            if self.field_type == "TIMESTAMP":
+                return parse_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return str(value)
+
+    def sql_expr(self, column: str = "raw_json") -> str:
+        """
+        La misma extracción que extract(), en SQL sobre el raw_json
+        guardado (para completar filas que ya estaban en la tabla).
+        """
+        field = _json_path(("fields", self.field_id))
+        path = _json_path(self.path)
+        items = f"JSON_QUERY_ARRAY({column}, '{field}')"
+        value = (
+            f"COALESCE(JSON_VALUE({column}, '{_json_path(('fields', self.field_id, *self.path))}'), "
+            f"IF(ARRAY_LENGTH({items}) > 0, JSON_VALUE(ARRAY_LAST({items}), '{path}'), NULL))"
+        )
+        cast = _SQL_CASTS.get(self.field_type)
+        return cast.format(value) if cast else value
+
+
+def _normalize_specs(config) -> dict:
+    if not config:
+        return {}
+    if config is True or config == "default":
+        return dict(DEFAULT_TYPED_COLUMNS)
+
+    specs = {}
+    for item in config:
+        if isinstance(item, str):
+            if item not in DEFAULT_TYPED_COLUMNS:
+                raise ValueError(f"Columna tipada desconocida: {item}")
+            specs[item] = DEFAULT_TYPED_COLUMNS[item]
+        else:
+            specs[item["name"]] = item
+    return specs
+
+
+def resolve_typed_columns(config, *, catalog, jira, stats: dict, logger) -> list:
+    """
+    Config de runtime → lista de TypedColumn con ids de campo resueltos.
+    Acepta true / "default" (todas las columnas por defecto) o una lista
+    de nombres por defecto y/o objetos {"name", "field", "path", "type"}.
+    Las columnas cuyo campo no existe en el sitio se omiten con warning.
+    """
+    columns = []
+    for name, spec in _normalize_specs(config).items():
+        candidates = spec["field"] if isinstance(spec["field"], list) else [spec["field"]]
+
+        field_id = None
+        for candidate in candidates:
+            if candidate in _SYSTEM_FIELDS or candidate.startswith("customfield_"):
+                field_id = candidate
+            elif catalog is not None:
+                field_id = catalog.resolve(candidate, jira=jira, stats=stats)
+            if field_id:
+                break
+
+        if not field_id:
+            logger.warning("⚠️ Columna tipada %s: campo %s no encontrado en Jira", name, candidates)
+            continue
+
+        columns.append(TypedColumn(name, field_id, spec.get("path"), spec.get("type", "STRING")))
+
+    if columns:
+        logger.info(
+            "🧮 Columnas tipadas | %s",
+            ", ".join(f"{c.name}←{c.field_id}" for c in columns),
+        )
+    return columns
+
+
+def typed_schema(columns) -> list:
+    return [c.schema_field() for c in columns]
+
+
+def backfill_typed_columns(client, full_table: str, columns) -> int:
+    """
+    Completa desde raw_json columnas tipadas recién agregadas a una tabla
+    raw con datos. Sin esto quedarían NULL en las filas históricas hasta
+    que su issue se edite: el MERGE no reescribe issues sin cambios.
+    Retorna las filas actualizadas.
+    """
+    if not columns:
+        return 0
+    assignments = ",\n            ".join(
+        f"{c.name} = COALESCE({c.name}, {c.sql_expr()})" for c in columns
+    )
+    missing = " OR ".join(f"{c.name} IS NULL" for c in columns)
+    with telemetry.stage("infra", op="backfill_typed_columns", table=full_table) as span:
+        job, attempts = query_with_retries(
+            client,
+            f"""
+            UPDATE `{full_table}`
+            SET {assignments}
+            WHERE {missing}
+            """,
+        )
+        span.set("attempts", attempts)
+    return int(job.num_dml_affected_rows or 0)
@@ -3,19 +3,55 @@ print(">>> main.py arrancó")
 
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from core.logging import get_logger
 from core.secrets import get_secret_json
 from core.jira_client import JiraClient
+from core.telemetry import configure_telemetry
+from core.field_catalog import DEFAULT_TTL_SECONDS as FIELD_CATALOG_TTL_SECONDS, FieldCatalog
 from bq.client import get_client
+from bq.infra_cache import DEFAULT_TTL_SECONDS, configure_infra_cache
 from etl.runner import run_board
 from etl.board_resolver import resolve_boards
+from etl.fanout import FanOutFetch
 from metadata.summary import insert_summary
 from config.runtime import load_runtime_config
 
 logger = get_logger("jira_etl")
 
 
-def main():
+def build_jira_client(runtime: dict, secrets: dict) -> JiraClient:
+    """JiraClient con los límites de concurrencia / tasa del runtime."""
+    jira_stream_chunk_issues = runtime.get("jira_stream_chunk_issues")
+    return JiraClient(
+        url=secrets["JIRA_URL"],
+        user=secrets["JIRA_USER"],
+        token=secrets["JIRA_TOKEN"],
+        logger=logger,
+        max_concurrent_requests=int(runtime.get("max_concurrent_jira_requests", 1)),
+        rate_limit_per_second=float(runtime.get("jira_rate_limit_per_second", 10)),
+        rate_limit_burst=float(runtime.get("jira_rate_limit_burst", 10)),
+        stream_decode=bool(runtime.get("jira_stream_decode", False)),
+        stream_chunk_issues=int(jira_stream_chunk_issues) if jira_stream_chunk_issues else None,
+    )
+
+
+def main(
+    *,
+    runtime: dict | None = None,
+    secrets: dict | None = None,
+    bq_client=None,
+    jira: JiraClient | None = None,
+    field_catalog: FieldCatalog | None = None,
+    execution_mode: str | None = None,
+) -> list:
+    """
+    Flujo completo del ETL. Los argumentos opcionales reemplazan runtime
+    config, secreto de Jira y clientes (p. ej. para correr el mismo flujo
+    contra los dobles locales de bench/, o para reutilizar sesiones y
+    caches entre ejecuciones en service.py). Retorna el resultado de
+    cada board.
+    """
     run_id = str(uuid.uuid4())[:8]
 
     logger.info(
@@ -36,7 +72,8 @@ def main():
     # ==========================================================
     # 📥 Cargar runtime config
     # ==========================================================
-    runtime = load_runtime_config()
+    if runtime is None:
+        runtime = load_runtime_config()
     logger.info(
         "📥 Runtime config cargado",
         extra={"run_id": run_id, "runtime": runtime},
@@ -46,27 +83,71 @@ def main():
     bq_project_id = runtime.get("bq_project_id", "haulmer-ucloud-production")
     bq_dataset_id = runtime.get("bq_dataset_id", "Jira")
     runtime_boards = runtime.get("boards")
+    pipelined = bool(runtime.get("pipelined", False))
+    pipeline_queue_size = int(runtime.get("pipeline_queue_size", 2))
+    merge_mode = runtime.get("merge_mode", "per_batch")
+    merge_max_rows = int(runtime.get("merge_max_rows", 5000))
+    merge_max_bytes = int(runtime.get("merge_max_bytes", 200 * 1024 * 1024))
+    log_compact_every_rows = int(runtime.get("log_compact_every_rows", 0))
+    compact_log_leftovers = bool(runtime.get("compact_log_leftovers", True))
+    backfill_shards = max(1, int(runtime.get("backfill_shards", 1)))
+    backfill_shard_field = runtime.get("backfill_shard_field", "created")
+    jira_fields = runtime.get("jira_fields")
+    expand_changelog = bool(runtime.get("expand_changelog", True))
+    batch_size = int(runtime.get("batch_size", 100))
+    adaptive_batch_size = bool(runtime.get("adaptive_batch_size", True))
+    batch_size_min = int(runtime.get("batch_size_min", 10))
+    batch_size_max = int(runtime.get("batch_size_max", 1000))
+    raw_partition_field = runtime.get("raw_partition_field", "fecha_creacion")
+    raw_partition_type = runtime.get("raw_partition_type", "MONTH")
+    raw_clustering_fields = runtime.get("raw_clustering_fields")
+    migrate_raw_layout = bool(runtime.get("raw_table_migrate_layout", False))
+    staging_format = runtime.get("staging_format", "avro")
+    changelog_table = bool(runtime.get("changelog_table", False))
+    typed_columns = runtime.get("typed_columns")
+    field_catalog_path = runtime.get("field_catalog_path")
+    field_catalog_ttl_seconds = float(
+        runtime.get("field_catalog_ttl_seconds", FIELD_CATALOG_TTL_SECONDS)
+    )
+    resume = bool(runtime.get("resume", False))
+    board_scope = runtime.get("board_scope", "filter")
+    board_scope_migrate = bool(runtime.get("board_scope_migrate", False))
+    fanout_enabled = bool(runtime.get("fanout", False))
+    max_parallel_boards = max(1, int(runtime.get("max_parallel_boards", 1)))
+    max_concurrent_jira_requests = int(runtime.get("max_concurrent_jira_requests", 1))
+    max_concurrent_bq_jobs = int(runtime.get("max_concurrent_bq_jobs", 1))
+    infra_cache_path = runtime.get("infra_cache_path")
+    infra_cache_ttl_seconds = float(runtime.get("infra_cache_ttl_seconds", DEFAULT_TTL_SECONDS))
+    telemetry_export = runtime.get("telemetry_export")
+    telemetry_otel_spans = bool(runtime.get("telemetry_otel_spans", False))
+
+    configure_telemetry(export=telemetry_export, otel_spans=telemetry_otel_spans, logger=logger)
 
     # ==========================================================
     # 🔐 Secret Manager
     # ==========================================================
-    logger.info(
-        "🔐 Cargando secreto Jira",
-        extra={"run_id": run_id},
-    )
-    secrets = get_secret_json(bq_project_id, "Jira")
-
-    jira = JiraClient(
-        url=secrets["JIRA_URL"],
-        user=secrets["JIRA_USER"],
-        token=secrets["JIRA_TOKEN"],
-        logger=logger,
-    )
+    if jira is None:
+        logger.info(
+            "🔐 Cargando secreto Jira",
+            extra={"run_id": run_id},
+        )
+        if secrets is None:
+            secrets = get_secret_json(bq_project_id, "Jira")
+        jira = build_jira_client(runtime, secrets)
 
     # ==========================================================
     # 📊 BigQuery
     # ==========================================================
-    bq_client = get_client(bq_project_id)
+    if bq_client is None:
+        bq_client = get_client(bq_project_id, max_concurrent_jobs=max_concurrent_bq_jobs)
+    configure_infra_cache(path=infra_cache_path, ttl_seconds=infra_cache_ttl_seconds)
+
+    if field_catalog is None:
+        field_catalog = FieldCatalog(
+            path=field_catalog_path,
+            ttl_seconds=field_catalog_ttl_seconds,
+            logger=logger,
+        )
 
     # ==========================================================
     # 🧠 Resolver ejecuciones
@@ -85,10 +166,10 @@ def main():
     # ==========================================================
     # 🚀 Ejecutar ETL
     # ==========================================================
-    execution_mode = "GCP_WORKFLOW" if is_gcp else "LOCAL"
-    board_results = []
+    if execution_mode is None:
+        execution_mode = "GCP_WORKFLOW" if is_gcp else "LOCAL"
 
-    for b in boards_to_run:
+    def execute(b):
         logger.info(
             "➡️ Ejecutando ETL",
             extra={
@@ -98,7 +179,7 @@ def main():
             },
         )
 
-        result = run_board(
+        return run_board(
             target_table=b["target_table"],
             jira_project_key=jira_project_key,
             scope=b.get("scope", "PROJECT"),
@@ -115,8 +196,65 @@ def main():
                 f"{bq_project_id}.{bq_dataset_id}.jira_summary_etl",
                 row,
             ),
+            pipelined=pipelined,
+            pipeline_queue_size=pipeline_queue_size,
+            merge_mode=merge_mode,
+            merge_max_rows=merge_max_rows,
+            merge_max_bytes=merge_max_bytes,
+            log_compact_every_rows=log_compact_every_rows,
+            compact_log_leftovers=compact_log_leftovers,
+            backfill_shards=backfill_shards,
+            backfill_shard_field=backfill_shard_field,
+            jira_fields=b.get("jira_fields", jira_fields),
+            expand_changelog=bool(b.get("expand_changelog", expand_changelog)),
+            batch_size=batch_size,
+            adaptive_batch_size=adaptive_batch_size,
+            batch_size_min=batch_size_min,
+            batch_size_max=batch_size_max,
+            raw_partition_field=raw_partition_field,
+            raw_partition_type=raw_partition_type,
+            raw_clustering_fields=raw_clustering_fields,
+            migrate_raw_layout=migrate_raw_layout,
+            staging_format=staging_format,
+            changelog_table=bool(b.get("changelog_table", changelog_table)),
+            typed_columns=b.get("typed_columns", typed_columns),
+            field_catalog=field_catalog,
+            resume=resume,
+            board_scope=board_scope,
+            board_scope_migrate=board_scope_migrate,
+            board_jql=b.get("board_jql"),
+            fanout=fanout,
+        )
+
+    # Fan-out: una sola paginación de Jira para todos los targets. Cada
+    # target consume su parte en paralelo, así que todos necesitan worker.
+    fanout = None
+    if fanout_enabled and len(boards_to_run) > 1:
+        fanout = FanOutFetch(
+            jira=jira,
+            jira_project_key=jira_project_key,
+            targets=[b["target_table"] for b in boards_to_run],
+            queue_size=pipeline_queue_size,
+            logger=logger,
         )
-        board_results.append(result)
+        max_parallel_boards = len(boards_to_run)
+        logger.info("🔀 Fan-out | targets=%d | group=%s", len(boards_to_run), fanout.group_id)
+
+    # Con max_parallel_boards=1 el pool equivale al loop secuencial.
+    # Los workers comparten el presupuesto de Jira (JiraClient) y el
+    # cupo de jobs de BigQuery (get_client).
+    logger.info(
+        "🧵 Boards en paralelo: %d | jira_requests=%d | bq_jobs=%d",
+        max_parallel_boards,
+        max_concurrent_jira_requests,
+        max_concurrent_bq_jobs,
+        extra={"run_id": run_id},
+    )
+    with ThreadPoolExecutor(
+        max_workers=max_parallel_boards,
+        thread_name_prefix="board",
+    ) as pool:
+        board_results = list(pool.map(execute, boards_to_run))
 
     total_received = sum(r["rows_received"] for r in board_results)
     total_processed = sum(r["rows_processed"] for r in board_results)
@@ -140,6 +278,8 @@ def main():
         extra={"run_id": run_id, "failed_boards": failed_boards},
     )
 
+    return board_results
+
 
 if __name__ == "__main__":
     logger.info("🧪 __main__ detectado")
@@ -0,0 +1,259 @@
+# metadata/state.py
+import json
+
+from google.cloud import bigquery
+from google.api_core.exceptions import NotFound
+
+from bq.client import query_with_retries
+from core import telemetry
+
+STATE_TABLE_ID = "jira_etl_state"
+
+STATE_SCHEMA = [
+    bigquery.SchemaField("target_table", "STRING"),
+    bigquery.SchemaField("watermark", "TIMESTAMP"),
+    bigquery.SchemaField("last_cursor", "STRING"),
+    bigquery.SchemaField("last_run_id", "STRING"),
+    bigquery.SchemaField("updated_at", "TIMESTAMP"),
+    # Alcance (JQL sin watermark) con que se cargó la tabla raw.
+    bigquery.SchemaField("scope_jql", "STRING"),
+    # Backfill por shards en curso (NULL al terminar): si queda puesto, la
+    # ejecución que lo escribió murió a medias y la tabla está incompleta.
+    bigquery.SchemaField("backfill_execution_id", "STRING"),
+
+    # Checkpoint de la ejecución en curso (NULL al terminar bien).
+    bigquery.SchemaField("checkpoint_execution_id", "STRING"),
+    bigquery.SchemaField("checkpoint_jql", "STRING"),
+    bigquery.SchemaField("checkpoint_cursor", "STRING"),
+    bigquery.SchemaField("checkpoint_last_key", "STRING"),
+    bigquery.SchemaField("checkpoint_last_updated", "TIMESTAMP"),
+    bigquery.SchemaField("checkpoint_metrics", "STRING"),
+]
+
+CHECKPOINT_COLUMNS = [f.name for f in STATE_SCHEMA if f.name.startswith("checkpoint_")]
+
+
+def ensure_state_table(
+    bq_client: bigquery.Client,
+    full_table_id: str,
+):
+    """
+    Crea la tabla de estado si NO existe.
+    Si existe, agrega columnas faltantes (evolución de esquema).
+    """
+    with telemetry.stage("infra", op="ensure_state_table", table=full_table_id):
+        try:
+            table = bq_client.get_table(full_table_id)
+        except NotFound:
+            table = bigquery.Table(full_table_id, schema=STATE_SCHEMA)
+            return bq_client.create_table(table)
+
+        existing_fields = {f.name for f in table.schema}
+        missing_fields = [field for field in STATE_SCHEMA if field.name not in existing_fields]
+
+        if missing_fields:
+            table.schema = list(table.schema) + missing_fields
+            table = bq_client.update_table(table, ["schema"])
+
+        return table
+
+
+def get_state(
+    bq_client: bigquery.Client,
+    full_table_id: str,
+    target_table: str,
+) -> dict | None:
+    """
+    Estado de un target (1 fila por tabla raw), o None si aún no existe.
+    La tabla de estado es diminuta: leerla no escanea la tabla raw.
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("target_table", "STRING", target_table),
+        ]
+    )
+    with telemetry.stage("state", op="get_state", target_table=target_table):
+        rows = list(bq_client.query(
+            f"""
+            SELECT *
+            FROM `{full_table_id}`
+            WHERE target_table = @target_table
+            ORDER BY updated_at DESC
+            LIMIT 1
+            """,
+            job_config=job_config,
+        ).result())
+    return dict(rows[0].items()) if rows else None
+
+
+def load_checkpoint(state: dict | None) -> dict | None:
+    """Checkpoint utilizable de una fila de estado, o None (sin jobs)."""
+    if not state or not state.get("checkpoint_cursor") or not state.get("checkpoint_jql"):
+        return None
+    with telemetry.stage("state", op="load_checkpoint"):
+        return {
+            "execution_id": state.get("checkpoint_execution_id"),
+            "jql": state["checkpoint_jql"],
+            "cursor": json.loads(state["checkpoint_cursor"]),
+            "last_key": state.get("checkpoint_last_key"),
+            "last_updated": state.get("checkpoint_last_updated"),
+            "metrics": json.loads(state["checkpoint_metrics"] or "{}"),
+        }
+
+
+def clear_checkpoint(
+    bq_client: bigquery.Client,
+    full_table_id: str,
+    target_table: str,
+):
+    """
+    Borra el checkpoint del target. La tabla de estado la comparten los
+    boards en paralelo: los DML concurrentes que BigQuery aborte se
+    reintentan (igual que WatermarkState.save).
+    """
+    assignments = ", ".join(f"{c} = NULL" for c in CHECKPOINT_COLUMNS)
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("target_table", "STRING", target_table),
+        ]
+    )
+    with telemetry.stage("state", op="clear_checkpoint", target_table=target_table) as span:
+        _, attempts = query_with_retries(
+            bq_client,
+            f"UPDATE `{full_table_id}` SET {assignments} WHERE target_table = @target_table",
+            job_config=job_config,
+        )
+        span.set("attempts", attempts)
+
+
+def delete_state(
+    bq_client: bigquery.Client,
+    full_table_id: str,
+    target_table: str,
+):
+    """Borra la fila de estado del target (con reintentos, ver clear_checkpoint)."""
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("target_table", "STRING", target_table),
+        ]
+    )
+    with telemetry.stage("state", op="delete_state", target_table=target_table) as span:
+        _, attempts = query_with_retries(
+            bq_client,
+            f"DELETE FROM `{full_table_id}` WHERE target_table = @target_table",
+            job_config=job_config,
+        )
+        span.set("attempts", attempts)
+
+
+class WatermarkState:
+    """
+    Escritura del estado de un target tras cada MERGE raw (ver runner).
+
+    Es un solo MERGE sobre la fila de target_table, fuera de cualquier
+    transacción: con boards en paralelo, BigQuery encola los DML sobre
+    la misma tabla en vez de abortar transacciones que se cruzan. Los
+    conflictos que aún ocurran se reintentan (la sentencia es idempotente).
+
+    El watermark solo avanza: si el batch trae una fecha_actualizacion
+    menor a la guardada, se conserva la anterior. last_cursor es la
+    clave del issue que fijó el watermark.
+    Si el proceso cae entre el MERGE raw y esta escritura, el próximo
+    run parte del watermark anterior y vuelve a traer esas páginas; el
+    MERGE raw las deja sin cambios.
+
+    `checkpoint` (lo fija el runner después de cada MERGE) va en la misma
+    sentencia: cursor de paginación de la última página mergeada, último
+    issue y métricas acumuladas. `scope_jql` (si se fijó) registra el
+    alcance con que se está cargando la tabla. `backfill` marca un
+    backfill por shards en curso; cada save lo escribe (None lo borra).
+    """
+
+    def __init__(self, full_table_id: str, *, target_table: str, run_id: str):
+        self.full_table_id = full_table_id
+        self.target_table = target_table
+        self.run_id = run_id
+        self.checkpoint = None
+        self.scope_jql = None
+        self.backfill = None
+
+    def merge_sql(self) -> str:
+        advance = "T.watermark IS NULL OR TIMESTAMP(@state_watermark) > T.watermark"
+        checkpoint_updates = ",\n            ".join(
+            f"{c} = {self._checkpoint_value(c)}" for c in CHECKPOINT_COLUMNS
+        )
+        checkpoint_values = ", ".join(self._checkpoint_value(c) for c in CHECKPOINT_COLUMNS)
+        return f"""
+          MERGE `{self.full_table_id}` T
+          USING (SELECT @state_target AS target_table) S
+          ON T.target_table = S.target_table
+          WHEN MATCHED THEN
+            UPDATE SET
+            watermark = IF({advance}, TIMESTAMP(@state_watermark), T.watermark),
+            last_cursor = IF({advance}, @state_cursor, T.last_cursor),
+            last_run_id = @state_run_id,
+            updated_at = CURRENT_TIMESTAMP(),
+            scope_jql = COALESCE(@state_scope, T.scope_jql),
+            backfill_execution_id = @state_backfill,
+            {checkpoint_updates}
+          WHEN NOT MATCHED THEN
+            INSERT (
+              target_table, watermark, last_cursor, last_run_id, updated_at, scope_jql,
+              backfill_execution_id, {", ".join(CHECKPOINT_COLUMNS)}
+            )
+            VALUES (
+              @state_target, TIMESTAMP(@state_watermark), @state_cursor,
+              @state_run_id, CURRENT_TIMESTAMP(), @state_scope,
+              @state_backfill, {checkpoint_values}
+            )
+        """
+
+    @staticmethod
+    def _checkpoint_value(column: str) -> str:
+        if column == "checkpoint_last_updated":
+            return f"TIMESTAMP(@{column})"
+        return f"@{column}"
+
+    def params(self, watermark, cursor) -> list:
+        checkpoint = self.checkpoint or {}
+        last_updated = checkpoint.get("last_updated")
+        return [
+            bigquery.ScalarQueryParameter("state_target", "STRING", self.target_table),
+            bigquery.ScalarQueryParameter(
+                "state_watermark",
+                "STRING",
+                str(watermark) if watermark is not None else None,
+            ),
+            bigquery.ScalarQueryParameter("state_cursor", "STRING", cursor),
+            bigquery.ScalarQueryParameter("state_run_id", "STRING", self.run_id),
+            bigquery.ScalarQueryParameter("state_scope", "STRING", self.scope_jql),
+            bigquery.ScalarQueryParameter("state_backfill", "STRING", self.backfill),
+            bigquery.ScalarQueryParameter(
+                "checkpoint_execution_id", "STRING", checkpoint.get("execution_id")
+            ),
+            bigquery.ScalarQueryParameter("checkpoint_jql", "STRING", checkpoint.get("jql")),
+            bigquery.ScalarQueryParameter(
+                "checkpoint_cursor",
+                "STRING",
+                json.dumps(checkpoint["cursor"]) if checkpoint.get("cursor") else None,
+            ),
+            bigquery.ScalarQueryParameter("checkpoint_last_key", "STRING", checkpoint.get("last_key")),
+            bigquery.ScalarQueryParameter(
+                "checkpoint_last_updated",
+                "STRING",
+                str(last_updated) if last_updated is not None else None,
+            ),
+            bigquery.ScalarQueryParameter(
+                "checkpoint_metrics",
+                "STRING",
+                json.dumps(checkpoint["metrics"], default=str) if checkpoint.get("metrics") else None,
+            ),
+        ]
+
+    def save(self, bq_client: bigquery.Client, watermark, cursor=None):
+        """Guarda watermark (si avanza) y checkpoint; retorna los intentos."""
+        job_config = bigquery.QueryJobConfig(query_parameters=self.params(watermark, cursor))
+        with telemetry.stage("state", op="save", target_table=self.target_table) as span:
+            _, attempts = query_with_retries(bq_client, self.merge_sql(), job_config=job_config)
+            span.set("attempts", attempts)
+        return attempts
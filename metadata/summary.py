@@ -4,6 +4,9 @@ print(">>> metadata/summary.py LOADED")
 from google.cloud import bigquery
 from google.api_core.exceptions import NotFound
 
+from core import telemetry
+from core.telemetry import STAGES
+
 SUMMARY_TABLE_ID = "jira_summary_etl"
 
 SUMMARY_SCHEMA = [
@@ -22,6 +25,11 @@ SUMMARY_SCHEMA = [
     bigquery.SchemaField("jql_applied", "STRING"),
     bigquery.SchemaField("last_updated_seen", "TIMESTAMP"),
     bigquery.SchemaField("batch_size", "INTEGER"),
+    bigquery.SchemaField("batch_size_min", "INTEGER"),
+    bigquery.SchemaField("batch_size_max", "INTEGER"),
+    bigquery.SchemaField("batch_size_final", "INTEGER"),
+    bigquery.SchemaField("jira_fields_requested", "STRING"),
+    bigquery.SchemaField("changelog_expanded", "BOOLEAN"),
 
     bigquery.SchemaField("rows_received", "INTEGER"),
     bigquery.SchemaField("rows_processed", "INTEGER"),
@@ -35,12 +43,36 @@ SUMMARY_SCHEMA = [
     bigquery.SchemaField("total_rows_bq", "INTEGER"),
 
     bigquery.SchemaField("batches", "INTEGER"),
+    bigquery.SchemaField("merges", "INTEGER"),
     bigquery.SchemaField("api_requests", "INTEGER"),
     bigquery.SchemaField("api_retries_total", "INTEGER"),
     bigquery.SchemaField("api_5xx_events", "INTEGER"),
     bigquery.SchemaField("fallback_to_search_used", "INTEGER"),
+    bigquery.SchemaField("api_bytes_wire", "INTEGER"),
+    bigquery.SchemaField("api_bytes_decoded", "INTEGER"),
+    bigquery.SchemaField("page_peak_buffer_bytes", "INTEGER"),
+    bigquery.SchemaField("staging_format", "STRING"),
+    bigquery.SchemaField("staging_encode_seconds", "FLOAT"),
+    bigquery.SchemaField("staging_load_bytes", "INTEGER"),
+    bigquery.SchemaField("changelog_rows", "INTEGER"),
+    bigquery.SchemaField("changelog_inserted", "INTEGER"),
+    bigquery.SchemaField("peak_rss_mb", "FLOAT"),
     bigquery.SchemaField("rate_limit_events", "INTEGER"),
     bigquery.SchemaField("rate_limit_wait_seconds", "FLOAT"),
+    bigquery.SchemaField("rate_limit_wait_proactive_seconds", "FLOAT"),
+    bigquery.SchemaField("rate_limit_wait_reactive_seconds", "FLOAT"),
+
+    # Fan-out: targets que compartieron una sola descarga de Jira. Los
+    # contadores api_* de esa descarga quedan en la fila del owner.
+    bigquery.SchemaField("fanout_group", "STRING"),
+    bigquery.SchemaField("fanout_fetch_owner", "BOOLEAN"),
+
+    # Por etapa (core.telemetry.STAGES): tiempo acumulado y p50/p95 por llamada.
+    *[
+        bigquery.SchemaField(f"stage_{stage}_{suffix}", "FLOAT")
+        for stage in STAGES
+        for suffix in ("seconds", "p50_ms", "p95_ms")
+    ],
 
     bigquery.SchemaField("status", "STRING"),
     bigquery.SchemaField("execution_seconds", "FLOAT"),
@@ -56,20 +88,21 @@ def ensure_summary_table(
     Crea la tabla de summary si NO existe.
     Si existe, agrega columnas faltantes (evolución de esquema).
     """
-    try:
-        table = bq_client.get_table(full_table_id)
-    except NotFound:
-        table = bigquery.Table(full_table_id, schema=SUMMARY_SCHEMA)
-        return bq_client.create_table(table)
+    with telemetry.stage("infra", op="ensure_summary_table", table=full_table_id):
+        try:
+            table = bq_client.get_table(full_table_id)
+        except NotFound:
+            table = bigquery.Table(full_table_id, schema=SUMMARY_SCHEMA)
+            return bq_client.create_table(table)
 
-    existing_fields = {f.name for f in table.schema}
-    missing_fields = [field for field in SUMMARY_SCHEMA if field.name not in existing_fields]
+        existing_fields = {f.name for f in table.schema}
+        missing_fields = [field for field in SUMMARY_SCHEMA if field.name not in existing_fields]
 
-    if missing_fields:
-        table.schema = list(table.schema) + missing_fields
-        table = bq_client.update_table(table, ["schema"])
+        if missing_fields:
+            table.schema = list(table.schema) + missing_fields
+            table = bq_client.update_table(table, ["schema"])
 
-    return table
+        return table
 
 
 def insert_summary(
@@ -78,8 +111,14 @@ def insert_summary(
     row: dict,
 ):
     """
-    Inserta una fila de summary (1 ejecución = 1 fila)
+    Inserta una fila de summary (1 ejecución = 1 fila). Se mide como
+    span "summary" (sin columna: la fila ya está armada al insertarla).
     """
-    errors = bq_client.insert_rows_json(full_table_id, [row])
+    with telemetry.stage(
+        "summary",
+        execution_id=row.get("execution_id"),
+        target_table=row.get("target_table"),
+    ):
+        errors = bq_client.insert_rows_json(full_table_id, [row])
     if errors:
         raise RuntimeError(f"Error insertando summary ETL: {errors}")
@@ -0,0 +1,380 @@
+# service.py
+"""
+Modo servicio: proceso residente que ejecuta el ETL de forma periódica.
+
+    python service.py
+
+Lee el mismo runtime config que main.py (RUNTIME_CONFIG_JSON o
+boards.json) más una sección "service" opcional:
+
+    "service": {
+      "host": "127.0.0.1",
+      "port": 8080,
+      "interval_seconds": 300,
+      "max_concurrent_jobs": 1,
+      "jobs": [
+        {"name": "sap", "interval_seconds": 300},
+        {"name": "sap-board-7", "interval_seconds": 120,
+         "boards": [{"board_id": 7, "target_table": "sap_board_7_raw"}]}
+      ]
+    }
+
+Cada job es una ejecución de main.main() con el runtime base más sus
+overrides (cualquier clave del runtime). Sin "jobs" hay un solo job con
+el runtime base. Las sesiones de Jira, los clientes BigQuery, el
+catálogo de campos y el cache de infraestructura se crean una vez y se
+reutilizan entre ejecuciones.
+
+Endpoints locales: GET /healthz, GET /metrics (formato Prometheus) y
+POST /jobs/<name>/run (ejecutar ya).
+"""
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bq.client import get_client
+from config.runtime import load_runtime_config
+from core.field_catalog import DEFAULT_TTL_SECONDS as FIELD_CATALOG_TTL_SECONDS, FieldCatalog
+from core.logging import get_logger
+from core.secrets import get_secret_json
+from etl.runner import peak_rss_mb
+from main import build_jira_client, main
+
+logger = get_logger("jira_etl")
+
+DEFAULT_INTERVAL_SECONDS = 300
+DEFAULT_PORT = 8080
+TICK_SECONDS = 1.0
+
+# Claves del runtime que definen cada cliente compartido.
+JIRA_CLIENT_KEYS = (
+    "max_concurrent_jira_requests",
+    "jira_rate_limit_per_second",
+    "jira_rate_limit_burst",
+    "jira_stream_decode",
+    "jira_stream_chunk_issues",
+)
+JOB_KEYS = ("name", "interval_seconds")
+
+
+class ScheduledJob:
+    """Un job del servicio: runtime efectivo, próxima ejecución y contadores."""
+
+    def __init__(self, *, name: str, runtime: dict, interval_seconds: float):
+        self.name = name
+        self.runtime = runtime
+        self.interval_seconds = interval_seconds
+        self.next_run = time.monotonic()
+        self.running = False
+        self.metrics = {
+            "runs": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "rows_received": 0,
+            "rows_inserted": 0,
+            "rows_updated": 0,
+            "last_status": None,
+            "last_error": None,
+            "last_started_at": None,
+            "last_finished_at": None,
+            "last_success_at": None,
+            "last_duration_seconds": None,
+        }
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval_seconds,
+            "running": self.running,
+            "next_run_in_seconds": round(max(0.0, self.next_run - time.monotonic()), 1),
+            **self.metrics,
+        }
+
+
+def build_jobs(runtime: dict) -> list:
+    """Jobs de la sección "service" (runtime base + overrides de cada job)."""
+    config = runtime.get("service") or {}
+    base = {k: v for k, v in runtime.items() if k != "service"}
+    default_interval = float(config.get("interval_seconds", DEFAULT_INTERVAL_SECONDS))
+
+    entries = config.get("jobs") or [{"name": base["jira_project_key"]}]
+    jobs = []
+    for entry in entries:
+        if "name" not in entry:
+            raise ValueError(f"job de servicio inválido (falta name): {entry}")
+        overrides = {k: v for k, v in entry.items() if k not in JOB_KEYS}
+        jobs.append(
+            ScheduledJob(
+                name=str(entry["name"]),
+                runtime={**base, **overrides},
+                interval_seconds=float(entry.get("interval_seconds", default_interval)),
+            )
+        )
+
+    names = [j.name for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"nombres de job repetidos: {names}")
+    return jobs
+
+
+class EtlService:
+    """
+    Scheduler de jobs + clientes compartidos. Un job nunca se solapa
+    consigo mismo; max_concurrent_jobs acota los jobs simultáneos.
+    """
+
+    def __init__(self, runtime: dict):
+        config = runtime.get("service") or {}
+        self.jobs = {job.name: job for job in build_jobs(runtime)}
+        self.max_concurrent_jobs = max(1, int(config.get("max_concurrent_jobs", 1)))
+        self.started_at = time.time()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._secrets = {}
+        self._jira_clients = {}
+        self._bq_clients = {}
+        self._field_catalogs = {}
+        self._scheduler = None
+
+    # ----------------------------------------------------------
+    # Clientes compartidos (se crean en la primera ejecución)
+    # ----------------------------------------------------------
+    def _clients(self, runtime: dict) -> dict:
+        bq_project_id = runtime.get("bq_project_id", "haulmer-ucloud-production")
+        with self._lock:
+            if bq_project_id not in self._secrets:
+                self._secrets[bq_project_id] = get_secret_json(bq_project_id, "Jira")
+            secrets = self._secrets[bq_project_id]
+
+            jira_key = (bq_project_id,) + tuple(json.dumps(runtime.get(k)) for k in JIRA_CLIENT_KEYS)
+            if jira_key not in self._jira_clients:
+                self._jira_clients[jira_key] = build_jira_client(runtime, secrets)
+
+            # Un cliente por proyecto: el cupo de jobs BigQuery se comparte
+            # entre todos los jobs del servicio.
+            if bq_project_id not in self._bq_clients:
+                self._bq_clients[bq_project_id] = get_client(
+                    bq_project_id,
+                    max_concurrent_jobs=int(runtime.get("max_concurrent_bq_jobs", 1)),
+                )
+
+            catalog_key = (
+                runtime.get("field_catalog_path"),
+                float(runtime.get("field_catalog_ttl_seconds", FIELD_CATALOG_TTL_SECONDS)),
+            )
+            if catalog_key not in self._field_catalogs:
+                self._field_catalogs[catalog_key] = FieldCatalog(
+                    path=catalog_key[0],
+                    ttl_seconds=catalog_key[1],
+                    logger=logger,
+                )
+
+            return {
+                "jira": self._jira_clients[jira_key],
+                "bq_client": self._bq_clients[bq_project_id],
+                "field_catalog": self._field_catalogs[catalog_key],
+            }
+
+    # ----------------------------------------------------------
+    # Ejecución de jobs
+    # ----------------------------------------------------------
+    def _run_job(self, job: ScheduledJob):
+        started = time.monotonic()
+        job.metrics["last_started_at"] = time.time()
+        logger.info("⏰ Job %s | start", job.name)
+
+        status = "SUCCESS"
+        error = None
+        try:
+            results = main(runtime=job.runtime, execution_mode="SERVICE", **self._clients(job.runtime))
+            job.metrics["rows_received"] += sum(r["rows_received"] for r in results)
+            job.metrics["rows_inserted"] += sum(r["rows_inserted"] for r in results)
+            job.metrics["rows_updated"] += sum(r["rows_updated"] for r in results)
+            failed = [r["target_table"] for r in results if r["status"] != "SUCCESS"]
+            if failed:
+                status = "FAILED"
+                error = f"boards con error: {', '.join(failed)}"
+        except Exception as e:
+            logger.exception("❌ Job %s FAILED", job.name)
+            status = "FAILED"
+            error = str(e)
+
+        finished = time.monotonic()
+        job.metrics["runs"] += 1
+        job.metrics["last_status"] = status
+        job.metrics["last_error"] = error
+        job.metrics["last_finished_at"] = time.time()
+        job.metrics["last_duration_seconds"] = round(finished - started, 3)
+        if status == "SUCCESS":
+            job.metrics["consecutive_failures"] = 0
+            job.metrics["last_success_at"] = job.metrics["last_finished_at"]
+        else:
+            job.metrics["failures"] += 1
+            job.metrics["consecutive_failures"] += 1
+
+        # Ritmo fijo desde el inicio; si la ejecución duró más que el
+        # intervalo, la siguiente parte de inmediato.
+        job.next_run = max(started + job.interval_seconds, finished)
+        job.running = False
+        self._wake.set()
+
+        logger.info(
+            "⏰ Job %s | status=%s | %.2fs | next in %.0fs",
+            job.name,
+            status,
+            finished - started,
+            job.next_run - time.monotonic(),
+        )
+
+    def trigger(self, name: str) -> bool:
+        job = self.jobs.get(name)
+        if job is None:
+            return False
+        job.next_run = time.monotonic()
+        self._wake.set()
+        return True
+
+    def _schedule_loop(self):
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs, thread_name_prefix="job") as pool:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                for job in self.jobs.values():
+                    if not job.running and now >= job.next_run:
+                        job.running = True
+                        pool.submit(self._run_job, job)
+
+                pending = [j.next_run - now for j in self.jobs.values() if not j.running]
+                self._wake.wait(min([TICK_SECONDS] + [max(0.0, p) for p in pending]))
+                self._wake.clear()
+
+            logger.info("🛑 Scheduler detenido; esperando jobs en curso")
+
+    def start(self):
+        logger.info(
+            "🛰 Service start | jobs=%s | max_concurrent_jobs=%d",
+            {name: job.interval_seconds for name, job in self.jobs.items()},
+            self.max_concurrent_jobs,
+        )
+        self._scheduler = threading.Thread(target=self._schedule_loop, name="scheduler")
+        self._scheduler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def join(self):
+        self._scheduler.join()
+
+    # ----------------------------------------------------------
+    # Health / métricas
+    # ----------------------------------------------------------
+    def healthy(self) -> bool:
+        return self._scheduler is not None and self._scheduler.is_alive() and not self._stop.is_set()
+
+    def health(self) -> dict:
+        return {
+            "status": "ok" if self.healthy() else "stopping",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "jobs": [job.snapshot() for job in self.jobs.values()],
+        }
+
+    def prometheus(self) -> str:
+        series = [
+            ("jira_etl_job_runs_total", "counter", "Ejecuciones terminadas", "runs"),
+            ("jira_etl_job_failures_total", "counter", "Ejecuciones con error", "failures"),
+            ("jira_etl_job_consecutive_failures", "gauge", "Errores seguidos", "consecutive_failures"),
+            ("jira_etl_job_rows_received_total", "counter", "Issues recibidos de Jira", "rows_received"),
+            ("jira_etl_job_rows_inserted_total", "counter", "Filas insertadas", "rows_inserted"),
+            ("jira_etl_job_rows_updated_total", "counter", "Filas actualizadas", "rows_updated"),
+            ("jira_etl_job_last_duration_seconds", "gauge", "Duración de la última ejecución", "last_duration_seconds"),
+            ("jira_etl_job_last_success_timestamp_seconds", "gauge", "Fin de la última ejecución exitosa", "last_success_at"),
+        ]
+        lines = []
+        for metric, kind, help_text, key in series:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for job in self.jobs.values():
+                value = job.metrics[key]
+                if value is not None:
+                    lines.append(f'{metric}{{job="{job.name}"}} {value}')
+
+        lines.append("# HELP jira_etl_job_running Job en curso o en cola (1/0)")
+        lines.append("# TYPE jira_etl_job_running gauge")
+        for job in self.jobs.values():
+            lines.append(f'jira_etl_job_running{{job="{job.name}"}} {int(job.running)}')
+
+        lines.append("# HELP jira_etl_service_uptime_seconds Segundos desde el arranque")
+        lines.append("# TYPE jira_etl_service_uptime_seconds gauge")
+        lines.append(f"jira_etl_service_uptime_seconds {round(time.time() - self.started_at, 1)}")
+        rss = peak_rss_mb()
+        if rss is not None:
+            lines.append("# HELP jira_etl_service_peak_rss_mb RSS máximo del proceso")
+            lines.append("# TYPE jira_etl_service_peak_rss_mb gauge")
+            lines.append(f"jira_etl_service_peak_rss_mb {round(rss, 1)}")
+        return "\n".join(lines) + "\n"
+
+
+def _handler(service: EtlService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: str, content_type: str = "application/json"):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                return self._send(200 if service.healthy() else 503, json.dumps(service.health()))
+            if self.path == "/metrics":
+                return self._send(200, service.prometheus(), "text/plain; version=0.0.4")
+            self._send(404, json.dumps({"error": "not found"}))
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "run":
+                if service.trigger(parts[1]):
+                    return self._send(202, json.dumps({"job": parts[1], "scheduled": True}))
+            self._send(404, json.dumps({"error": "not found"}))
+
+    return Handler
+
+
+def serve(runtime: dict | None = None):
+    if runtime is None:
+        runtime = load_runtime_config()
+    config = runtime.get("service") or {}
+    host = config.get("host", "127.0.0.1")
+    port = int(os.getenv("PORT") or config.get("port", DEFAULT_PORT))
+
+    service = EtlService(runtime)
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+    logger.info("🩺 Health/metrics en http://%s:%d (/healthz, /metrics)", host, port)
+
+    def shutdown(signum, frame):
+        logger.info("🛑 Señal %s: deteniendo servicio", signum)
+        service.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    service.start()
+    service.join()
+    server.shutdown()
+    logger.info("🏁 Servicio detenido")
+
+
+if __name__ == "__main__":
+    serve()
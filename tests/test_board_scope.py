@@ -0,0 +1,139 @@
+# tests/test_board_scope.py
+import logging
+
+import pytest
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import infra_cache
+from core.jira_client import IssuePage, board_scope_jql
+from etl.runner import run_board
+
+PROJECT = "ABC"
+TARGET = "ABC_board_1_raw"
+FILTER_JQL = 'project = ABC AND labels = "x" ORDER BY Rank ASC'
+
+logger = logging.getLogger("test_board_scope")
+
+
+@pytest.mark.parametrize(
+    "filter_jql, expected",
+    [
+        ("project = ABC ORDER BY Rank ASC", "(project = ABC)"),
+        ("project = ABC order   by Rank", "(project = ABC)"),
+        ('summary ~ "order by date" ORDER BY Rank', '(summary ~ "order by date")'),
+        ("summary ~ 'it\\'s order by' order by created", "(summary ~ 'it\\'s order by')"),
+        ('text ~ "a \\" ORDER BY b" AND x = 1', '(text ~ "a \\" ORDER BY b" AND x = 1)'),
+        ("reorder by = 1", "(reorder by = 1)"),
+        ("ORDER BY Rank", None),
+        ("", None),
+    ],
+)
+def test_board_scope_jql_strips_order_by_outside_quotes(filter_jql, expected):
+    assert board_scope_jql(filter_jql) == expected
+
+
+def test_board_scope_jql_adds_kanban_subquery():
+    assert board_scope_jql("project = ABC ORDER BY Rank", "fixVersion is EMPTY") == (
+        "(project = ABC) AND (fixVersion is EMPTY)"
+    )
+
+
+class _FakeJira:
+    """Todo el proyecto, o solo los issues con label "x" si la JQL lo pide."""
+
+    timeout = (5, 30)
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.jqls = []
+
+    def fetch_issues_by_project(self, *, jql, stats, **kwargs):
+        self.jqls.append(jql)
+        issues = self.issues
+        if 'labels = "x"' in jql:
+            issues = [i for i in issues if "x" in i["fields"]["labels"]]
+        for offset in range(0, len(issues), 50):
+            yield IssuePage(issues[offset:offset + 50], {"endpoint": "search", "page": offset, "skip": 50})
+
+
+def _issues(n):
+    return [
+        {
+            "id": str(20000 + i),
+            "key": f"{PROJECT}-{i}",
+            "fields": {
+                "created": "2024-01-01T00:00:00.000+0000",
+                "updated": f"2024-02-01T00:{i // 60:02d}:{i % 60:02d}.000+0000",
+                "labels": ["x"] if i % 3 == 0 else [],
+            },
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _run(bq, jira, **kwargs):
+    return run_board(
+        target_table=TARGET,
+        jira_project_key=PROJECT,
+        scope="BOARD",
+        jira_board_id=1,
+        run_id="test",
+        execution_mode="TEST",
+        jira=jira,
+        bq_client=bq,
+        bq_project_id="p",
+        bq_dataset_id="d",
+        logger=logger,
+        summary_writer=lambda row: None,
+        expand_changelog=False,
+        staging_format="json",
+        board_jql=FILTER_JQL,
+        **kwargs,
+    )
+
+
+def _state(bq):
+    return bq.rows["p.d.jira_etl_state"][0]
+
+
+def _legacy_table(bq, jira):
+    """Tabla de board cargada con el proyecto completo y sin scope registrado."""
+    assert _run(bq, jira, board_scope="project")["status"] == "SUCCESS"
+    bq.rows["p.d.jira_etl_state"] = [{**_state(bq), "scope_jql": None}]
+
+
+def test_new_board_table_records_filter_scope():
+    bq, jira = FakeBigQueryClient("p"), _FakeJira(_issues(300))
+    assert _run(bq, jira)["status"] == "SUCCESS"
+    assert jira.jqls[-1].startswith('(project = ABC AND labels = "x") ORDER BY')
+    assert len(bq.rows[f"p.d.{TARGET}"]) == 100
+    assert _state(bq)["scope_jql"] == '(project = ABC AND labels = "x")'
+
+
+def test_legacy_project_table_keeps_project_scope():
+    bq, jira = FakeBigQueryClient("p"), _FakeJira(_issues(300))
+    _legacy_table(bq, jira)
+
+    assert _run(bq, jira)["status"] == "SUCCESS"
+    assert jira.jqls[-1].startswith(f"project={PROJECT} AND updated >= ")
+    assert len(bq.rows[f"p.d.{TARGET}"]) == 300
+
+
+def test_migrate_reloads_legacy_table_with_filter_only():
+    bq, jira = FakeBigQueryClient("p"), _FakeJira(_issues(300))
+    _legacy_table(bq, jira)
+
+    assert _run(bq, jira, board_scope_migrate=True)["status"] == "SUCCESS"
+    assert jira.jqls[-1] == '(project = ABC AND labels = "x") ORDER BY updated ASC'
+    assert len(bq.rows[f"p.d.{TARGET}"]) == 100
+    assert _state(bq)["scope_jql"] == '(project = ABC AND labels = "x")'
+
+    # Ya migrada: el flag no vuelve a vaciarla.
+    assert _run(bq, jira, board_scope_migrate=True)["status"] == "SUCCESS"
+    assert "updated >= " in jira.jqls[-1]
+    assert len(bq.rows[f"p.d.{TARGET}"]) == 100
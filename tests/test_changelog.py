@@ -0,0 +1,121 @@
+# tests/test_changelog.py
+from copy import deepcopy
+from datetime import datetime
+
+import pytest
+
+from bench.data import IssueFactory
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import infra_cache
+from etl.changelog import ChangelogMerger, complete_histories, flatten_changelog, transform_changelog
+
+CHANGELOG = "p.d.raw_changelog"
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _issues(n=5, depth=4):
+    return IssueFactory(project_key="ABC", custom_fields=0, changelog_depth=depth, seed=3).issues(n)
+
+
+class _FakeJira:
+    """Devuelve el changelog completo del issue en páginas de 2 historias."""
+
+    def __init__(self, issues):
+        self.full = {i["id"]: i["changelog"]["histories"] for i in issues}
+        self.requested = []
+
+    def fetch_issue_changelog(self, *, issue_id, stats, **kwargs):
+        self.requested.append(issue_id)
+        histories = self.full[issue_id]
+        for offset in range(0, len(histories), 2):
+            yield histories[offset:offset + 2]
+
+
+def test_flatten_emits_one_row_per_history_item():
+    issue = {
+        "id": "10",
+        "key": "ABC-10",
+        "changelog": {"histories": [
+            {
+                "id": 7,
+                "created": "2024-02-01T10:00:00.000+0000",
+                "author": {"accountId": "u1", "displayName": "Ana"},
+                "items": [
+                    {"field": "status", "fieldtype": "jira", "from": "1", "fromString": "To Do",
+                     "to": "3", "toString": "In Progress"},
+                    {"field": "assignee", "fieldId": "assignee", "fieldtype": "jira", "to": "u2"},
+                ],
+            },
+            {"created": "2024-02-02T10:00:00.000+0000", "items": [{"field": "sin id"}]},
+            {"id": "8", "created": "2024-02-03T10:00:00.000+0000", "items": []},
+        ]},
+    }
+
+    rows = flatten_changelog(issue)
+
+    assert [(r["history_id"], r["item_index"], r["campo"]) for r in rows] == [
+        ("7", 0, "status"),
+        ("7", 1, "assignee"),
+    ]
+    first = rows[0]
+    assert (first["jira_id"], first["clave"]) == ("10", "ABC-10")
+    assert (first["autor_id"], first["autor_nombre"]) == ("u1", "Ana")
+    assert (first["desde_texto"], first["hacia_texto"]) == ("To Do", "In Progress")
+    assert first["fecha_cambio"] == datetime(2024, 2, 1, 10)
+    assert rows[1]["desde"] is None
+
+
+def test_issue_without_changelog_has_no_rows():
+    assert flatten_changelog({"id": "1", "key": "ABC-1"}) == []
+    assert flatten_changelog({"id": "1", "key": "ABC-1", "changelog": None}) == []
+
+
+def test_truncated_changelog_is_completed_from_jira():
+    issues = _issues(3)
+    jira = _FakeJira(issues)
+    truncated = deepcopy(issues[1])
+    truncated["changelog"]["histories"] = truncated["changelog"]["histories"][-1:]
+
+    rows = transform_changelog([issues[0], truncated, issues[2]], jira=jira, stats={})
+
+    assert jira.requested == [issues[1]["id"]]
+    assert len(rows) == sum(
+        len(h["items"]) for i in issues for h in i["changelog"]["histories"]
+    )
+    assert complete_histories(issues[0], jira=jira, stats={}) is issues[0]["changelog"]["histories"]
+
+
+def test_changelog_merge_is_insert_only_and_dedupes():
+    bq = FakeBigQueryClient("p")
+    rows = transform_changelog(_issues(), stats={})
+    merger = ChangelogMerger(bq, "p", "d", "raw", max_rows=10 ** 6, staging_format="json")
+
+    assert merger.add(rows + rows[:3]) is None
+    assert merger.pending_rows == len(rows)
+    first = merger.flush()
+
+    assert first["inserted"] == len(rows)
+    assert len(bq.rows[CHANGELOG]) == len(rows)
+
+    # Una historia ya cargada no se reescribe aunque vuelva a llegar.
+    merger.add([{**r, "hacia_texto": "otro"} for r in rows[:4]])
+    second = merger.flush()
+
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, 4)
+    assert "otro" not in {r["hacia_texto"] for r in bq.rows[CHANGELOG]}
+    assert merger.flush() is None
+
+
+def test_changelog_merger_flushes_at_max_rows():
+    bq = FakeBigQueryClient("p")
+    rows = transform_changelog(_issues(), stats={})
+    merger = ChangelogMerger(bq, "p", "d", "raw", max_rows=10, staging_format="json")
+
+    metrics = merger.add(rows[:12])
+
+    assert metrics["inserted"] == 12
+    assert merger.pending_rows == 0
@@ -0,0 +1,135 @@
+# tests/test_fanout.py
+import logging
+import re
+from datetime import datetime, timezone
+
+from core.jira_client import IssuePage
+from etl.fanout import FanOutFetch, project_keys
+
+PROJECT = "ABC"
+PROJECT_JQL = f"project={PROJECT}"
+BOARD_JQL = '(labels = "x")'
+OLD = "2024-02-01T00:00:00.000+0000"
+
+logger = logging.getLogger("test_fanout")
+
+
+class _FakeJira:
+    """Evalúa los alcances conocidos que aparecen en la JQL (OR) y `id in (...)`."""
+
+    SCOPES = {
+        PROJECT_JQL: lambda i: i["key"].startswith(f"{PROJECT}-"),
+        BOARD_JQL: lambda i: "x" in i["fields"]["labels"],
+    }
+
+    def __init__(self, issues, *, on_page=None):
+        self.issues = issues
+        self.on_page = on_page
+        self.jqls = []
+
+    def _matches(self, issue, jql):
+        ids = re.search(r"id in \(([^)]*)\)", jql)
+        if ids and issue["id"] not in ids.group(1).split(", "):
+            return False
+        return any(match(issue) for scope, match in self.SCOPES.items() if scope in jql)
+
+    def fetch_issues_by_project(self, *, jql, stats, batch_size, **kwargs):
+        self.jqls.append(jql)
+        issues = [i for i in self.issues if self._matches(i, jql)]
+        for offset in range(0, len(issues), 10):
+            if self.on_page:
+                self.on_page(jql, offset)
+            yield IssuePage([dict(i) for i in issues[offset:offset + 10]])
+
+
+def _issue(n, key=None, labels=()):
+    return {
+        "id": str(30000 + n),
+        "key": key or f"{PROJECT}-{n}",
+        "fields": {"updated": OLD, "labels": list(labels)},
+    }
+
+
+def _run(jira, targets):
+    fanout = FanOutFetch(
+        jira=jira,
+        jira_project_key=PROJECT,
+        targets=list(targets),
+        queue_size=100,
+        logger=logger,
+    )
+    sources = {
+        name: fanout.source(
+            target_table=name,
+            scope_jql=scope,
+            last_updated=None,
+            stats={},
+            fields=None,
+            expand_changelog=False,
+            batch_size=10,
+        )
+        for name, scope in targets.items()
+    }
+    return {
+        name: [i["key"] for page in source for i in page]
+        for name, source in sources.items()
+    }
+
+
+def test_union_is_or_of_scopes_and_project_target_filters_by_key():
+    issues = [_issue(n, labels=["x"] if n % 2 else []) for n in range(20)]
+    issues.append(_issue(99, key="OTHER-1", labels=["x"]))
+    jira = _FakeJira(issues)
+
+    received = _run(jira, {"ABC_project_raw": PROJECT_JQL, "ABC_board_1_raw": BOARD_JQL})
+
+    union_jql = next(j for j in jira.jqls if j.endswith("ORDER BY updated ASC"))
+    assert union_jql.startswith(f"(({PROJECT_JQL}) OR ({BOARD_JQL}))")
+    assert "OTHER-1" not in received["ABC_project_raw"]
+    assert len(received["ABC_project_raw"]) == 20
+    assert "OTHER-1" in received["ABC_board_1_raw"]
+    assert len(received["ABC_board_1_raw"]) == 11
+
+
+def test_issue_entering_board_filter_during_run_is_delivered():
+    issues = [_issue(n) for n in range(30)]
+    issues[0]["fields"]["labels"] = ["x"]
+    late = issues[25]
+
+    def relabel(jql, offset):
+        # Entre la resolución de la membresía y la página que lo trae.
+        if jql.endswith("ORDER BY updated ASC") and offset == 10:
+            late["fields"]["labels"] = ["x"]
+            late["fields"]["updated"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "+0000"
+
+    jira = _FakeJira(issues, on_page=relabel)
+    received = _run(jira, {"ABC_project_raw": PROJECT_JQL, "ABC_board_1_raw": BOARD_JQL})
+
+    assert received["ABC_board_1_raw"] == ["ABC-0", "ABC-25"]
+    assert len(received["ABC_project_raw"]) == 30
+    assert any(f'id in ({late["id"]})' in j for j in jira.jqls)
+    # Los issues viejos que no están en el set no se vuelven a consultar.
+    assert sum("id in (" in j for j in jira.jqls) == 1
+
+
+def test_project_only_scopes_skip_membership_searches():
+    issues = [_issue(n) for n in range(15)] + [_issue(50 + n, key=f"XYZ-{n}") for n in range(5)]
+    jira = _FakeJira(issues)
+    jira.SCOPES = {
+        PROJECT_JQL: lambda i: i["key"].startswith(f"{PROJECT}-"),
+        "project = XYZ": lambda i: i["key"].startswith("XYZ-"),
+    }
+
+    received = _run(jira, {"ABC_project_raw": PROJECT_JQL, "XYZ_board_1_raw": "(project = XYZ)"})
+
+    assert len(jira.jqls) == 1
+    assert len(received["ABC_project_raw"]) == 15
+    assert received["XYZ_board_1_raw"] == [f"XYZ-{n}" for n in range(5)]
+
+
+def test_project_keys_only_for_plain_project_clauses():
+    assert project_keys("project=ABC") == {"ABC"}
+    assert project_keys('(project in (ABC, "XYZ"))') == {"ABC", "XYZ"}
+    assert project_keys('project = ABC AND labels = "x"') is None
+    assert project_keys('project = "Mi proyecto"') is None
+    assert project_keys("project = 10000") is None
@@ -0,0 +1,104 @@
+# tests/test_ingest_log.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.cloud import bigquery
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import infra_cache
+from etl.ingest_log import IngestLog, compact_ingest_log, ingest_log_table
+from etl.merge import RAW_SCHEMA, merge_with_metrics
+from etl.transform import transform_issue
+
+RAW = "p.d.raw"
+LOG = ingest_log_table(RAW)
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _rows(ids, *, updated="2024-02-01T00:00:00.000+0000", summary="a"):
+    return [
+        transform_issue({
+            "id": str(n),
+            "key": f"ABC-{n}",
+            "fields": {"created": "2024-01-01T00:00:00.000+0000", "updated": updated, "summary": summary},
+        })
+        for n in ids
+    ]
+
+
+def _log(bq, execution_id):
+    return IngestLog(bq, "p", "d", "raw", execution_id=execution_id, staging_format="json")
+
+
+def _bq():
+    bq = FakeBigQueryClient("p")
+    bq.create_table(bigquery.Table(RAW, schema=RAW_SCHEMA))
+    return bq
+
+
+def test_leftover_rows_are_compacted_into_raw():
+    bq = _bq()
+    merge_with_metrics(bq, "p", "d", "raw", _rows([1, 2, 3]))
+    # Corrida que murió antes de compactar: dos versiones del 2, el 3 igual y el 4 nuevo.
+    dead = _log(bq, "dead")
+    dead.add(_rows([2, 3, 4]))
+    dead.add(_rows([2], updated="2024-02-05T00:00:00.000+0000", summary="b"))
+
+    metrics = compact_ingest_log(bq, RAW)
+
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (1, 1, 1)
+    rows = {r["jira_id"]: r for r in bq.rows[RAW]}
+    assert sorted(rows) == ["1", "2", "3", "4"]
+    assert '"summary":"b"' in rows["2"]["raw_json"]
+    assert bq.rows[LOG] == []
+
+
+def test_compaction_keeps_rows_ingested_after_the_cutoff():
+    bq = _bq()
+    _log(bq, "dead").add(_rows([1]))
+    # Fila que otra corrida agrega mientras se compacta.
+    late = {**_rows([2])[0], "execution_id": "live", "ingested_at": datetime.now(timezone.utc) + timedelta(hours=1)}
+    bq.rows[LOG].append(late)
+
+    metrics = compact_ingest_log(bq, RAW)
+
+    assert metrics["inserted"] == 1
+    assert [r["jira_id"] for r in bq.rows[RAW]] == ["1"]
+    assert [r["jira_id"] for r in bq.rows[LOG]] == ["2"]
+
+
+def test_empty_log_skips_the_merge():
+    bq = _bq()
+    merges = bq.merges_seen
+
+    assert compact_ingest_log(bq, RAW) == {"inserted": 0, "updated": 0, "unchanged": 0}
+    assert bq.merges_seen == merges
+
+
+def test_flush_compacts_only_this_execution():
+    bq = _bq()
+    _log(bq, "dead").add(_rows([1]))
+    live = _log(bq, "live")
+    live.add(_rows([2, 3]))
+
+    metrics = live.flush()
+
+    assert metrics["inserted"] == 2
+    assert sorted(r["jira_id"] for r in bq.rows[RAW]) == ["2", "3"]
+    assert [(r["jira_id"], r["execution_id"]) for r in bq.rows[LOG]] == [("1", "dead")]
+
+
+def test_close_discards_uncompacted_rows():
+    bq = _bq()
+    _log(bq, "dead").add(_rows([1]))
+    failed = _log(bq, "failed")
+    failed.add(_rows([2, 3]))
+
+    failed.close()
+
+    assert [r["execution_id"] for r in bq.rows[LOG]] == ["dead"]
+    assert bq.rows[RAW] == []
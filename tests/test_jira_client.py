@@ -0,0 +1,129 @@
+# tests/test_jira_client.py
+import json
+import logging
+
+import pytest
+import requests
+
+from core import jira_client
+from core.jira_client import JiraClient
+
+
+class _Response:
+    """Respuesta mínima de requests: cuerpo en chunks, que puede cortarse."""
+
+    def __init__(self, payload: dict, *, drop_after: int | None = None):
+        self.status_code = 200
+        self.headers = {}
+        self._body = json.dumps(payload).encode()
+        self.drop_after = drop_after
+        self.closed = False
+
+    @property
+    def content(self) -> bytes:
+        return b"".join(self.iter_content(1024))
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for n, i in enumerate(range(0, len(self._body), 16)):
+            if self.drop_after is not None and n >= self.drop_after:
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+            yield self._body[i:i + 16]
+
+    def close(self):
+        self.closed = True
+
+
+def _page(n: int, token=None) -> dict:
+    issues = [{"id": str(i), "key": f"P-{i}", "fields": {"updated": "2024-01-01T00:00:00.000+0000"}} for i in range(n)]
+    payload = {"issues": issues, "maxResults": n}
+    if token:
+        payload["nextPageToken"] = token
+    return payload
+
+
+def _client(monkeypatch, responses, **kwargs):
+    client = JiraClient(
+        url="http://jira.test",
+        user="u",
+        token="t",
+        logger=logging.getLogger("test"),
+        rate_limit_per_second=1000,
+        rate_limit_burst=1000,
+        **kwargs,
+    )
+    calls = iter(responses)
+
+    def request(method, url, **_):
+        # El slot de concurrencia está tomado mientras se hace el request.
+        assert client._request_slots._value == client.max_concurrent_requests - 1
+        response = next(calls)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(client.session, "request", request)
+    monkeypatch.setattr(jira_client.time, "sleep", lambda s: None)
+    return client
+
+
+def _stats():
+    return {
+        "api_requests": 0,
+        "api_retries_total": 0,
+        "api_5xx_events": 0,
+        "rate_limit_events": 0,
+        "rate_limit_wait_seconds": 0.0,
+        "rate_limit_wait_proactive_seconds": 0.0,
+        "rate_limit_wait_reactive_seconds": 0.0,
+        "fallback_to_search_used": 0,
+        "api_bytes_wire": 0,
+        "api_bytes_decoded": 0,
+        "page_peak_buffer_bytes": 0,
+    }
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"stream_decode": True}, {"stream_decode": True, "stream_chunk_issues": 2}],
+)
+def test_page_is_retried_when_body_is_cut(monkeypatch, options):
+    responses = [_Response(_page(5), drop_after=2), _Response(_page(5))]
+    if not options:
+        # Sin stream el cuerpo se lee dentro de session.request.
+        responses[0] = requests.exceptions.ChunkedEncodingError("connection broken")
+    client = _client(monkeypatch, responses, **options)
+    stats = _stats()
+
+    pages = list(client.fetch_issues_by_project(project_key="P", jql="project=P", batch_size=5, stats=stats))
+
+    assert [i["id"] for page in pages for i in page] == [str(i) for i in range(5)]
+    assert pages[-1].cursor == {"endpoint": "search/jql", "page": None, "skip": 5}
+    assert stats["api_requests"] == 2
+    assert client._request_slots._value == client.max_concurrent_requests
+
+
+def test_slot_is_released_before_chunks_are_yielded(monkeypatch):
+    client = _client(monkeypatch, [_Response(_page(4))], stream_decode=True, stream_chunk_issues=1)
+    pages = client.fetch_issues_by_project(project_key="P", jql="project=P", batch_size=4, stats=_stats())
+
+    first = next(pages)
+    # El consumidor (MERGE) corre sin conexión abierta ni slot tomado.
+    assert len(first) == 1
+    assert client._request_slots._value == client.max_concurrent_requests
+    assert len(list(pages)) == 3
+
+
+def test_peak_buffer_is_reported_in_bytes(monkeypatch):
+    payload = {"issues": [{"id": "1", "key": "P-1", "fields": {"summary": "ñ" * 500}}]}
+    response = _Response(payload)
+    response._body = json.dumps(payload, ensure_ascii=False).encode()
+    client = _client(monkeypatch, [response], stream_decode=True)
+    stats = _stats()
+
+    list(client.fetch_issues_by_project(project_key="P", jql="project=P", batch_size=5, stats=stats))
+
+    assert stats["page_peak_buffer_bytes"] >= 1000
+    assert stats["api_bytes_decoded"] == len(response._body)
@@ -0,0 +1,96 @@
+# tests/test_json_stream.py
+import json
+
+import pytest
+
+from core.json_stream import JsonArrayStream
+
+# Un valor de cada tipo escalar (y contenedores) dentro de issues, más
+# claves de nivel superior antes y después del arreglo.
+DOCUMENT = {
+    "expand": "names",
+    "startAt": 0,
+    "issues": [
+        0.1,
+        -12.5e-3,
+        1e16,
+        1234567890,
+        -7,
+        0,
+        True,
+        False,
+        None,
+        "texto con \"comillas\", \\ y ñandú 🚀",
+        "",
+        {"id": "10001", "fields": {"n": 3.25, "ok": True, "labels": ["a", "b"], "x": None}},
+        [1, [2, [3.5]], {}],
+        {},
+        [],
+    ],
+    "maxResults": 50,
+    "nextPageToken": "tok-é",
+    "isLast": False,
+}
+
+
+def _chunks(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _parse(data: bytes, size: int):
+    stream = JsonArrayStream(_chunks(data, size), "issues")
+    issues = list(stream)
+    return issues, stream.meta, stream
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_every_chunk_boundary(separators):
+    """Cortar el documento en cualquier byte da el mismo resultado que json.loads."""
+    data = json.dumps(DOCUMENT, ensure_ascii=False, separators=separators).encode("utf-8")
+    expected_meta = {k: v for k, v in DOCUMENT.items() if k != "issues"}
+
+    for size in range(1, len(data) + 1):
+        issues, meta, stream = _parse(data, size)
+        assert issues == DOCUMENT["issues"], f"chunk={size}"
+        assert meta == expected_meta, f"chunk={size}"
+        assert stream.bytes_read == len(data)
+
+
+@pytest.mark.parametrize("scalar", ["0.1", "12345", "-3", "1e16", "1E+2", "2.5e-3", "true", "false", "null"])
+def test_scalar_cut_at_every_position(scalar):
+    """Un escalar cortado en cualquier posición no se acepta incompleto."""
+    data = ('{"issues": [' + scalar + "," + scalar + '], "total": ' + scalar + "}").encode()
+    for size in range(1, len(data) + 1):
+        issues, meta, _ = _parse(data, size)
+        assert issues == [json.loads(scalar)] * 2, f"chunk={size}"
+        assert meta == {"total": json.loads(scalar)}, f"chunk={size}"
+
+
+def test_multibyte_split_inside_character():
+    data = json.dumps({"issues": ["ñ" * 10, "🚀"]}, ensure_ascii=False).encode("utf-8")
+    for size in range(1, 8):
+        issues, _, _ = _parse(data, size)
+        assert issues == ["ñ" * 10, "🚀"]
+
+
+def test_peak_bytes_counts_utf8_bytes():
+    text = "ñ" * 1000
+    data = json.dumps({"issues": [text]}, ensure_ascii=False).encode("utf-8")
+    _, _, stream = _parse(data, len(data))
+    assert stream.peak_bytes == len(data)
+    assert stream.peak_bytes > len(data.decode("utf-8"))
+
+
+def test_empty_document_and_array():
+    assert _parse(b"{}", 1)[:2] == ([], {})
+    assert _parse(b'{"issues": [], "total": 0}', 3)[:2] == ([], {"total": 0})
+
+
+def test_truncated_document_raises():
+    with pytest.raises(ValueError):
+        _parse(b'{"issues": [1, 2', 4)
+
+
+def test_invalid_separator_raises():
+    with pytest.raises(ValueError):
+        _parse(b'{"issues": [1; 2]}', 64)
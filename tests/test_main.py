@@ -0,0 +1,120 @@
+# tests/test_main.py
+import threading
+
+import pytest
+
+# main.py importa Secret Manager (requirements.txt).
+pytest.importorskip("google.cloud.secretmanager")
+
+import main  # noqa: E402
+from bench.fake_bigquery import FakeBigQueryClient  # noqa: E402
+from bench.fake_jira import FakeJiraServer  # noqa: E402
+from bq import infra_cache  # noqa: E402
+from bq.client import JobLimitedClient  # noqa: E402
+
+PROJECT = "BENCH"
+BOARDS = 3
+
+
+@pytest.fixture(scope="module")
+def jira_server():
+    with FakeJiraServer({"issues": 300, "project_key": PROJECT, "boards": BOARDS, "seed": 7}) as server:
+        yield server
+
+
+class _CountingBigQuery(FakeBigQueryClient):
+    """Registra cuántos jobs de query corren a la vez."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_flight_lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.threads = set()
+
+    def query(self, *args, **kwargs):
+        with self._in_flight_lock:
+            self.threads.add(threading.current_thread().name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return super().query(*args, **kwargs)
+        finally:
+            with self._in_flight_lock:
+                self.in_flight -= 1
+
+
+def _run(server, fake_bq, monkeypatch, **runtime):
+    # El cache de infra es del proceso: cada corrida usa un BigQuery nuevo.
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+    runtime = {
+        "jira_project_key": PROJECT,
+        "bq_project_id": "p",
+        "bq_dataset_id": "d",
+        "jira_rate_limit_per_second": 10000,
+        "jira_rate_limit_burst": 10000,
+        "boards": [
+            {"board_id": n, "target_table": f"{PROJECT}_board_{n}_raw"}
+            for n in range(1, BOARDS + 1)
+        ],
+        **runtime,
+    }
+    bq = JobLimitedClient(fake_bq, int(runtime.get("max_concurrent_bq_jobs", 1)))
+    return main.main(
+        runtime=runtime,
+        secrets={"JIRA_URL": server.url, "JIRA_USER": "u", "JIRA_TOKEN": "t"},
+        bq_client=bq,
+    )
+
+
+def _raw(fake_bq, n):
+    rows = fake_bq.rows.get(f"p.d.{PROJECT}_board_{n}_raw", [])
+    return sorted((r["jira_id"], r["fecha_actualizacion"]) for r in rows)
+
+
+def test_parallel_boards_match_sequential_run(jira_server, monkeypatch):
+    sequential = FakeBigQueryClient("p")
+    parallel = FakeBigQueryClient("p")
+
+    expected = _run(jira_server, sequential, monkeypatch, max_parallel_boards=1)
+    results = _run(
+        jira_server,
+        parallel,
+        monkeypatch,
+        max_parallel_boards=BOARDS,
+        max_concurrent_jira_requests=BOARDS,
+        max_concurrent_bq_jobs=BOARDS,
+    )
+
+    # Resultados en el orden de los boards, no en el de término.
+    assert [r["target_table"] for r in results] == [r["target_table"] for r in expected]
+    assert [r["status"] for r in results] == ["SUCCESS"] * BOARDS
+    for n in range(1, BOARDS + 1):
+        assert _raw(parallel, n)
+        assert _raw(parallel, n) == _raw(sequential, n)
+    assert [r["rows_inserted"] for r in results] == [r["rows_inserted"] for r in expected]
+    assert len(parallel.rows["p.d.jira_summary_etl"]) == BOARDS
+
+
+def test_parallel_boards_share_bigquery_job_cap(jira_server, monkeypatch):
+    fake_bq = _CountingBigQuery("p", job_latency=0.002)
+
+    results = _run(jira_server, fake_bq, monkeypatch, max_parallel_boards=BOARDS, max_concurrent_bq_jobs=1)
+
+    assert [r["status"] for r in results] == ["SUCCESS"] * BOARDS
+    assert len({t for t in fake_bq.threads if t.startswith("board")}) == BOARDS
+    assert fake_bq.max_in_flight == 1
+
+
+def test_failed_board_does_not_stop_the_others(jira_server, monkeypatch):
+    fake_bq = FakeBigQueryClient(
+        "p",
+        fail_merges=range(1, 1000),
+        fail_merge_target=rf"{PROJECT}_board_2_raw$",
+    )
+
+    results = _run(jira_server, fake_bq, monkeypatch, max_parallel_boards=BOARDS, max_concurrent_bq_jobs=BOARDS)
+
+    assert [r["status"] for r in results] == ["SUCCESS", "FAILED", "SUCCESS"]
+    assert _raw(fake_bq, 1) and _raw(fake_bq, 3)
+    assert not _raw(fake_bq, 2)
@@ -0,0 +1,245 @@
+# tests/test_merge.py
+from types import SimpleNamespace
+
+from google.cloud import bigquery
+
+from bench.fake_bigquery import FakeBigQueryClient
+from etl.merge import RAW_SCHEMA, BatchBounds, StagedMerger, _merge_metrics_from_job, merge_with_metrics
+from etl.transform import transform_issue
+
+
+def _row(jira_id, created="2024-01-01T00:00:00.000+0000", updated="2024-02-01T00:00:00.000+0000", key=None):
+    return {
+        "jira_id": jira_id,
+        "clave": key or f"ABC-{jira_id}",
+        "fecha_creacion": created,
+        "fecha_actualizacion": updated,
+    }
+
+
+def test_predicates_use_string_order_of_jira_id():
+    bounds = BatchBounds()
+    bounds.update([_row("9"), _row("10"), _row("100")])
+    assert bounds.predicates(prune_on_created=False) == ["T.jira_id BETWEEN '10' AND '9'"]
+
+
+def test_predicates_add_created_range_when_enabled():
+    bounds = BatchBounds()
+    bounds.update([
+        _row("1", created="2024-03-01T00:00:00.000+0000"),
+        _row("2", created="2023-12-31T23:59:59.000+0000"),
+    ])
+    assert bounds.predicates(prune_on_created=True) == [
+        "T.jira_id BETWEEN '1' AND '2'",
+        "T.fecha_creacion BETWEEN TIMESTAMP('2023-12-31T23:59:59.000+0000')"
+        " AND TIMESTAMP('2024-03-01T00:00:00.000+0000')",
+    ]
+
+
+def test_null_created_disables_created_pruning():
+    bounds = BatchBounds()
+    bounds.update([_row("1"), _row("2", created=None)])
+    assert bounds.predicates(prune_on_created=True) == ["T.jira_id BETWEEN '1' AND '2'"]
+
+
+def test_predicates_escape_quotes_and_backslashes():
+    bounds = BatchBounds()
+    bounds.update([_row("a'b"), _row("c\\d")])
+    assert bounds.predicates(prune_on_created=False) == ["T.jira_id BETWEEN 'a\\'b' AND 'c\\\\d'"]
+
+
+def test_empty_bounds_have_no_predicates():
+    assert BatchBounds().predicates(prune_on_created=True) == []
+
+
+def test_bounds_track_max_updated_and_its_key():
+    bounds = BatchBounds()
+    bounds.update([
+        _row("1", updated="2024-02-01T00:00:00.000+0000"),
+        _row("2", updated="2024-02-03T00:00:00.000+0000", key="ABC-LAST"),
+        _row("3", updated=None),
+    ])
+    assert bounds.max_updated == "2024-02-03T00:00:00.000+0000"
+    assert bounds.max_updated_key == "ABC-LAST"
+
+
+def _issue(n, *, created, updated="2024-02-01T00:00:00.000+0000", summary="a"):
+    return {
+        "id": str(n),
+        "key": f"ABC-{n}",
+        "fields": {"created": created, "updated": updated, "summary": summary},
+    }
+
+
+class _RecordingBigQuery(FakeBigQueryClient):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sqls = []
+
+        self.dispositions = []
+
+    def query(self, sql, job_config=None, **kwargs):
+        self.sqls.append(sql)
+        return super().query(sql, job_config=job_config, **kwargs)
+
+    def load_table_from_file(self, file_obj, destination, *, job_config=None, **kwargs):
+        self.dispositions.append(job_config.write_disposition)
+        return super().load_table_from_file(file_obj, destination, job_config=job_config, **kwargs)
+
+    def load_table_from_json(self, json_rows, destination, *, job_config=None, **kwargs):
+        self.dispositions.append(job_config.write_disposition)
+        return super().load_table_from_json(json_rows, destination, job_config=job_config, **kwargs)
+
+
+def test_pruned_merge_matches_rows_inside_bounds():
+    bq = _RecordingBigQuery("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    first = [
+        _issue(n, created=f"2024-01-{n:02d}T00:00:00.000+0000")
+        for n in range(10, 20)
+    ]
+    merge_with_metrics(bq, "p", "d", "raw", [transform_issue(i) for i in first], prune_on_created=True)
+
+    # 12 y 15 cambian; 30 es nuevo con una fecha de creación fuera del rango previo.
+    second = [
+        _issue(12, created=first[2]["fields"]["created"], updated="2024-02-02T00:00:00.000+0000", summary="b"),
+        _issue(15, created=first[5]["fields"]["created"], updated="2024-02-02T00:00:00.000+0000", summary="b"),
+        _issue(18, created=first[8]["fields"]["created"]),
+        _issue(30, created="2024-06-01T00:00:00.000+0000"),
+    ]
+    metrics = merge_with_metrics(bq, "p", "d", "raw", [transform_issue(i) for i in second], prune_on_created=True)
+
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (1, 2, 1)
+    assert len(bq.rows["p.d.raw"]) == 11
+    assert any("T.fecha_creacion BETWEEN" in sql for sql in bq.sqls)
+
+
+def test_rows_without_hash_are_rewritten_on_next_merge():
+    bq = FakeBigQueryClient("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    issues = [_issue(n, created="2024-01-01T00:00:00.000+0000") for n in range(1, 4)]
+    rows = [transform_issue(i) for i in issues]
+    merge_with_metrics(bq, "p", "d", "raw", rows)
+    # Filas de antes de la columna hash_contenido.
+    for row in bq.rows["p.d.raw"]:
+        row["hash_contenido"] = None
+
+    metrics = merge_with_metrics(bq, "p", "d", "raw", rows)
+
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (0, 3, 0)
+    assert {r["hash_contenido"] for r in bq.rows["p.d.raw"]} == {r["hash_contenido"] for r in rows}
+    assert merge_with_metrics(bq, "p", "d", "raw", rows)["unchanged"] == 3
+
+
+def _job(inserted, updated):
+    return SimpleNamespace(dml_stats=SimpleNamespace(inserted_row_count=inserted, updated_row_count=updated))
+
+
+def test_unchanged_is_staged_minus_inserted_and_updated():
+    bounds = BatchBounds()
+    bounds.update([_row("1", updated="2024-02-05T00:00:00.000+0000", key="ABC-1")])
+    metrics = _merge_metrics_from_job(_job(3, 4), 10, bounds)
+    assert metrics == {
+        "inserted": 3,
+        "updated": 4,
+        "unchanged": 3,
+        "max_updated": "2024-02-05T00:00:00.000+0000",
+        "max_updated_key": "ABC-1",
+    }
+
+
+def test_missing_dml_counts_read_as_zero():
+    metrics = _merge_metrics_from_job(_job(None, None), 5)
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (0, 0, 5)
+    assert metrics["max_updated"] is None
+
+
+def test_unchanged_never_goes_negative():
+    assert _merge_metrics_from_job(_job(4, 3), 5)["unchanged"] == 0
+
+
+def test_dml_metrics_match_row_counts_in_the_table():
+    bq = FakeBigQueryClient("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    first = [_issue(n, created="2024-01-01T00:00:00.000+0000") for n in range(1, 6)]
+    merge_with_metrics(bq, "p", "d", "raw", [transform_issue(i) for i in first])
+    before = {r["jira_id"]: r["hash_contenido"] for r in bq.rows["p.d.raw"]}
+
+    second = first[:3] + [_issue(4, created="2024-01-01T00:00:00.000+0000", summary="b")]
+    second += [_issue(n, created="2024-01-01T00:00:00.000+0000") for n in range(6, 8)]
+    metrics = merge_with_metrics(bq, "p", "d", "raw", [transform_issue(i) for i in second])
+
+    after = {r["jira_id"]: r["hash_contenido"] for r in bq.rows["p.d.raw"]}
+    staged = [i["id"] for i in second]
+    assert metrics["inserted"] == sum(1 for j in staged if j not in before)
+    assert metrics["updated"] == sum(1 for j in staged if j in before and before[j] != after[j])
+    assert metrics["unchanged"] == sum(1 for j in staged if j in before and before[j] == after[j])
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (2, 1, 3)
+
+
+def _staged(bq, **kwargs):
+    return StagedMerger(bq, "p", "d", "raw", run_id="test", max_rows=100, max_bytes=10 ** 9, **kwargs)
+
+
+def test_staged_merge_keeps_newest_version_of_repeated_issue():
+    bq = _RecordingBigQuery("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    merger = _staged(bq)
+
+    created = "2024-01-01T00:00:00.000+0000"
+    assert merger.add([transform_issue(_issue(n, created=created)) for n in range(1, 4)]) is None
+    newer = _issue(2, created=created, updated="2024-02-09T00:00:00.000+0000", summary="nuevo")
+    older = _issue(3, created=created, updated="2024-01-15T00:00:00.000+0000", summary="viejo")
+    assert merger.add([transform_issue(newer), transform_issue(older)]) is None
+    assert merger.pending_rows == 3
+
+    metrics = merger.flush()
+
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (3, 0, 0)
+    assert metrics["max_updated_key"] == "ABC-2"
+    rows = {r["jira_id"]: r for r in bq.rows["p.d.raw"]}
+    assert len(rows) == 3
+    assert "nuevo" in rows["2"]["raw_json"]
+    assert "viejo" not in rows["3"]["raw_json"]
+    assert any("QUALIFY ROW_NUMBER()" in sql for sql in bq.sqls)
+
+
+def test_staged_load_after_flush_truncates_staging():
+    bq = _RecordingBigQuery("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    merger = _staged(bq)
+    created = "2024-01-01T00:00:00.000+0000"
+
+    merger.add([transform_issue(_issue(n, created=created)) for n in range(1, 4)])
+    merger.add([transform_issue(_issue(n, created=created)) for n in range(4, 6)])
+    merger.flush()
+    merger.add([transform_issue(_issue(n, created=created)) for n in range(6, 8)])
+    staging = bq.rows[merger.staging_full]
+
+    metrics = merger.flush()
+
+    assert bq.dispositions == [
+        bigquery.WriteDisposition.WRITE_APPEND,
+        bigquery.WriteDisposition.WRITE_APPEND,
+        bigquery.WriteDisposition.WRITE_TRUNCATE,
+    ]
+    assert sorted(r["jira_id"] for r in staging) == ["6", "7"]
+    assert (metrics["inserted"], metrics["updated"], metrics["unchanged"]) == (2, 0, 0)
+    assert len(bq.rows["p.d.raw"]) == 7
+
+    merger.close()
+    assert merger.staging_full not in bq.rows
+
+
+def test_staged_merge_flushes_when_rows_cross_the_threshold():
+    bq = FakeBigQueryClient("p")
+    bq.create_table(bigquery.Table("p.d.raw", schema=RAW_SCHEMA))
+    merger = StagedMerger(bq, "p", "d", "raw", run_id="test", max_rows=4, max_bytes=10 ** 9)
+    created = "2024-01-01T00:00:00.000+0000"
+
+    assert merger.add([transform_issue(_issue(n, created=created)) for n in range(1, 3)]) is None
+    metrics = merger.add([transform_issue(_issue(n, created=created)) for n in range(3, 6)])
+
+    assert metrics["inserted"] == 5
+    assert merger.pending_rows == 0
+    assert merger.flush() is None
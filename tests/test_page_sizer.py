@@ -0,0 +1,87 @@
+# tests/test_page_sizer.py
+from core.page_sizer import AdaptivePageSize
+
+FAST = {"elapsed": 0.1, "nbytes": 1000}
+
+
+def test_initial_is_clamped_to_bounds():
+    assert AdaptivePageSize(initial=5, min_size=10).current == 10
+    assert AdaptivePageSize(initial=5000, max_size=1000).current == 1000
+
+
+def test_grows_on_fast_full_pages_up_to_max():
+    sizer = AdaptivePageSize(initial=100, max_size=200)
+    sizer.observe(requested=100, returned=100, **FAST)
+    assert sizer.current == 150
+    sizer.observe(requested=150, returned=150, **FAST)
+    assert sizer.current == 200
+    sizer.observe(requested=200, returned=200, **FAST)
+    assert sizer.current == 200
+
+
+def test_small_sizes_still_grow():
+    sizer = AdaptivePageSize(initial=1, min_size=1)
+    sizer.observe(requested=1, returned=1, **FAST)
+    assert sizer.current == 2
+
+
+def test_does_not_grow_on_last_partial_page():
+    sizer = AdaptivePageSize(initial=100)
+    sizer.observe(requested=100, returned=40, is_last=True, **FAST)
+    assert sizer.current == 100
+    assert sizer.max_size == 1000
+
+
+def test_halves_on_slow_heavy_or_near_timeout():
+    slow = AdaptivePageSize(initial=100, target_seconds=5.0)
+    slow.observe(requested=100, returned=100, elapsed=11.0, nbytes=1000)
+    assert slow.current == 50
+
+    heavy = AdaptivePageSize(initial=100, max_bytes=1000)
+    heavy.observe(requested=100, returned=100, elapsed=0.1, nbytes=2000)
+    assert heavy.current == 50
+
+    near_timeout = AdaptivePageSize(initial=100, target_seconds=60.0, timeout_seconds=10.0)
+    near_timeout.observe(requested=100, returned=100, elapsed=6.0, nbytes=1000)
+    assert near_timeout.current == 50
+
+
+def test_never_below_min_size():
+    sizer = AdaptivePageSize(initial=15, min_size=10)
+    sizer.observe(requested=15, returned=15, elapsed=60.0, nbytes=1000)
+    assert sizer.current == 10
+
+
+def test_short_page_that_is_not_last_caps_max_size():
+    sizer = AdaptivePageSize(initial=500)
+    sizer.observe(requested=500, returned=100, **FAST)
+    assert sizer.max_size == 100
+    assert sizer.current == 100
+
+
+def test_server_max_caps_max_size():
+    sizer = AdaptivePageSize(initial=500)
+    sizer.observe(requested=500, returned=500, server_max=250, **FAST)
+    assert sizer.max_size == 250
+    assert sizer.current == 250
+
+
+def test_non_adaptive_only_applies_server_cap():
+    sizer = AdaptivePageSize(initial=100, adaptive=False)
+    sizer.observe(requested=100, returned=100, **FAST)
+    sizer.observe(requested=100, returned=100, elapsed=60.0, nbytes=1000)
+    assert sizer.current == 100
+    sizer.observe(requested=100, returned=100, server_max=50, **FAST)
+    assert sizer.current == 50
+
+
+def test_summary_tracks_requested_range():
+    sizer = AdaptivePageSize(initial=100)
+    sizer.observe(requested=100, returned=100, **FAST)
+    sizer.observe(requested=150, returned=150, elapsed=60.0, nbytes=1000)
+    assert sizer.summary() == {
+        "batch_size": 100,
+        "batch_size_min": 100,
+        "batch_size_max": 150,
+        "batch_size_final": 75,
+    }
@@ -0,0 +1,111 @@
+# tests/test_pipeline.py
+import contextvars
+import logging
+import threading
+
+import pytest
+
+from etl.pipeline import run_pipeline
+
+logger = logging.getLogger("test_pipeline")
+
+
+class _Source:
+    """Generador de páginas que registra cuántas entregó y si se cerró."""
+
+    def __init__(self, n, *, fail_at=None):
+        self.n = n
+        self.fail_at = fail_at
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            for i in range(self.n):
+                if i == self.fail_at:
+                    raise RuntimeError("jira caído")
+                self.produced += 1
+                yield i
+        finally:
+            self.closed.set()
+
+
+def _run(source, *, transform=lambda page: page * 10, sink=None, queue_size=2):
+    out = []
+    run_pipeline(
+        source=source,
+        transform=transform,
+        sink=sink or out.append,
+        queue_size=queue_size,
+        logger=logger,
+    )
+    return out
+
+
+def test_items_flow_in_order():
+    source = _Source(50)
+    assert _run(source) == [i * 10 for i in range(50)]
+    assert source.closed.is_set()
+
+
+def test_fetch_error_stops_the_sink_and_is_raised():
+    source = _Source(50, fail_at=5)
+    seen = []
+    with pytest.raises(RuntimeError, match="jira caído"):
+        _run(source, sink=seen.append)
+    # Lo ya encolado puede descartarse, pero nunca se escribe fuera de orden.
+    assert seen == [i * 10 for i in range(len(seen))]
+    assert len(seen) <= 5
+
+
+def test_transform_error_cancels_source():
+    source = _Source(1000)
+
+    def transform(page):
+        if page == 3:
+            raise ValueError("payload inválido")
+        return page
+
+    with pytest.raises(ValueError, match="payload inválido"):
+        _run(source, transform=transform)
+    assert source.closed.is_set()
+    assert source.produced < 1000
+
+
+def test_sink_error_cancels_upstream_stages():
+    source = _Source(1000)
+
+    def sink(item):
+        if item == 20:
+            raise RuntimeError("MERGE falló")
+
+    with pytest.raises(RuntimeError, match="MERGE falló"):
+        _run(source, sink=sink)
+    assert source.closed.is_set()
+    # Colas acotadas: el fetch no se adelanta más que unas pocas páginas.
+    assert source.produced < 20
+
+
+def test_bounded_queues_apply_backpressure():
+    source = _Source(100)
+    ahead = []
+
+    def sink(item):
+        ahead.append(source.produced - item // 10)
+
+    _run(source, sink=sink, queue_size=1)
+    # Página en el sink + 1 por cola + 1 en cada hilo.
+    assert max(ahead) <= 5
+
+
+def test_stage_threads_see_caller_context():
+    var = contextvars.ContextVar("var", default=None)
+    var.set("board-1")
+    seen = set()
+
+    def transform(page):
+        seen.add(var.get())
+        return page
+
+    _run(_Source(5), transform=transform)
+    assert seen == {"board-1"}
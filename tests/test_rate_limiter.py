@@ -0,0 +1,94 @@
+# tests/test_rate_limiter.py
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from core import rate_limiter
+from core.rate_limiter import TokenBucket, decorrelated_jitter, get_rate_limiter, parse_retry_after
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("120", 120.0), (" 1.5 ", 1.5), ("0", 0.0), ("-3", 0.0), (None, None), ("", None), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_decorrelated_jitter_stays_in_range():
+    for previous in (0.0, 1.0, 10.0, 100.0):
+        sleep = decorrelated_jitter(previous, base=1.0, cap=20.0)
+        assert 1.0 <= sleep <= min(20.0, max(1.0, previous) * 3)
+
+
+def test_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_acquire_sleeps_the_reserved_wait(clock):
+    bucket = TokenBucket(rate=1.0, burst=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert clock.slept == [pytest.approx(1.0)]
+
+
+def test_throttled_halves_rate_and_blocks_until_retry_after(clock):
+    bucket = TokenBucket(rate=4.0, burst=10, min_rate=1.0)
+    bucket.on_throttled(5.0)
+    assert bucket.rate == 2.0
+    assert bucket.reserve() == pytest.approx(5.0)
+
+    bucket.on_throttled(0.0)
+    bucket.on_throttled(0.0)
+    assert bucket.rate == 1.0
+
+
+def test_success_recovers_rate_up_to_max(clock):
+    bucket = TokenBucket(rate=2.0, burst=1, increase_step=0.5)
+    bucket.on_throttled(0.0)
+    assert bucket.rate == 1.0
+    bucket.on_success()
+    assert bucket.rate == 1.5
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == 2.0
+
+
+def test_limiter_is_shared_per_key(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_LIMITERS", {})
+    first = get_rate_limiter("https://jira.example", rate=5, burst=5)
+    assert get_rate_limiter("https://jira.example", rate=1, burst=1) is first
+    assert get_rate_limiter("https://other.example", rate=5, burst=5) is not first
@@ -0,0 +1,179 @@
+# tests/test_runner_resume.py
+import logging
+
+import pytest
+import requests
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import infra_cache
+from core.jira_client import IssuePage
+from etl.runner import run_board
+
+PROJECT = "ABC"
+DATASET = "d"
+TARGET = "ABC_project_raw"
+ISSUES = 1000
+PAGE = 100
+
+logger = logging.getLogger("test_runner_resume")
+
+
+def _issues(n):
+    return [
+        {
+            "id": str(10000 + i),
+            "key": f"{PROJECT}-{i}",
+            "fields": {
+                "summary": f"issue {i}",
+                "created": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.000+0000",
+                "updated": f"2024-02-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000+0000",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+class _FakeJira:
+    """Paginación por offset (cursor de /search); ignora el filtro del JQL."""
+
+    timeout = (5, 30)
+
+    def __init__(self, issues, *, reject_cursor_status=None):
+        self.issues = issues
+        self.reject_cursor_status = reject_cursor_status
+        self.calls = []
+
+    def fetch_issues_by_project(self, *, jql, stats, resume_cursor=None, **kwargs):
+        self.calls.append({"jql": jql, "resume_cursor": resume_cursor})
+        start = 0
+        if resume_cursor:
+            if self.reject_cursor_status:
+                response = requests.Response()
+                response.status_code = self.reject_cursor_status
+                raise requests.HTTPError(f"{self.reject_cursor_status} Client Error", response=response)
+            start = int(resume_cursor["page"]) + int(resume_cursor["skip"])
+        for offset in range(start, len(self.issues), PAGE):
+            page = self.issues[offset:offset + PAGE]
+            stats["api_requests"] += 1
+            yield IssuePage(page, {"endpoint": "search", "page": offset, "skip": len(page)})
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _run(bq, jira, **kwargs):
+    summaries = []
+    result = run_board(
+        target_table=TARGET,
+        jira_project_key=PROJECT,
+        scope="PROJECT",
+        jira_board_id=None,
+        run_id="test",
+        execution_mode="TEST",
+        jira=jira,
+        bq_client=bq,
+        bq_project_id="p",
+        bq_dataset_id=DATASET,
+        logger=logger,
+        summary_writer=summaries.append,
+        expand_changelog=False,
+        staging_format="json",
+        resume=True,
+        **kwargs,
+    )
+    return result, summaries[0]
+
+
+def _state(bq):
+    return bq.rows[f"p.{DATASET}.jira_etl_state"][0]
+
+
+def _raw_rows(bq):
+    return len(bq.rows[f"p.{DATASET}.{TARGET}"])
+
+
+@pytest.mark.parametrize(
+    "options, failing_merge",
+    [
+        ({}, 5),
+        ({"pipelined": True}, 5),
+        ({"merge_mode": "staged", "merge_max_rows": 300}, 3),
+        ({"merge_mode": "append_log", "log_compact_every_rows": 300}, 3),
+    ],
+    ids=["per_batch", "pipelined", "staged", "append_log"],
+)
+def test_resume_after_failed_merge_counts_every_row_once(options, failing_merge):
+    bq = FakeBigQueryClient("p", fail_merges=[failing_merge])
+    jira = _FakeJira(_issues(ISSUES))
+
+    failed, _ = _run(bq, jira, **options)
+    assert failed["status"] == "FAILED"
+    merged_before = _raw_rows(bq)
+    assert 0 < merged_before < ISSUES
+    assert _state(bq)["checkpoint_cursor"] is not None
+
+    resumed, summary = _run(bq, jira, **options)
+    assert resumed["status"] == "SUCCESS"
+    assert jira.calls[-1]["resume_cursor"] is not None
+    assert _raw_rows(bq) == ISSUES
+    assert resumed["rows_inserted"] == ISSUES
+    assert resumed["rows_received"] == ISSUES
+    assert resumed["rows_processed"] == ISSUES
+    assert summary["batches"] == ISSUES // PAGE
+    assert summary["total_rows_bq"] == ISSUES
+    assert _state(bq)["checkpoint_cursor"] is None
+
+
+def test_rejected_cursor_clears_checkpoint_and_uses_watermark():
+    bq = FakeBigQueryClient("p", fail_merges=[5])
+    jira = _FakeJira(_issues(ISSUES))
+
+    failed, _ = _run(bq, jira)
+    assert failed["status"] == "FAILED"
+    checkpoint_jql = _state(bq)["checkpoint_jql"]
+
+    jira.reject_cursor_status = 400
+    resumed, summary = _run(bq, jira)
+    assert resumed["status"] == "SUCCESS"
+    assert jira.calls[-2]["resume_cursor"] is not None
+    assert jira.calls[-1]["resume_cursor"] is None
+    assert jira.calls[-1]["jql"] != checkpoint_jql
+    assert 'updated >= "' in jira.calls[-1]["jql"]
+    assert summary["jql_applied"] == jira.calls[-1]["jql"]
+    assert _raw_rows(bq) == ISSUES
+    assert _state(bq)["checkpoint_cursor"] is None
+
+
+def test_transient_error_on_resume_keeps_checkpoint():
+    bq = FakeBigQueryClient("p", fail_merges=[5])
+    jira = _FakeJira(_issues(ISSUES))
+    _run(bq, jira)
+    cursor = _state(bq)["checkpoint_cursor"]
+
+    jira.reject_cursor_status = 429
+    resumed, _ = _run(bq, jira)
+    assert resumed["status"] == "FAILED"
+    assert _state(bq)["checkpoint_cursor"] == cursor
+
+
+def test_missing_state_is_seeded_from_raw_table():
+    bq = FakeBigQueryClient("p")
+    jira = _FakeJira(_issues(ISSUES))
+    first, _ = _run(bq, jira)
+    assert first["status"] == "SUCCESS"
+    watermark = _state(bq)["watermark"]
+    # Tabla raw cargada antes de que existiera la tabla de estado.
+    bq.rows[f"p.{DATASET}.jira_etl_state"] = []
+    # Sin cambios en Jira: el estado solo puede venir de la siembra.
+    jira.issues = []
+
+    second, _ = _run(bq, jira)
+
+    assert second["status"] == "SUCCESS"
+    assert second["rows_received"] == 0
+    assert _state(bq)["watermark"] == watermark
+    assert watermark == max(r["fecha_actualizacion"] for r in bq.rows[f"p.{DATASET}.{TARGET}"])
+    assert "updated >" in jira.calls[-1]["jql"]
+    assert "updated >" not in jira.calls[0]["jql"]
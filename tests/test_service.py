@@ -0,0 +1,245 @@
+# tests/test_service.py
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+# service.py importa main.py, que importa Secret Manager (requirements.txt).
+pytest.importorskip("google.cloud.secretmanager")
+
+import service  # noqa: E402
+from bench.fake_bigquery import FakeBigQueryClient  # noqa: E402
+from bench.fake_jira import FakeJiraServer  # noqa: E402
+from bq import infra_cache  # noqa: E402
+from service import EtlService, build_jobs  # noqa: E402
+
+PROJECT = "BENCH"
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _runtime(**service_config):
+    return {
+        "jira_project_key": PROJECT,
+        "bq_project_id": "p",
+        "bq_dataset_id": "d",
+        "jira_rate_limit_per_second": 10000,
+        "jira_rate_limit_burst": 10000,
+        "service": service_config,
+    }
+
+
+def _wait(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timeout esperando al scheduler"
+        time.sleep(0.01)
+
+
+class _FakeMain:
+    """
+    Reemplazo de main.main: registra solapes y falla a pedido. Cada job
+    lleva su nombre en el override "job" de su runtime.
+    """
+
+    def __init__(self, *, seconds=0.0, fail=()):
+        self.seconds = seconds
+        self.fail = set(fail)
+        self.calls = []
+        self.active = {}
+        self.max_active = 0
+        self.overlapped = False
+        self._lock = threading.Lock()
+
+    def __call__(self, *, runtime, execution_mode, **clients):
+        name = runtime["job"]
+        with self._lock:
+            self.calls.append(name)
+            n = len(self.calls)
+            self.overlapped = self.overlapped or self.active.get(name, 0) > 0
+            self.active[name] = self.active.get(name, 0) + 1
+            self.max_active = max(self.max_active, sum(self.active.values()))
+        try:
+            time.sleep(self.seconds)
+            if n in self.fail:
+                raise RuntimeError(f"falla inyectada #{n}")
+            return [{
+                "target_table": f"{name}_raw",
+                "status": "SUCCESS",
+                "rows_received": 3,
+                "rows_inserted": 2,
+                "rows_updated": 1,
+            }]
+        finally:
+            with self._lock:
+                self.active[name] -= 1
+
+
+def _service(monkeypatch, fake_main, **config):
+    monkeypatch.setattr(service, "main", fake_main)
+    etl = EtlService(_runtime(**config))
+    monkeypatch.setattr(etl, "_clients", lambda runtime: {})
+    return etl
+
+
+def test_build_jobs_merges_overrides_into_base_runtime():
+    jobs = build_jobs({
+        **_runtime(interval_seconds=60, jobs=[
+            {"name": "all"},
+            {"name": "b7", "interval_seconds": 5, "boards": [{"board_id": 7}]},
+        ]),
+        "batch_size": 50,
+    })
+
+    assert [(j.name, j.interval_seconds) for j in jobs] == [("all", 60), ("b7", 5)]
+    assert "service" not in jobs[0].runtime
+    assert jobs[1].runtime["boards"] == [{"board_id": 7}]
+    assert jobs[1].runtime["batch_size"] == 50
+    assert "name" not in jobs[1].runtime
+
+
+def test_build_jobs_defaults_and_validation():
+    (job,) = build_jobs({"jira_project_key": PROJECT})
+    assert (job.name, job.interval_seconds) == (PROJECT, service.DEFAULT_INTERVAL_SECONDS)
+
+    with pytest.raises(ValueError, match="falta name"):
+        build_jobs(_runtime(jobs=[{"interval_seconds": 5}]))
+    with pytest.raises(ValueError, match="repetidos"):
+        build_jobs(_runtime(jobs=[{"name": "a"}, {"name": "a"}]))
+
+
+def test_jobs_never_overlap_and_respect_concurrency(monkeypatch):
+    fake_main = _FakeMain(seconds=0.05)
+    etl = _service(
+        monkeypatch,
+        fake_main,
+        max_concurrent_jobs=2,
+        jobs=[{"name": n, "job": n, "interval_seconds": 0.01} for n in ("a", "b", "c")],
+    )
+
+    etl.start()
+    try:
+        _wait(lambda: all(j.metrics["runs"] >= 2 for j in etl.jobs.values()))
+    finally:
+        etl.stop()
+        etl.join()
+
+    assert not fake_main.overlapped
+    assert fake_main.max_active == 2
+    assert not any(j.running for j in etl.jobs.values())
+
+
+def test_failures_are_counted_and_reset_on_success(monkeypatch):
+    fake_main = _FakeMain(fail=(1, 2))
+    etl = _service(monkeypatch, fake_main, jobs=[{"name": "a", "job": "a", "interval_seconds": 0.01}])
+    job = etl.jobs["a"]
+
+    etl.start()
+    try:
+        _wait(lambda: job.metrics["failures"] == 2)
+        assert job.metrics["consecutive_failures"] == 2
+        assert job.metrics["last_error"] == "falla inyectada #2"
+        assert job.metrics["last_success_at"] is None
+        _wait(lambda: job.metrics["runs"] >= 3 and job.metrics["last_status"] == "SUCCESS")
+    finally:
+        etl.stop()
+        etl.join()
+
+    assert job.metrics["consecutive_failures"] == 0
+    assert job.metrics["failures"] == 2
+    assert job.metrics["last_success_at"] is not None
+    assert job.metrics["rows_received"] == 3 * (job.metrics["runs"] - 2)
+
+
+def test_trigger_runs_a_job_ahead_of_its_interval(monkeypatch):
+    fake_main = _FakeMain()
+    etl = _service(monkeypatch, fake_main, jobs=[{"name": "a", "job": "a", "interval_seconds": 3600}])
+    job = etl.jobs["a"]
+
+    etl.start()
+    try:
+        _wait(lambda: job.metrics["runs"] == 1)
+        assert job.snapshot()["next_run_in_seconds"] > 3500
+        assert etl.trigger("a")
+        assert not etl.trigger("otro")
+        _wait(lambda: job.metrics["runs"] == 2)
+    finally:
+        etl.stop()
+        etl.join()
+
+
+def test_healthz_metrics_and_run_endpoints(monkeypatch):
+    fake_main = _FakeMain()
+    etl = _service(monkeypatch, fake_main, jobs=[{"name": "a", "job": "a", "interval_seconds": 3600}])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), service._handler(etl))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        assert requests.get(f"{url}/healthz", timeout=5).status_code == 503
+
+        etl.start()
+        _wait(lambda: etl.jobs["a"].metrics["runs"] == 1)
+        health = requests.get(f"{url}/healthz", timeout=5)
+        assert health.status_code == 200
+        body = health.json()
+        assert body["status"] == "ok"
+        assert [(j["name"], j["runs"], j["last_status"]) for j in body["jobs"]] == [("a", 1, "SUCCESS")]
+
+        metrics = requests.get(f"{url}/metrics", timeout=5)
+        assert metrics.headers["Content-Type"].startswith("text/plain")
+        lines = metrics.text.splitlines()
+        assert 'jira_etl_job_runs_total{job="a"} 1' in lines
+        assert 'jira_etl_job_rows_inserted_total{job="a"} 2' in lines
+        assert 'jira_etl_job_running{job="a"} 0' in lines
+        assert "# TYPE jira_etl_job_failures_total counter" in lines
+        # Sin éxito previo la serie no se emite; aquí ya hubo uno.
+        assert any(line.startswith('jira_etl_job_last_success_timestamp_seconds{job="a"}') for line in lines)
+
+        run = requests.post(f"{url}/jobs/a/run", timeout=5)
+        assert run.status_code == 202
+        assert json.loads(run.text) == {"job": "a", "scheduled": True}
+        _wait(lambda: etl.jobs["a"].metrics["runs"] == 2)
+        assert requests.post(f"{url}/jobs/otro/run", timeout=5).status_code == 404
+        assert requests.get(f"{url}/nada", timeout=5).status_code == 404
+
+        etl.stop()
+        etl.join()
+        stopped = requests.get(f"{url}/healthz", timeout=5)
+        assert stopped.status_code == 503
+        assert stopped.json()["status"] == "stopping"
+    finally:
+        etl.stop()
+        if etl._scheduler.is_alive():
+            etl.join()
+        server.shutdown()
+
+
+def test_service_runs_the_etl_against_bench_fakes(monkeypatch):
+    fake_bq = FakeBigQueryClient("p")
+    with FakeJiraServer({"issues": 200, "project_key": PROJECT, "seed": 5}) as jira_server:
+        monkeypatch.setattr(service, "get_secret_json", lambda project, name: {
+            "JIRA_URL": jira_server.url, "JIRA_USER": "u", "JIRA_TOKEN": "t",
+        })
+        monkeypatch.setattr(service, "get_client", lambda project, max_concurrent_jobs=None: fake_bq)
+        etl = EtlService(_runtime(jobs=[{"name": "all", "interval_seconds": 0.05}]))
+        job = etl.jobs["all"]
+
+        etl.start()
+        try:
+            _wait(lambda: job.metrics["runs"] >= 2, timeout=60)
+        finally:
+            etl.stop()
+            etl.join()
+
+    assert job.metrics["failures"] == 0
+    assert job.metrics["rows_inserted"] == 200
+    # La segunda ejecución parte del watermark y reutiliza los clientes.
+    assert len(etl._jira_clients) == 1
+    assert len(fake_bq.rows[f"p.d.{PROJECT}_project_raw"]) == 200
@@ -0,0 +1,131 @@
+# tests/test_sharded_backfill.py
+import logging
+from datetime import datetime
+
+import pytest
+
+from bench.data import IssueFactory
+from bench.fake_bigquery import FakeBigQueryClient
+from bench.fake_jira import compile_jql
+from bq import infra_cache
+from core.jira_client import IssuePage
+from etl.runner import run_board
+
+PROJECT = "ABC"
+TARGET = "ABC_project_raw"
+ISSUES = 400
+PAGE = 50
+
+logger = logging.getLogger("test_sharded_backfill")
+
+
+class _FakeJira:
+    """Evalúa la JQL con el compilador del Jira simulado del bench."""
+
+    timeout = (5, 30)
+
+    def __init__(self, issues):
+        self.issues = issues
+        self.jqls = []
+
+    def _search(self, jql):
+        predicate, sort_key, descending = compile_jql(jql)
+        return sorted((i for i in self.issues if predicate(i)), key=sort_key, reverse=descending)
+
+    def fetch_field_bounds(self, *, jql, field, stats):
+        values = [datetime.fromisoformat(i["fields"][field]) for i in self._search(jql)]
+        return min(values).replace(tzinfo=None), max(values).replace(tzinfo=None)
+
+    def fetch_issues_by_project(self, *, jql, stats, **kwargs):
+        self.jqls.append(jql)
+        issues = self._search(jql)
+        for offset in range(0, len(issues), PAGE):
+            yield IssuePage(issues[offset:offset + PAGE], {"endpoint": "search", "page": offset, "skip": PAGE})
+
+
+class _PreemptedBigQuery(FakeBigQueryClient):
+    """Registra los MERGE; `kill_at` simula la VM detenida en ese MERGE raw."""
+
+    def __init__(self, *args, kill_at=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.kill_at = kill_at
+        self.raw_merges = 0
+        self.state_merges = 0
+
+    def query(self, sql, job_config=None, **kwargs):
+        if f"MERGE `p.d.{TARGET}`" in sql:
+            self.raw_merges += 1
+            if self.raw_merges == self.kill_at:
+                raise SystemExit("preempted")
+        if "MERGE `p.d.jira_etl_state`" in sql:
+            self.state_merges += 1
+        return super().query(sql, job_config=job_config, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fresh_infra_cache(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+
+
+def _issues():
+    return IssueFactory(project_key=PROJECT, custom_fields=0, changelog_depth=0).issues(ISSUES)
+
+
+def _run(bq, jira):
+    return run_board(
+        target_table=TARGET,
+        jira_project_key=PROJECT,
+        scope="PROJECT",
+        jira_board_id=None,
+        run_id="test",
+        execution_mode="TEST",
+        jira=jira,
+        bq_client=bq,
+        bq_project_id="p",
+        bq_dataset_id="d",
+        logger=logger,
+        summary_writer=lambda row: None,
+        expand_changelog=False,
+        staging_format="json",
+        backfill_shards=2,
+    )
+
+
+def _state(bq):
+    return bq.rows["p.d.jira_etl_state"][0]
+
+
+def _max_updated(issues):
+    return max(datetime.fromisoformat(i["fields"]["updated"]) for i in issues)
+
+
+def test_watermark_is_written_once_after_all_shards():
+    issues = _issues()
+    bq, jira = _PreemptedBigQuery("p"), _FakeJira(issues)
+
+    assert _run(bq, jira)["status"] == "SUCCESS"
+    assert bq.raw_merges == ISSUES // PAGE
+    # Marca de backfill en curso + watermark final.
+    assert bq.state_merges == 2
+    state = _state(bq)
+    assert state["backfill_execution_id"] is None
+    assert state["watermark"] == _max_updated(issues)
+    assert len(bq.rows[f"p.d.{TARGET}"]) == ISSUES
+
+
+def test_preempted_backfill_is_reloaded_on_next_run():
+    issues = _issues()
+    bq, jira = _PreemptedBigQuery("p", kill_at=3), _FakeJira(issues)
+
+    with pytest.raises(SystemExit):
+        _run(bq, jira)
+    # Sin rollback: quedan filas parciales, pero el watermark no avanzó.
+    assert 0 < len(bq.rows[f"p.d.{TARGET}"]) < ISSUES
+    assert _state(bq)["backfill_execution_id"] is not None
+    assert _state(bq)["watermark"] is None
+
+    assert _run(bq, jira)["status"] == "SUCCESS"
+    assert all("updated >= " not in jql for jql in jira.jqls)
+    assert len(bq.rows[f"p.d.{TARGET}"]) == ISSUES
+    assert _state(bq)["backfill_execution_id"] is None
+    assert _state(bq)["watermark"] == _max_updated(issues)
@@ -0,0 +1,97 @@
+# tests/test_staging_avro.py
+import io
+import json
+from datetime import datetime, timezone
+
+import fastavro
+import pytest
+from google.cloud import bigquery
+
+from bench.fake_bigquery import read_avro
+from bq.staging import AVRO_BLOCK_ROWS, _write_long, avro_schema, encode_avro
+from etl.merge import RAW_SCHEMA
+
+SCHEMA = [
+    *RAW_SCHEMA,
+    bigquery.SchemaField("n", "INTEGER"),
+    bigquery.SchemaField("x", "FLOAT"),
+    bigquery.SchemaField("ok", "BOOLEAN"),
+]
+
+
+def _rows(n):
+    return [
+        {
+            "jira_id": str(10000 + i),
+            "clave": f"ABC-{i}",
+            "fecha_creacion": "2024-01-02 03:04:05",
+            "fecha_actualizacion": datetime(2024, 2, 3, 4, 5, 6, 789000, tzinfo=timezone.utc),
+            "raw_json": '{"summary":"ñandú 🚀"}'.encode("utf-8"),
+            "hash_contenido": None if i % 7 == 0 else f"{i:064x}",
+            "n": -(2 ** 62) if i % 2 else i,
+            "x": 0.1 * i,
+            "ok": i % 3 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def _expected(row):
+    """Lo que debe leer cualquier decoder Avro (timestamps como datetime UTC)."""
+    return {
+        **row,
+        "fecha_creacion": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "raw_json": row["raw_json"].decode("utf-8"),
+    }
+
+
+@pytest.mark.parametrize(
+    "value, encoded",
+    # Ejemplos de zigzag + varint de la especificación Avro.
+    [(0, b"\x00"), (-1, b"\x01"), (1, b"\x02"), (-2, b"\x03"), (2, b"\x04"),
+     (-64, b"\x7f"), (64, b"\x80\x01"), (-(2 ** 63), b"\xff" * 9 + b"\x01")],
+)
+def test_write_long_matches_spec(value, encoded):
+    buf = bytearray()
+    _write_long(buf, value)
+    assert bytes(buf) == encoded
+
+
+def test_schema_fields_are_nullable_unions():
+    schema = avro_schema(SCHEMA)
+    assert schema["type"] == "record"
+    assert {f["name"]: f["type"] for f in schema["fields"]}["fecha_creacion"] == [
+        "null",
+        {"type": "long", "logicalType": "timestamp-micros"},
+    ]
+    assert all(f["default"] is None for f in schema["fields"])
+
+
+def test_unknown_bigquery_type_is_rejected():
+    with pytest.raises(ValueError):
+        avro_schema([bigquery.SchemaField("g", "GEOGRAPHY")])
+
+
+def test_header_declares_schema_and_deflate():
+    data = encode_avro(_rows(1), SCHEMA)
+    assert data.startswith(b"Obj\x01")
+    assert b"avro.codec" in data and b"deflate" in data
+    assert json.dumps(avro_schema(SCHEMA)).encode("utf-8") in data
+
+
+def test_roundtrip_with_bench_reader_across_blocks():
+    rows = _rows(AVRO_BLOCK_ROWS * 2 + 5)
+    assert read_avro(encode_avro(rows, SCHEMA)) == [_expected(r) for r in rows]
+
+
+def test_empty_rows_encode_header_only():
+    assert read_avro(encode_avro([], SCHEMA)) == []
+
+
+def test_fastavro_reads_encoded_rows():
+    rows = _rows(AVRO_BLOCK_ROWS + 5)
+    data = encode_avro(rows, SCHEMA)
+
+    reader = fastavro.reader(io.BytesIO(data))
+    assert reader.codec == "deflate"
+    assert list(reader) == [_expected(r) for r in rows]
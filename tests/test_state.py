@@ -0,0 +1,123 @@
+# tests/test_state.py
+import pytest
+from google.api_core.exceptions import BadRequest
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import client as bq_client_module
+from metadata.state import WatermarkState, clear_checkpoint, delete_state, ensure_state_table, get_state
+
+STATE = "p.d.jira_etl_state"
+
+
+class _ContendedBigQuery(FakeBigQueryClient):
+    """Aborta los primeros `aborts` DML sobre la tabla de estado, como BigQuery."""
+
+    def __init__(self, *args, aborts=1, error="concurrent update", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.aborts = aborts
+        self.error = error
+        self.state_dml = 0
+
+    def query(self, sql, job_config=None, **kwargs):
+        if f"`{STATE}`" in sql and not sql.lstrip().startswith("SELECT"):
+            self.state_dml += 1
+            if self.aborts:
+                self.aborts -= 1
+                raise BadRequest(f"Could not serialize access to table {STATE} due to {self.error}")
+        return super().query(sql, job_config=job_config, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(bq_client_module.time, "sleep", lambda seconds: None)
+
+
+def _with_checkpoint(bq):
+    ensure_state_table(bq, STATE)
+    state = WatermarkState(STATE, target_table="t", run_id="r")
+    state.checkpoint = {"execution_id": "e", "jql": "project=ABC", "cursor": {"page": 0}}
+    aborts, bq.aborts = bq.aborts, 0
+    state.save(bq, "2024-02-01 00:00:00")
+    bq.aborts, bq.state_dml = aborts, 0
+    return state
+
+
+def test_clear_checkpoint_retries_concurrent_abort():
+    bq = _ContendedBigQuery("p", aborts=2)
+    _with_checkpoint(bq)
+
+    clear_checkpoint(bq, STATE, "t")
+
+    assert bq.state_dml == 3
+    row = bq.rows[STATE][0]
+    assert row["checkpoint_cursor"] is None
+    assert row["watermark"] is not None
+
+
+def test_delete_state_retries_concurrent_abort():
+    bq = _ContendedBigQuery("p", aborts=1)
+    _with_checkpoint(bq)
+
+    delete_state(bq, STATE, "t")
+
+    assert bq.state_dml == 2
+    assert bq.rows[STATE] == []
+
+
+def test_other_dml_errors_are_not_retried():
+    bq = _ContendedBigQuery("p", aborts=1, error="a syntax error")
+    _with_checkpoint(bq)
+
+    with pytest.raises(BadRequest):
+        clear_checkpoint(bq, STATE, "t")
+    assert bq.state_dml == 1
+
+
+def _saved(bq, state, watermark, cursor=None):
+    state.save(bq, watermark, cursor)
+    return get_state(bq, STATE, "t")
+
+
+def test_watermark_only_moves_forward():
+    bq = FakeBigQueryClient("p")
+    ensure_state_table(bq, STATE)
+    state = WatermarkState(STATE, target_table="t", run_id="r")
+
+    first = _saved(bq, state, "2024-02-01 00:00:00", "ABC-1")
+    older = _saved(bq, state, "2024-01-01 00:00:00", "ABC-OLD")
+    newer = _saved(bq, state, "2024-03-01 00:00:00", "ABC-3")
+
+    assert older["watermark"] == first["watermark"]
+    assert older["last_cursor"] == "ABC-1"
+    assert newer["watermark"] > first["watermark"]
+    assert newer["last_cursor"] == "ABC-3"
+    assert len(bq.rows[STATE]) == 1
+
+
+def test_checkpoint_only_save_keeps_watermark_and_scope():
+    bq = FakeBigQueryClient("p")
+    ensure_state_table(bq, STATE)
+    state = WatermarkState(STATE, target_table="t", run_id="r")
+    state.scope_jql = "project=ABC"
+    first = _saved(bq, state, "2024-02-01 00:00:00", "ABC-1")
+
+    resumed = WatermarkState(STATE, target_table="t", run_id="r2")
+    resumed.checkpoint = {"execution_id": "e", "jql": "project=ABC", "cursor": {"page": 100}}
+    row = _saved(bq, resumed, None)
+
+    assert row["watermark"] == first["watermark"]
+    assert row["last_cursor"] == "ABC-1"
+    assert row["scope_jql"] == "project=ABC"
+    assert row["last_run_id"] == "r2"
+    assert row["checkpoint_cursor"] == '{"page": 100}'
+
+
+def test_backfill_marker_is_written_and_cleared_by_save():
+    bq = FakeBigQueryClient("p")
+    ensure_state_table(bq, STATE)
+    state = WatermarkState(STATE, target_table="t", run_id="r")
+
+    state.backfill = "exec-1"
+    assert _saved(bq, state, None)["backfill_execution_id"] == "exec-1"
+    state.backfill = None
+    assert _saved(bq, state, "2024-02-01 00:00:00")["backfill_execution_id"] is None
@@ -0,0 +1,95 @@
+# tests/test_telemetry.py
+import json
+import threading
+
+import pytest
+
+from core import telemetry
+from core.telemetry import STAGES, StageRecorder
+
+
+@pytest.fixture(autouse=True)
+def no_export():
+    telemetry.configure_telemetry()
+    yield
+    telemetry.configure_telemetry()
+
+
+def _recorder(stage, millis):
+    recorder = StageRecorder()
+    for ms in millis:
+        recorder.record(stage, ms / 1000)
+    return recorder
+
+
+def test_percentiles_use_nearest_rank():
+    row = _recorder("merge", range(100, 0, -1)).summary()
+
+    assert row["stage_merge_p50_ms"] == 50
+    assert row["stage_merge_p95_ms"] == 95
+    assert row["stage_merge_seconds"] == 5.05
+
+
+def test_small_samples_round_rank_up():
+    row = _recorder("transform", [10, 30, 20]).summary()
+    assert row["stage_transform_p50_ms"] == 20
+    assert row["stage_transform_p95_ms"] == 30
+
+    single = _recorder("transform", [7]).summary()
+    assert single["stage_transform_p50_ms"] == single["stage_transform_p95_ms"] == 7
+
+
+def test_stages_without_samples_have_no_percentiles():
+    row = _recorder("merge", [5]).summary()
+
+    assert set(row) == {
+        f"stage_{stage}_{suffix}" for stage in STAGES for suffix in ("seconds", "p50_ms", "p95_ms")
+    }
+    assert row["stage_jira_request_seconds"] == 0
+    assert row["stage_jira_request_p95_ms"] is None
+    assert StageRecorder().describe() == ""
+    assert _recorder("merge", [5]).describe() == "merge=0.01s p95=5.0ms"
+
+
+def test_threads_record_into_the_active_recorder():
+    recorder = StageRecorder()
+    token = telemetry.activate(recorder)
+    try:
+        def work():
+            for _ in range(50):
+                telemetry.record("transform", 0.001)
+
+        threads = [threading.Thread(target=telemetry.propagate(work)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with telemetry.stage("merge"):
+            pass
+    finally:
+        telemetry.deactivate(token)
+
+    # Fuera del contexto no hay recorder activo: no se registra nada.
+    telemetry.record("transform", 1.0)
+
+    row = recorder.summary()
+    assert row["stage_transform_seconds"] == 0.2
+    assert row["stage_merge_p50_ms"] is not None
+
+
+def test_exported_spans_carry_recorder_attributes(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    telemetry.configure_telemetry(export=str(path))
+    token = telemetry.activate(StageRecorder(execution_id="e1"))
+    try:
+        with telemetry.stage("state", op="save") as span:
+            span.set("attempts", 2)
+    finally:
+        telemetry.deactivate(token)
+    telemetry.configure_telemetry()
+
+    (line,) = path.read_text(encoding="utf-8").splitlines()
+    span = json.loads(line)
+    assert span["name"] == "jira_etl.state"
+    assert span["attributes"] == {"execution_id": "e1", "op": "save", "attempts": 2}
+    assert span["duration_ms"] >= 0
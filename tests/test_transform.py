@@ -0,0 +1,66 @@
+# tests/test_transform.py
+import hashlib
+import json
+
+from etl.transform import canonical_json_bytes, content_hash, transform_issue
+
+ISSUE = {
+    "id": "10001",
+    "key": "ABC-1",
+    "fields": {
+        "summary": "ñandú 🚀 \"comillas\"",
+        "created": "2024-01-02T03:04:05.678+0000",
+        "updated": "2024-02-03T04:05:06.000+0000",
+        "customfield_1": 1e16,
+        "customfield_2": 0.1,
+        "customfield_3": 1e-7,
+        "labels": ["b", "a"],
+        "empty": None,
+    },
+}
+
+
+def test_canonical_bytes_are_compact_sorted_utf8():
+    raw = canonical_json_bytes({"b": 1, "a": {"d": [1, 2], "c": "ñ"}})
+    assert raw == '{"a":{"c":"ñ","d":[1,2]},"b":1}'.encode("utf-8")
+
+
+def test_canonical_bytes_ignore_key_order():
+    reordered = {
+        "key": ISSUE["key"],
+        "fields": dict(reversed(list(ISSUE["fields"].items()))),
+        "id": ISSUE["id"],
+    }
+    assert canonical_json_bytes(reordered) == canonical_json_bytes(ISSUE)
+
+
+def test_canonical_bytes_float_format_is_fixed():
+    # El formato de floats es parte del hash: 1e16 (orjson), no 1e+16
+    # (json de la stdlib).
+    raw = canonical_json_bytes({"a": 1e16, "b": 0.1, "c": 1e-7})
+    assert raw == b'{"a":1e16,"b":0.1,"c":1e-7}'
+
+
+def test_canonical_bytes_roundtrip():
+    assert json.loads(canonical_json_bytes(ISSUE)) == ISSUE
+
+
+def test_big_int_falls_back_deterministically():
+    issue = {"id": "1", "n": 2 ** 70, "f": 0.5}
+    raw = canonical_json_bytes(issue)
+    assert raw == canonical_json_bytes(dict(reversed(list(issue.items()))))
+    assert json.loads(raw) == issue
+
+
+def test_content_hash_matches_sha256_of_raw_json():
+    raw = canonical_json_bytes(ISSUE)
+    assert content_hash(raw) == hashlib.sha256(raw).hexdigest()
+    assert content_hash(raw.decode("utf-8")) == content_hash(raw)
+
+
+def test_transform_issue_hashes_canonical_bytes():
+    row = transform_issue(ISSUE)
+    assert row["raw_json"] == canonical_json_bytes(ISSUE)
+    assert row["hash_contenido"] == hashlib.sha256(row["raw_json"]).hexdigest()
+    assert row["jira_id"] == "10001"
+    assert row["clave"] == "ABC-1"
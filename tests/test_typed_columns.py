@@ -0,0 +1,144 @@
+# tests/test_typed_columns.py
+import logging
+
+from google.cloud import bigquery
+
+from bench.fake_bigquery import FakeBigQueryClient
+from bq import infra_cache
+from bq.client import ensure_table
+from core.jira_client import IssuePage
+from etl.merge import RAW_SCHEMA, merge_with_metrics
+from etl.runner import run_board
+from etl.transform import transform_issue
+from etl.typed_columns import TypedColumn, backfill_typed_columns, typed_schema
+
+COLUMNS = [
+    TypedColumn("estado", "status", "name"),
+    TypedColumn("estado_categoria", "status", "statusCategory.key"),
+    TypedColumn("sprint", "customfield_10020", "name"),
+    TypedColumn("story_points", "customfield_10016", field_type="FLOAT"),
+    TypedColumn("vence", "customfield_10030", field_type="TIMESTAMP"),
+    TypedColumn("bloqueado", "customfield_10040", field_type="BOOLEAN"),
+    TypedColumn("intentos", "customfield_10050", field_type="INTEGER"),
+    TypedColumn("equipo", "customfield_10060", "value"),
+]
+
+FIELD_VALUES = [
+    {
+        "status": {"name": "En curso", "statusCategory": {"key": "indeterminate"}},
+        "customfield_10020": [{"name": "Sprint 1"}, {"name": "Sprint 2"}],
+        "customfield_10016": 3.5,
+        "customfield_10030": "2024-03-01T10:00:00.000+0000",
+        "customfield_10040": True,
+        "customfield_10050": 7,
+        "customfield_10060": {"value": "Ñandú 🚀"},
+    },
+    {
+        "status": {"name": "Hecho"},
+        "customfield_10020": [],
+        "customfield_10016": "8",
+        "customfield_10040": False,
+        "customfield_10060": {"value": None},
+    },
+    {
+        "customfield_10020": {"name": "Sprint suelto"},
+        "customfield_10016": "no es número",
+        "customfield_10050": None,
+    },
+]
+
+logger = logging.getLogger("test_typed_columns")
+
+
+def _issues():
+    return [
+        {
+            "id": str(100 + n),
+            "key": f"ABC-{n}",
+            "fields": {
+                "created": "2024-01-01T00:00:00.000+0000",
+                "updated": "2024-02-01T00:00:00.000+0000",
+                **values,
+            },
+        }
+        for n, values in enumerate(FIELD_VALUES)
+    ]
+
+
+def _by_id(bq, table):
+    return {r["jira_id"]: {c.name: r[c.name] for c in COLUMNS} for r in bq.rows[table]}
+
+
+def test_sql_backfill_matches_transform_extraction():
+    bq = FakeBigQueryClient("p")
+    schema = RAW_SCHEMA + typed_schema(COLUMNS)
+
+    # Python: columnas extraídas en el transform.
+    bq.create_table(bigquery.Table("p.d.typed", schema=schema))
+    merge_with_metrics(
+        bq, "p", "d", "typed", [transform_issue(i, COLUMNS) for i in _issues()], schema=schema
+    )
+
+    # SQL: tabla cargada sin las columnas, que luego se agregan y completan.
+    bq.create_table(bigquery.Table("p.d.legacy", schema=RAW_SCHEMA))
+    merge_with_metrics(bq, "p", "d", "legacy", [transform_issue(i) for i in _issues()])
+    added = ensure_table(bq, "p.d.legacy", schema)
+    assert added == [c.name for c in COLUMNS]
+    assert backfill_typed_columns(bq, "p.d.legacy", COLUMNS) == len(FIELD_VALUES)
+
+    legacy = _by_id(bq, "p.d.legacy")
+    assert legacy == _by_id(bq, "p.d.typed")
+    assert legacy["100"]["sprint"] == "Sprint 2"
+    assert legacy["101"]["story_points"] == 8.0
+    assert legacy["102"]["sprint"] == "Sprint suelto"
+    assert legacy["102"]["story_points"] is None
+
+
+class _FakeJira:
+    timeout = (5, 30)
+
+    def __init__(self, issues):
+        self.issues = issues
+
+    def fetch_issues_by_project(self, *, jql, stats, **kwargs):
+        # Incremental sin cambios: no llega ningún issue.
+        if "updated >= " not in jql:
+            yield IssuePage(self.issues, {"endpoint": "search", "page": 0, "skip": len(self.issues)})
+
+
+def test_run_fills_typed_columns_added_to_existing_table(monkeypatch):
+    monkeypatch.setattr(infra_cache, "_CACHE", infra_cache.InfraCache())
+    bq, jira = FakeBigQueryClient("p"), _FakeJira(_issues())
+
+    def run(**kwargs):
+        return run_board(
+            target_table="ABC_project_raw",
+            jira_project_key="ABC",
+            scope="PROJECT",
+            jira_board_id=None,
+            run_id="test",
+            execution_mode="TEST",
+            jira=jira,
+            bq_client=bq,
+            bq_project_id="p",
+            bq_dataset_id="d",
+            logger=logger,
+            summary_writer=lambda row: None,
+            expand_changelog=False,
+            staging_format="json",
+            **kwargs,
+        )
+
+    assert run()["status"] == "SUCCESS"
+    typed_config = [
+        {"name": "estado", "field": "status", "path": "name"},
+        {"name": "sprint", "field": "customfield_10020", "path": "name"},
+    ]
+    result = run(typed_columns=typed_config)
+    assert result["status"] == "SUCCESS"
+    assert result["rows_received"] == 0
+
+    rows = {r["clave"]: r for r in bq.rows["p.d.ABC_project_raw"]}
+    assert rows["ABC-0"]["estado"] == "En curso"
+    assert rows["ABC-0"]["sprint"] == "Sprint 2"
+    assert rows["ABC-1"]["estado"] == "Hecho"